@@ -0,0 +1,145 @@
+import json
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import engine
+
+
+# Page size limits for the cursor-paginated list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows fetched from the database per round trip when streaming
+STREAM_CHUNK_SIZE = 1000
+
+# Hand-rolled line template; cheaper per row than json.dumps on a dict
+_NDJSON_ROW = (
+    '{"id": %d, "hotel_id": %d, "room_type_id": %d, "booking_date": "%s", '
+    '"check_in_date": "%s", "check_out_date": "%s", "status": %s, "price_sold": %s}\n'
+)
+
+BOOKING_COLUMNS = (
+    models.Booking.id,
+    models.Booking.hotel_id,
+    models.Booking.room_type_id,
+    models.Booking.booking_date,
+    models.Booking.check_in_date,
+    models.Booking.check_out_date,
+    models.Booking.status,
+    models.Booking.price_sold,
+)
+
+
+@dataclass
+class BookingFilters:
+    hotel_id: int | None = None
+    room_type_id: int | None = None
+    status: str | None = None
+    check_in_from: date | None = None  # inclusive
+    check_in_to: date | None = None  # inclusive
+
+    def conditions(self) -> list:
+        conditions = []
+        if self.hotel_id is not None:
+            conditions.append(models.Booking.hotel_id == self.hotel_id)
+        if self.room_type_id is not None:
+            conditions.append(models.Booking.room_type_id == self.room_type_id)
+        if self.status is not None:
+            conditions.append(models.Booking.status == self.status)
+        if self.check_in_from is not None:
+            conditions.append(models.Booking.check_in_date >= self.check_in_from)
+        if self.check_in_to is not None:
+            conditions.append(models.Booking.check_in_date <= self.check_in_to)
+        return conditions
+
+
+def booking_filters(
+    room_type_id: int | None = None,
+    status: str | None = None,
+    check_in_from: date | None = None,
+    check_in_to: date | None = None,
+) -> BookingFilters:
+    """FastAPI dependency collecting the shared booking filter query parameters."""
+    return BookingFilters(
+        room_type_id=room_type_id,
+        status=status,
+        check_in_from=check_in_from,
+        check_in_to=check_in_to,
+    )
+
+
+def _booking_page_query(filters: BookingFilters, cursor: int | None, limit: int) -> Select:
+    stmt = select(models.Booking).where(*filters.conditions())
+    if cursor is not None:
+        stmt = stmt.where(models.Booking.id > cursor)
+    # One extra row tells us whether another page exists
+    return stmt.order_by(models.Booking.id).limit(limit + 1)
+
+
+def _split_page(rows, limit: int) -> Tuple[List[models.Booking], int | None]:
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+
+def fetch_booking_page(
+    db: Session,
+    filters: BookingFilters,
+    cursor: int | None,
+    limit: int,
+) -> Tuple[List[models.Booking], int | None]:
+    """
+    Keyset pagination on id: returns up to `limit` bookings with id > cursor,
+    and the cursor for the next page (None on the last page).
+    """
+    return _split_page(db.scalars(_booking_page_query(filters, cursor, limit)), limit)
+
+
+async def fetch_booking_page_async(
+    db: AsyncSession,
+    filters: BookingFilters,
+    cursor: int | None,
+    limit: int,
+) -> Tuple[List[models.Booking], int | None]:
+    """fetch_booking_page for an AsyncSession."""
+    return _split_page(await db.scalars(_booking_page_query(filters, cursor, limit)), limit)
+
+
+def stream_bookings_ndjson(filters: BookingFilters) -> Iterator[str]:
+    """
+    Yield matching bookings as NDJSON, in id order.
+
+    Reads plain column tuples in chunks of STREAM_CHUNK_SIZE through its own
+    connection (no ORM objects, no full result list), so memory stays flat
+    however many rows match.
+    """
+    stmt = (
+        select(*BOOKING_COLUMNS)
+        .where(*filters.conditions())
+        .order_by(models.Booking.id)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    with engine.connect() as conn:
+        result = conn.execute(stmt)
+        for chunk in result.partitions():
+            yield "".join(
+                _NDJSON_ROW % (
+                    row.id,
+                    row.hotel_id,
+                    row.room_type_id,
+                    row.booking_date.isoformat(),
+                    row.check_in_date.isoformat(),
+                    row.check_out_date.isoformat(),
+                    json.dumps(row.status),
+                    json.dumps(row.price_sold),
+                )
+                for row in chunk
+            )
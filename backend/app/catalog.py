@@ -0,0 +1,293 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+# Upper bound on how stale another worker's catalog writes can look here
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "60"))
+# How long an id that wasn't in the database is answered as missing without a lookup
+CATALOG_MISS_TTL_SECONDS = float(os.getenv("CATALOG_MISS_TTL_SECONDS", "5"))
+MAX_CACHED_MISSES = 10_000
+
+
+@dataclass(frozen=True)
+class HotelEntry:
+    id: int
+    name: str
+    city: str
+    country: str
+
+
+@dataclass(frozen=True)
+class RoomTypeEntry:
+    id: int
+    hotel_id: int
+    name: str
+    capacity: int
+    base_price: float
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    hotels: Dict[int, HotelEntry]
+    room_types: Dict[int, RoomTypeEntry]
+    room_types_by_hotel: Dict[int, Tuple[RoomTypeEntry, ...]]
+    loaded_at: float
+    # CatalogStore._generation when the data was read; write-through bumps it
+    generation: int
+
+
+def _hotel_entry(hotel: models.Hotel) -> HotelEntry:
+    return HotelEntry(id=hotel.id, name=hotel.name, city=hotel.city, country=hotel.country)
+
+
+def _room_type_entry(rt: models.RoomType) -> RoomTypeEntry:
+    return RoomTypeEntry(
+        id=rt.id,
+        hotel_id=rt.hotel_id,
+        name=rt.name,
+        capacity=rt.capacity,
+        base_price=rt.base_price,
+    )
+
+
+def _group_by_hotel(room_types: Dict[int, RoomTypeEntry]) -> Dict[int, Tuple[RoomTypeEntry, ...]]:
+    grouped: Dict[int, List[RoomTypeEntry]] = {}
+    for rt in sorted(room_types.values(), key=lambda r: r.id):
+        grouped.setdefault(rt.hotel_id, []).append(rt)
+    return {hotel_id: tuple(rts) for hotel_id, rts in grouped.items()}
+
+
+def load_portfolio(db: Session) -> Dict[int, Tuple[str, List[RoomTypeEntry]]]:
+    """
+    hotel_id -> (city, room types) for the whole portfolio, straight from
+    the database as plain entries (ORM objects would be expired by the
+    caller's commits). For batch jobs; requests use the catalog.
+    """
+    rt = models.RoomType
+    rows = db.execute(
+        select(rt.id, rt.hotel_id, rt.name, rt.capacity, rt.base_price, models.Hotel.city)
+        .join(models.Hotel, rt.hotel_id == models.Hotel.id)
+        .order_by(rt.hotel_id, rt.id)
+    ).all()
+    hotels: Dict[int, Tuple[str, List[RoomTypeEntry]]] = {}
+    for rt_id, hotel_id, name, capacity, base_price, city in rows:
+        entry = RoomTypeEntry(id=rt_id, hotel_id=hotel_id, name=name, capacity=capacity, base_price=base_price)
+        hotels.setdefault(hotel_id, (city, []))[1].append(entry)
+    return hotels
+
+
+class CatalogStore:
+    """
+    Process-local, read-mostly copy of the hotels and room_types tables.
+
+    Readers get an immutable snapshot, so lookups need no lock and no SQL.
+    Writes made through this process are applied write-through by building a
+    new snapshot; writes from other workers show up after at most
+    `ttl_seconds`, or immediately when a lookup misses. A miss costs one
+    primary-key lookup, and ids that don't exist are remembered for
+    `miss_ttl_seconds`, so unknown ids never trigger full reloads.
+    """
+
+    def __init__(self, ttl_seconds: float = CATALOG_TTL_SECONDS, miss_ttl_seconds: float = CATALOG_MISS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.miss_ttl_seconds = miss_ttl_seconds
+        self._snapshot: _Snapshot | None = None
+        self._misses: Dict[Tuple[str, int], float] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _read(self, db: Session) -> _Snapshot:
+        # Taken before the queries: a write-through committed during them bumps it
+        generation = self._generation
+        hotels = {h.id: _hotel_entry(h) for h in db.query(models.Hotel).all()}
+        room_types = {rt.id: _room_type_entry(rt) for rt in db.query(models.RoomType).all()}
+        return _Snapshot(
+            hotels=hotels,
+            room_types=room_types,
+            room_types_by_hotel=_group_by_hotel(room_types),
+            loaded_at=time.monotonic(),
+            generation=generation,
+        )
+
+    def _install(self, snapshot: _Snapshot) -> _Snapshot:
+        """
+        Install a freshly read snapshot unless a write-through happened while
+        it was read; then the current one is newer and stays. Caller holds
+        the lock.
+        """
+        current = self._snapshot
+        if current is not None and current.generation > snapshot.generation:
+            return current
+        self._snapshot = snapshot
+        return snapshot
+
+    def _is_stale(self, snapshot: _Snapshot | None) -> bool:
+        return snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl_seconds
+
+    def _current(self, db: Session) -> _Snapshot:
+        snapshot = self._snapshot
+        if self._is_stale(snapshot):
+            with self._lock:
+                # Another thread may have reloaded while we waited
+                snapshot = self._snapshot
+                if self._is_stale(snapshot):
+                    snapshot = self._install(self._read(db))
+        return snapshot
+
+    # ---------- misses ----------
+
+    def _known_missing(self, kind: str, entry_id: int) -> bool:
+        expires = self._misses.get((kind, entry_id))
+        return expires is not None and expires > time.monotonic()
+
+    def _record_miss(self, kind: str, entry_id: int) -> None:
+        if len(self._misses) >= MAX_CACHED_MISSES:
+            self._misses.clear()
+        self._misses[(kind, entry_id)] = time.monotonic() + self.miss_ttl_seconds
+
+    def _fetch_hotel(self, db: Session, hotel_id: int) -> HotelEntry | None:
+        """
+        Primary-key lookup for a hotel missing from the snapshot (e.g. created
+        by another worker); a hit is merged in along with its room types.
+        """
+        hotel = db.get(models.Hotel, hotel_id)
+        if hotel is None:
+            self._record_miss("hotel", hotel_id)
+            return None
+        entry = _hotel_entry(hotel)
+        room_types = db.query(models.RoomType).filter(models.RoomType.hotel_id == hotel_id).all()
+        self._merge([entry], [_room_type_entry(rt) for rt in room_types])
+        return entry
+
+    def _fetch_room_type(self, db: Session, room_type_id: int) -> RoomTypeEntry | None:
+        """Primary-key lookup for a room type missing from the snapshot (plus its hotel when that is missing too)."""
+        room_type = db.get(models.RoomType, room_type_id)
+        if room_type is None:
+            self._record_miss("room_type", room_type_id)
+            return None
+        entry = _room_type_entry(room_type)
+        hotels = []
+        snapshot = self._snapshot
+        if snapshot is None or entry.hotel_id not in snapshot.hotels:
+            hotel = db.get(models.Hotel, entry.hotel_id)
+            if hotel is not None:
+                hotels.append(_hotel_entry(hotel))
+        self._merge(hotels, [entry])
+        return entry
+
+    def get_hotel(self, db: Session, hotel_id: int) -> HotelEntry | None:
+        hotel = self._current(db).hotels.get(hotel_id)
+        if hotel is None and not self._known_missing("hotel", hotel_id):
+            # Might have been created by another worker since our last load
+            hotel = self._fetch_hotel(db, hotel_id)
+        return hotel
+
+    def get_room_type(self, db: Session, room_type_id: int) -> RoomTypeEntry | None:
+        room_type = self._current(db).room_types.get(room_type_id)
+        if room_type is None and not self._known_missing("room_type", room_type_id):
+            room_type = self._fetch_room_type(db, room_type_id)
+        return room_type
+
+    def room_types_for_hotel(self, db: Session, hotel_id: int) -> List[RoomTypeEntry]:
+        snapshot = self._current(db)
+        if hotel_id not in snapshot.hotels and not self._known_missing("hotel", hotel_id):
+            # A hotel created since the load: its lookup merges its room types
+            self._fetch_hotel(db, hotel_id)
+            snapshot = self._snapshot
+        return list(snapshot.room_types_by_hotel.get(hotel_id, ()))
+
+    # Async variants for AsyncSession callers. A (re)load or miss lookup runs
+    # the same query code through run_sync; without the thread lock, which
+    # must not be held across an await, concurrent loads just build equal
+    # snapshots. The lock is only taken to install or merge, after the reads.
+
+    async def _current_async(self, db: AsyncSession) -> _Snapshot:
+        snapshot = self._snapshot
+        if self._is_stale(snapshot):
+            loaded = await db.run_sync(self._read)
+            with self._lock:
+                snapshot = self._install(loaded)
+        return snapshot
+
+    async def get_hotel_async(self, db: AsyncSession, hotel_id: int) -> HotelEntry | None:
+        hotel = (await self._current_async(db)).hotels.get(hotel_id)
+        if hotel is None and not self._known_missing("hotel", hotel_id):
+            hotel = await db.run_sync(self._fetch_hotel, hotel_id)
+        return hotel
+
+    async def get_room_type_async(self, db: AsyncSession, room_type_id: int) -> RoomTypeEntry | None:
+        room_type = (await self._current_async(db)).room_types.get(room_type_id)
+        if room_type is None and not self._known_missing("room_type", room_type_id):
+            room_type = await db.run_sync(self._fetch_room_type, room_type_id)
+        return room_type
+
+    async def room_types_for_hotel_async(self, db: AsyncSession, hotel_id: int) -> List[RoomTypeEntry]:
+        snapshot = await self._current_async(db)
+        if hotel_id not in snapshot.hotels and not self._known_missing("hotel", hotel_id):
+            await db.run_sync(self._fetch_hotel, hotel_id)
+            snapshot = self._snapshot
+        return list(snapshot.room_types_by_hotel.get(hotel_id, ()))
+
+    def _merge(self, hotels: List[HotelEntry], room_types: List[RoomTypeEntry]) -> None:
+        """Build a new snapshot with these entries added / replaced."""
+        with self._lock:
+            for hotel in hotels:
+                self._misses.pop(("hotel", hotel.id), None)
+            for room_type in room_types:
+                self._misses.pop(("room_type", room_type.id), None)
+            self._generation += 1
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            hotel_map = snapshot.hotels
+            if hotels:
+                hotel_map = dict(hotel_map)
+                hotel_map.update((hotel.id, hotel) for hotel in hotels)
+            room_type_map, by_hotel = snapshot.room_types, snapshot.room_types_by_hotel
+            if room_types:
+                room_type_map = dict(room_type_map)
+                by_hotel = dict(by_hotel)
+                # Regroup only the hotels gaining or losing a room type
+                changed = {room_type.id for room_type in room_types}
+                affected = {room_type.hotel_id for room_type in room_types}
+                affected.update(room_type_map[rt_id].hotel_id for rt_id in changed if rt_id in room_type_map)
+                room_type_map.update((room_type.id, room_type) for room_type in room_types)
+                for hotel_id in affected:
+                    kept = [rt for rt in by_hotel.get(hotel_id, ()) if rt.id not in changed]
+                    added = [rt for rt in room_types if rt.hotel_id == hotel_id]
+                    grouped = tuple(sorted(kept + added, key=lambda r: r.id))
+                    if grouped:
+                        by_hotel[hotel_id] = grouped
+                    else:
+                        by_hotel.pop(hotel_id, None)
+            self._snapshot = _Snapshot(
+                hotels=hotel_map,
+                room_types=room_type_map,
+                room_types_by_hotel=by_hotel,
+                loaded_at=snapshot.loaded_at,
+                generation=self._generation,
+            )
+
+    def put_hotel(self, hotel: models.Hotel) -> None:
+        """Write-through after a hotel insert/update has been committed."""
+        self._merge([_hotel_entry(hotel)], [])
+
+    def put_room_type(self, room_type: models.RoomType) -> None:
+        """Write-through after a room type insert/update has been committed."""
+        self._merge([], [_room_type_entry(room_type)])
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+        self._misses.clear()
+
+
+catalog = CatalogStore()
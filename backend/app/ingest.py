@@ -0,0 +1,197 @@
+import argparse
+import csv
+import io
+import json
+import os
+from typing import Iterable, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.occupancy import add_bookings
+
+
+# Rows handed to the driver per executemany call
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 4000
+
+# Cap on per-row errors echoed back to the client
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("json", "ndjson", "csv")
+
+
+def detect_format(content_type: str | None = None, filename: str | None = None) -> str:
+    """Pick the input format from a Content-Type header or a file extension."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type == "application/json":
+        return "json"
+
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext == ".csv":
+        return "csv"
+    return "json"
+
+
+def parse_rows(data: bytes, fmt: str) -> Iterable[Tuple[int, dict | None, str | None]]:
+    """
+    Yield (row_number, raw_row, parse_error) for every input record.
+    Row numbers are 1-based positions in the upload (data rows for CSV).
+    """
+    text = data.decode("utf-8-sig")
+
+    if fmt == "json":
+        try:
+            records = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON: {exc}") from exc
+        if not isinstance(records, list):
+            raise ValueError("JSON body must be an array of bookings")
+        for i, record in enumerate(records, start=1):
+            if isinstance(record, dict):
+                yield i, record, None
+            else:
+                yield i, None, "Expected a JSON object"
+
+    elif fmt == "ndjson":
+        row_number = 0
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield row_number, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if isinstance(record, dict):
+                yield row_number, record, None
+            else:
+                yield row_number, None, "Expected a JSON object"
+
+    elif fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for i, record in enumerate(reader, start=1):
+            yield i, record, None
+
+    else:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {FORMATS}")
+
+
+def _error_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def _insert_batch(db: Session, batch: List[dict]) -> None:
+    # One cached INSERT executed with the whole batch as executemany parameters.
+    # Passing the rows to .values() instead recompiles a statement with
+    # 7 * batch_size bind parameters for every batch, which dominated the run.
+    db.connection().execute(insert(models.Booking.__table__), batch)
+    add_bookings(db, batch)
+
+
+def ingest_bookings(
+    db: Session,
+    data: bytes,
+    fmt: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> schemas.BulkBookingResult:
+    """
+    Validate and insert every booking in `data` in a single transaction.
+
+    Hotel / room type pairs are checked against one prefetched mapping
+    instead of two lookups per row. Valid rows are inserted with multi-row
+    INSERTs of `batch_size` rows; invalid rows are skipped and reported.
+    """
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+
+    # room_type_id -> hotel_id for the whole catalog, in one query
+    room_type_hotel = dict(db.query(models.RoomType.id, models.RoomType.hotel_id).all())
+
+    received = 0
+    inserted = 0
+    n_errors = 0
+    errors: List[schemas.BulkBookingError] = []
+    batch: List[dict] = []
+
+    def report(row_number: int, message: str) -> None:
+        nonlocal n_errors
+        n_errors += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(schemas.BulkBookingError(row=row_number, error=message))
+
+    try:
+        for row_number, record, parse_error in parse_rows(data, fmt):
+            received += 1
+            if parse_error is not None:
+                report(row_number, parse_error)
+                continue
+            try:
+                booking = schemas.BookingCreate.model_validate(record)
+            except ValidationError as exc:
+                report(row_number, _error_message(exc))
+                continue
+
+            hotel_id = room_type_hotel.get(booking.room_type_id)
+            if hotel_id is None or hotel_id != booking.hotel_id:
+                report(row_number, "Invalid room type for this hotel")
+                continue
+
+            batch.append(booking.model_dump())
+            if len(batch) >= batch_size:
+                _insert_batch(db, batch)
+                inserted += len(batch)
+                batch = []
+
+        if batch:
+            _insert_batch(db, batch)
+            inserted += len(batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return schemas.BulkBookingResult(
+        received=received,
+        inserted=inserted,
+        failed=n_errors,
+        errors=errors,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load bookings from a JSON, NDJSON or CSV file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    fmt = args.format or detect_format(filename=args.path)
+    with open(args.path, "rb") as f:
+        data = f.read()
+
+    db = SessionLocal()
+    try:
+        result = ingest_bookings(db, data, fmt, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"Received {result.received}, inserted {result.inserted}, failed {result.failed}")
+    for err in result.errors[:20]:
+        print(f"  row {err.row}: {err.error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,97 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from sqlalchemy import String, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import models
-from app.database import engine
+from app.bookings import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    BookingFilters,
+    booking_filters,
+    fetch_booking_page_async,
+    stream_bookings_ndjson,
+)
+from app.catalog import catalog
+from app.database import async_engine, engine
+from app.ingest import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, detect_format, ingest_bookings
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine, render
+from app.migrations import DB_AUTO_MIGRATE, init_schema
+from app.occupancy import add_bookings, booking_row, change_status
 from app import schemas
-from app.dependencies import get_db
-from app.ml.predict import predict_price_for_stay
+from app.dependencies import get_async_db, get_db
+from app.ml import registry
+from app.ml.batching import batcher, predict_price_for_stay_batched
+from app.ml.feature_store import invalidate_feature_store
+from app.ml.inference import InferenceQueueFull, inference_executor
+from app.ml.predict import (
+    clamp_to_base_price,
+    get_loaded_version,
+    load_price_model,
+    predict_prices_batch,
+    prediction_cache,
+    reload_model,
+    start_model_watcher,
+    stop_model_watcher,
+)
+from app.profiler import PROFILER_ENABLED, endpoint_codes, profiler
+from app.rate_grid import (
+    RATE_GRID_BOOKING_WINDOW,
+    RATE_GRID_DAYS,
+    start_rate_grid_sweeper,
+    stop_rate_grid_sweeper,
+)
+from app.revenue import (
+    REVENUE_BOOKING_WINDOW,
+    get_demand_model,
+    load_on_books,
+    optimize_hotel_prices,
+    start_demand_refresh,
+)
 from fastapi.middleware.cors import CORSMiddleware
 
 
 
-app = FastAPI(title="SmartRate AI - Hotel Pricing API")
+# Upper bound on the date range of a single batch recommendation request
+MAX_BATCH_DAYS = 366
+# Most room type x date x stay length x booking window cells per batch request
+MAX_BATCH_CELLS = 100_000
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables and bring existing databases up to the current schema,
+    # unless deploys do that as a separate step (python -m app.migrations)
+    if DB_AUTO_MIGRATE:
+        init_schema(engine)
+    # Load the pricing model before the first request instead of during it,
+    # then follow the registry for newly activated versions
+    load_price_model()
+    start_model_watcher()
+    start_rate_grid_sweeper()
+    # Build the revenue demand model in the background, off the first request
+    start_demand_refresh()
+    if PROFILER_ENABLED:
+        profiler.start(endpoint_codes(app.routes))
+    yield
+    stop_model_watcher()
+    stop_rate_grid_sweeper()
+    batcher.shutdown()
+    inference_executor.shutdown()
+    # aiosqlite connections each hold a thread; close them with the loop still running
+    await async_engine.dispose()
+    if PROFILER_ENABLED:
+        profiler.stop()
+        profiler.dump()
+
+
+app = FastAPI(title="SmartRate AI - Hotel Pricing API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,10 +100,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the timing includes CORS handling
+app.add_middleware(MetricsMiddleware)
 
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine, pool_gauge="db_async_pool_connections")
 
 
 @app.get("/")
@@ -35,32 +118,43 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.exception_handler(InferenceQueueFull)
+async def inference_queue_full_handler(request: Request, exc: InferenceQueueFull):
+    # Shed load rather than queueing without bound
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Inference queue is full, retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.post("/hotels", response_model=schemas.Hotel)
-def create_hotel(hotel: schemas.HotelCreate, db: Session = Depends(get_db)):
+async def create_hotel(hotel: schemas.HotelCreate, db: AsyncSession = Depends(get_async_db)):
     db_hotel = models.Hotel(
         name=hotel.name,
         city=hotel.city,
         country=hotel.country,
     )
     db.add(db_hotel)
-    db.commit()
-    db.refresh(db_hotel)
+    await db.commit()
+    await db.refresh(db_hotel)
+    catalog.put_hotel(db_hotel)
     return db_hotel
 
 
 @app.get("/hotels", response_model=list[schemas.Hotel])
-def list_hotels(db: Session = Depends(get_db)):
-    hotels = db.query(models.Hotel).all()
+async def list_hotels(db: AsyncSession = Depends(get_async_db)):
+    hotels = (await db.scalars(select(models.Hotel))).all()
     return hotels
 
 
 @app.post("/room-types", response_model=schemas.RoomType)
-def create_room_type(
+async def create_room_type(
     room_type: schemas.RoomTypeCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
        # Ensure hotel exists (basic check)
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == room_type.hotel_id).first()
+    hotel = await catalog.get_hotel_async(db, room_type.hotel_id)
     if hotel is None:
         raise HTTPException(status_code=404, detail="Hotel not found")
 
@@ -72,43 +166,35 @@ def create_room_type(
         base_price=room_type.base_price,
     )
     db.add(db_room_type)
-    db.commit()
-    db.refresh(db_room_type)
+    await db.commit()
+    await db.refresh(db_room_type)
+    catalog.put_room_type(db_room_type)
     return db_room_type
 
 
 @app.get("/room-types", response_model=list[schemas.RoomType])
-def list_room_types(db: Session = Depends(get_db)):
-    room_types = db.query(models.RoomType).all()
+async def list_room_types(db: AsyncSession = Depends(get_async_db)):
+    room_types = (await db.scalars(select(models.RoomType))).all()
     return room_types
 
 
 @app.get("/hotels/{hotel_id}/room-types", response_model=list[schemas.RoomType])
-def list_room_types_for_hotel(hotel_id: int, db: Session = Depends(get_db)):
-    room_types = (
-        db.query(models.RoomType)
-        .filter(models.RoomType.hotel_id == hotel_id)
-        .all()
-    )
-    return room_types
+async def list_room_types_for_hotel(hotel_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await catalog.room_types_for_hotel_async(db, hotel_id)
 
 
 @app.post("/bookings", response_model=schemas.Booking)
-def create_booking(
+async def create_booking(
     booking: schemas.BookingCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Ensure hotel exists
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == booking.hotel_id).first()
+    hotel = await catalog.get_hotel_async(db, booking.hotel_id)
     if hotel is None:
         raise HTTPException(status_code=404, detail="Hotel not found")
 
     # Ensure room type exists and belongs to the same hotel
-    room_type = (
-        db.query(models.RoomType)
-        .filter(models.RoomType.id == booking.room_type_id)
-        .first()
-    )
+    room_type = await catalog.get_room_type_async(db, booking.room_type_id)
     if room_type is None or room_type.hotel_id != booking.hotel_id:
         raise HTTPException(status_code=400, detail="Invalid room type for this hotel")
 
@@ -122,48 +208,124 @@ def create_booking(
         price_sold=booking.price_sold,
     )
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
+    # Same transaction, so the aggregate never disagrees with bookings
+    await db.run_sync(add_bookings, [booking.model_dump()])
+    await db.commit()
+    await db.refresh(db_booking)
     return db_booking
 
 
-@app.get("/bookings", response_model=list[schemas.Booking])
-def list_bookings(db: Session = Depends(get_db)):
-    bookings = db.query(models.Booking).all()
-    return bookings
+@app.patch("/bookings/{booking_id}/status", response_model=schemas.Booking)
+async def update_booking_status(
+    booking_id: int,
+    payload: schemas.BookingStatusUpdate,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Change a booking's status (e.g. to cancelled) and move its nights in daily_occupancy."""
+    db_booking = await db.get(models.Booking, booking_id)
+    if db_booking is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
+    if db_booking.status == payload.status:
+        return db_booking
+
+    # Conditional on the status we read: of two concurrent changes only one
+    # applies, so the occupancy deltas are never counted twice
+    old = booking_row(db_booking)
+    result = await db.execute(
+        update(models.Booking)
+        .where(models.Booking.id == booking_id, models.Booking.status == old["status"])
+        .values(status=payload.status)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Booking status changed concurrently; retry")
+    await db.run_sync(change_status, old, payload.status)
+    await db.commit()
+    # The training feature store holds this booking with its old status
+    invalidate_feature_store()
+    await db.refresh(db_booking)
+    return db_booking
 
 
-@app.get("/hotels/{hotel_id}/bookings", response_model=list[schemas.Booking])
-def list_bookings_for_hotel(hotel_id: int, db: Session = Depends(get_db)):
-    bookings = (
-        db.query(models.Booking)
-        .filter(models.Booking.hotel_id == hotel_id)
-        .all()
-    )
-    return bookings
+@app.post("/bookings/bulk", response_model=schemas.BulkBookingResult)
+async def create_bookings_bulk(
+    request: Request,
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    Import many bookings in one transaction. The body is a JSON array,
+    NDJSON (application/x-ndjson) or CSV (text/csv) with BookingCreate fields.
+    Invalid rows are skipped and reported; the rest are inserted.
+    """
+    data = await request.body()
+    fmt = detect_format(request.headers.get("content-type"))
+    try:
+        # Parsing and inserting are blocking; keep them off the event loop
+        return await run_in_threadpool(ingest_bookings, db, data, fmt, batch_size)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@app.get("/bookings", response_model=schemas.BookingPage)
+async def list_bookings(
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filters: BookingFilters = Depends(booking_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    bookings, next_cursor = await fetch_booking_page_async(db, filters, cursor, limit)
+    return schemas.BookingPage(items=bookings, next_cursor=next_cursor)
+
+
+@app.get("/bookings/stream")
+def stream_bookings(
+    hotel_id: int | None = None,
+    filters: BookingFilters = Depends(booking_filters),
+):
+    filters.hotel_id = hotel_id
+    return StreamingResponse(stream_bookings_ndjson(filters), media_type="application/x-ndjson")
+
+
+@app.get("/hotels/{hotel_id}/bookings", response_model=schemas.BookingPage)
+async def list_bookings_for_hotel(
+    hotel_id: int,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    filters: BookingFilters = Depends(booking_filters),
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters.hotel_id = hotel_id
+    bookings, next_cursor = await fetch_booking_page_async(db, filters, cursor, limit)
+    return schemas.BookingPage(items=bookings, next_cursor=next_cursor)
+
+
+@app.get("/hotels/{hotel_id}/bookings/stream")
+def stream_bookings_for_hotel(
+    hotel_id: int,
+    filters: BookingFilters = Depends(booking_filters),
+):
+    filters.hotel_id = hotel_id
+    return StreamingResponse(stream_bookings_ndjson(filters), media_type="application/x-ndjson")
 
 
 @app.post("/price-recommendation", response_model=schemas.PriceRecommendationResponse)
-def get_price_recommendation(
+async def get_price_recommendation(
     payload: schemas.PriceRecommendationRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    # Fetch hotel
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == payload.hotel_id).first()
+    # Fetch hotel and room type from the in-memory catalog
+    hotel = await catalog.get_hotel_async(db, payload.hotel_id)
     if hotel is None:
         raise HTTPException(status_code=404, detail="Hotel not found")
 
-    # Fetch room type
-    room_type = (
-        db.query(models.RoomType)
-        .filter(models.RoomType.id == payload.room_type_id)
-        .first()
-    )
+    room_type = await catalog.get_room_type_async(db, payload.room_type_id)
     if room_type is None or room_type.hotel_id != payload.hotel_id:
         raise HTTPException(status_code=400, detail="Invalid room type for this hotel")
 
-    # Use ML model to predict a price
-    model_price = predict_price_for_stay(
+    # Use ML model to predict a price; misses are batched with concurrent requests
+    model_price = await predict_price_for_stay_batched(
         city=hotel.city,
         room_type_name=room_type.name,
         base_price=room_type.base_price,
@@ -171,12 +333,11 @@ def get_price_recommendation(
         check_in_date=payload.check_in_date,
         stay_length=payload.stay_length,
         booking_window=payload.booking_window,
+        hotel_id=payload.hotel_id,
     )
 
     # Simple business rule: clamp around base price
-    lower_bound = room_type.base_price * 0.7
-    upper_bound = room_type.base_price * 1.8
-    recommended_price = max(lower_bound, min(model_price, upper_bound))
+    recommended_price = float(clamp_to_base_price(model_price, room_type.base_price))
 
     return schemas.PriceRecommendationResponse(
         hotel_id=payload.hotel_id,
@@ -187,3 +348,270 @@ def get_price_recommendation(
         base_price=room_type.base_price,
         currency="USD",  # or make this configurable later
     )
+
+
+def _batch_dates(start_date: date, end_date: date) -> list[date]:
+    """Check-in dates of an inclusive batch range, within MAX_BATCH_DAYS."""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    n_days = (end_date - start_date).days + 1
+    if n_days > MAX_BATCH_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range must not exceed {MAX_BATCH_DAYS} days",
+        )
+    return [start_date + timedelta(days=i) for i in range(n_days)]
+
+
+async def _batch_room_types(db: AsyncSession, hotel_id: int, room_type_ids: list[int] | None):
+    """The hotel and all of its room types, or the requested subset, from the in-memory catalog."""
+    hotel = await catalog.get_hotel_async(db, hotel_id)
+    if hotel is None:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
+    room_types = await catalog.room_types_for_hotel_async(db, hotel_id)
+    if room_type_ids is not None:
+        wanted = set(room_type_ids)
+        room_types = [rt for rt in room_types if rt.id in wanted]
+    if room_type_ids is not None and len(room_types) != len(set(room_type_ids)):
+        raise HTTPException(status_code=400, detail="Invalid room type for this hotel")
+    return hotel, room_types
+
+
+@app.post(
+    "/price-recommendation/batch",
+    response_model=schemas.PriceRecommendationBatchResponse,
+)
+async def get_price_recommendation_batch(
+    payload: schemas.PriceRecommendationBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    check_in_dates = _batch_dates(payload.start_date, payload.end_date)
+    hotel, room_types = await _batch_room_types(db, payload.hotel_id, payload.room_type_ids)
+    n_cells = len(room_types) * len(check_in_dates) * len(payload.stay_lengths) * len(payload.booking_windows)
+    if n_cells > MAX_BATCH_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch of {n_cells} prices exceeds the limit of {MAX_BATCH_CELLS}",
+        )
+
+    # One model call for the whole grid
+    model_prices = await inference_executor.run(
+        predict_prices_batch,
+        city=hotel.city,
+        room_types=[(rt.name, rt.base_price, rt.capacity) for rt in room_types],
+        check_in_dates=check_in_dates,
+        stay_lengths=payload.stay_lengths,
+        booking_windows=payload.booking_windows,
+        hotel_id=payload.hotel_id,
+    )
+
+    # Clamp around each room type's base price (broadcast over the grid)
+    base_prices = np.array([rt.base_price for rt in room_types], dtype=np.float64)
+    recommended_prices = clamp_to_base_price(
+        model_prices, base_prices[:, None, None, None]
+    )
+
+    model_prices = np.round(model_prices, 2).tolist()
+    recommended_prices = np.round(recommended_prices, 2).tolist()
+
+    items = [
+        schemas.PriceRecommendationBatchItem(
+            room_type_id=rt.id,
+            check_in_date=check_in_date,
+            stay_length=stay_length,
+            booking_window=booking_window,
+            recommended_price=recommended_prices[r][d][s][w],
+            model_price=model_prices[r][d][s][w],
+            base_price=rt.base_price,
+        )
+        for r, rt in enumerate(room_types)
+        for d, check_in_date in enumerate(check_in_dates)
+        for s, stay_length in enumerate(payload.stay_lengths)
+        for w, booking_window in enumerate(payload.booking_windows)
+    ]
+
+    return schemas.PriceRecommendationBatchResponse(
+        hotel_id=payload.hotel_id,
+        items=items,
+    )
+
+
+@app.post(
+    "/price-recommendation/optimize",
+    response_model=schemas.PriceOptimizationResponse,
+)
+async def get_price_optimization(
+    payload: schemas.PriceOptimizationRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Revenue-maximizing price per room type and check-in date (see
+    app/revenue.py), instead of the clamped model price.
+    """
+    check_in_dates = _batch_dates(payload.start_date, payload.end_date)
+    hotel, room_types = await _batch_room_types(db, payload.hotel_id, payload.room_type_ids)
+
+    # Cached; the first call (and one per TTL) reads the booking history
+    demand = await run_in_threadpool(get_demand_model)
+    on_books = await db.run_sync(load_on_books, check_in_dates[0], len(check_in_dates), payload.hotel_id)
+    result = await inference_executor.run(
+        optimize_hotel_prices,
+        demand=demand,
+        city=hotel.city,
+        hotel_id=payload.hotel_id,
+        room_types=room_types,
+        check_in_dates=check_in_dates,
+        on_books=on_books,
+    )
+    result = {key: np.round(values, 2).tolist() for key, values in result.items()}
+
+    items = [
+        schemas.PriceOptimizationItem(
+            room_type_id=rt.id,
+            check_in_date=check_in_date,
+            recommended_price=result["recommended_price"][r][d],
+            model_price=result["model_price"][r][d],
+            base_price=rt.base_price,
+            expected_rooms=result["expected_rooms"][r][d],
+            expected_revenue=result["expected_revenue"][r][d],
+            model_price_revenue=result["model_price_revenue"][r][d],
+        )
+        for r, rt in enumerate(room_types)
+        for d, check_in_date in enumerate(check_in_dates)
+    ]
+
+    return schemas.PriceOptimizationResponse(
+        hotel_id=payload.hotel_id,
+        booking_window=REVENUE_BOOKING_WINDOW,
+        items=items,
+    )
+
+
+@app.get("/hotels/{hotel_id}/rate-grid", response_model=schemas.RateGridResponse)
+async def get_rate_grid(
+    hotel_id: int,
+    start_date: date | None = None,
+    end_date: date | None = None,  # inclusive
+    room_type_id: int | None = None,
+    stay_length: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    A hotel's precomputed calendar (see app/rate_grid.py), served from the
+    rate_grid table with one range read on its primary key.
+    """
+    start_date = start_date or date.today()
+    end_date = end_date or start_date + timedelta(days=RATE_GRID_DAYS - 1)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days + 1 > MAX_BATCH_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must not exceed {MAX_BATCH_DAYS} days")
+    if await catalog.get_hotel_async(db, hotel_id) is None:
+        raise HTTPException(status_code=404, detail="Hotel not found")
+
+    grid = models.RateGrid
+    query = (
+        select(
+            grid.room_type_id,
+            # SQLite stores ISO strings; let pydantic parse them instead of
+            # SQLAlchemy's per-row Date processing
+            type_coerce(grid.stay_date, String).label("stay_date"),
+            grid.stay_length,
+            grid.recommended_price,
+            grid.model_price,
+            grid.base_price,
+            grid.rooms_booked,
+        )
+        .where(grid.hotel_id == hotel_id, grid.stay_date.between(start_date, end_date))
+        .order_by(grid.stay_date, grid.room_type_id, grid.stay_length)
+    )
+    # Residual filters, applied during the same range scan
+    if room_type_id is not None:
+        query = query.where(grid.room_type_id == room_type_id)
+    if stay_length is not None:
+        query = query.where(grid.stay_length == stay_length)
+
+    result = await db.execute(query)
+    keys = list(result.keys())
+    grid_response = schemas.RateGridResponse.model_validate({
+        "hotel_id": hotel_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "booking_window": RATE_GRID_BOOKING_WINDOW,
+        "cells": [dict(zip(keys, row)) for row in result.all()],
+    })
+    # Already validated; skip FastAPI's second validation pass over thousands of cells
+    return Response(content=grid_response.model_dump_json(), media_type="application/json")
+
+
+def _registry_status() -> schemas.ModelRegistryStatus:
+    return schemas.ModelRegistryStatus(
+        active_version=registry.get_current_version(),
+        loaded_version=get_loaded_version(),
+        versions=[schemas.ModelVersion(**v) for v in registry.list_versions()],
+    )
+
+
+@app.get("/admin/models", response_model=schemas.ModelRegistryStatus)
+def list_model_versions():
+    return _registry_status()
+
+
+@app.post("/admin/models/{version}/activate", response_model=schemas.ModelRegistryStatus)
+def activate_model_version(version: str):
+    try:
+        registry.activate_version(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model version not found")
+
+    # This worker switches now; the others follow via their registry watcher
+    reload_model()
+    return _registry_status()
+
+
+@app.post("/admin/models/rollback", response_model=schemas.ModelRegistryStatus)
+def rollback_model_version():
+    try:
+        registry.rollback()
+    except LookupError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    reload_model()
+    return _registry_status()
+
+
+@app.get("/admin/cache", response_model=schemas.PredictionCacheStats)
+def get_prediction_cache_stats():
+    return prediction_cache.stats()
+
+
+@app.delete("/admin/cache", response_model=schemas.PredictionCacheStats)
+def clear_prediction_cache():
+    prediction_cache.clear()
+    return prediction_cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return Response(content=render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+def get_profile(route: str | None = None):
+    """Collapsed stacks sampled so far (PROFILER_ENABLED=1 only)."""
+    if not profiler.running:
+        raise HTTPException(status_code=404, detail="Profiler is not enabled")
+    return profiler.collapsed(route)
+
+
+@app.post("/admin/profile/dump")
+def dump_profile(reset: bool = False):
+    """Write per-route collapsed stack files to PROFILER_DIR."""
+    if not profiler.running:
+        raise HTTPException(status_code=404, detail="Profiler is not enabled")
+    paths = profiler.dump()
+    samples = profiler.samples
+    if reset:
+        profiler.reset()
+    return {"samples": samples, "files": paths}
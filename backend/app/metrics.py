@@ -0,0 +1,269 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Histograms are recorded on the hot path: one bisect, one short lock and
+two additions per observation. Gauges are callbacks that run only when
+/metrics is scraped, so pool, cache and model state cost nothing between
+scrapes. All values are per worker process; Prometheus sums across workers.
+
+Set METRICS_ENABLED=0 to turn every observation into a no-op.
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from sub-millisecond model calls up to slow requests
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Timer:
+    """Context manager that observes its elapsed time (cheaper than @contextmanager)."""
+
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: "Histogram", labelvalues: tuple):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+        return False
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> per-bucket counts (last slot is +Inf), then the sum
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        if not METRICS_ENABLED:
+            return
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def time(self, *labelvalues) -> _Timer:
+        return _Timer(self, labelvalues)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            label_str = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{label_str} {_format(series[-1])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """A gauge family whose samples come from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Iterable[Tuple[tuple, float]]],
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labelvalues, value in self.callback():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_format(value)}")
+        return lines
+
+
+_registry: Dict[str, Histogram | Gauge] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+    """Get or create the histogram `name` (idempotent, so module reloads are harmless)."""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(name, help, labelnames, buckets)
+        return metric
+
+
+def register_gauge(
+    name: str,
+    help: str,
+    callback: Callable[[], Iterable[Tuple[tuple, float]]],
+    labelnames: Sequence[str] = (),
+) -> None:
+    """Register (or replace) a callback gauge; `callback` yields (label values, value)."""
+    with _registry_lock:
+        _registry[name] = Gauge(name, help, labelnames, callback)
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        try:
+            lines.extend(metric.collect())
+        except Exception as exc:  # one broken gauge must not hide the rest
+            lines.append(f"# {metric.name} unavailable: {exc!r}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- shared histograms ----------
+
+HTTP_REQUEST_SECONDS = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, from the first byte in to the last byte out.",
+    ("method", "route", "status"),
+)
+
+# Stages: model_load, sklearn_load, price_table, feature_build, model_predict
+PRICING_STAGE_SECONDS = histogram(
+    "pricing_stage_duration_seconds",
+    "Time spent in each stage of serving a price prediction.",
+    ("stage",),
+)
+
+DB_QUERY_SECONDS = histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time, by statement type.",
+    ("operation",),
+)
+
+
+# ---------- HTTP ----------
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording HTTP_REQUEST_SECONDS per route template.
+
+    Plain ASGI rather than @app.middleware("http"), which wraps every
+    request in an extra task and stream. Streaming responses are timed to
+    their last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
+
+
+# ---------- database ----------
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return keyword if keyword in ("select", "insert", "update", "delete", "with") else "other"
+
+
+def instrument_engine(engine: Engine, pool_gauge: str = "db_pool_connections") -> None:
+    """Time every statement on `engine` and export its connection pool as the gauge `pool_gauge`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        DB_QUERY_SECONDS.observe(time.perf_counter() - start, _operation(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def pool_samples():
+        pool = engine.pool
+        # Only QueuePool-style pools have these; others report nothing
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, state, None)
+            if method is not None:
+                yield (state,), method()
+
+    register_gauge(
+        pool_gauge,
+        "Database connection pool state (size, checkedin, checkedout, overflow).",
+        pool_samples,
+        ("state",),
+    )
@@ -0,0 +1,131 @@
+"""
+Minimal forward-only schema migrations.
+
+`create_all` only creates missing tables; it never alters an existing one.
+Schema changes for databases that already exist go here as numbered steps.
+Applied versions are recorded in the schema_migrations table, so each step
+runs once per database. Steps must be idempotent (IF NOT EXISTS etc.)
+because a fresh database may already have the objects from create_all.
+
+init_schema (create_all + pending migrations) is a deploy step:
+`python -m app.migrations`. The API runs it at startup only while
+DB_AUTO_MIGRATE is on (the default, convenient for development); turn it
+off in production so workers boot without touching the schema.
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.occupancy import rebuild_occupancy
+
+
+# Run init_schema in the API's startup; set to 0 when deploys run it explicitly
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") != "0"
+
+
+def _statements(*sql: str) -> Callable[[Connection], None]:
+    def apply(conn: Connection) -> None:
+        for statement in sql:
+            conn.execute(text(statement))
+    return apply
+
+
+# (version, description, apply)
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (
+        1,
+        "Composite booking indexes for hotel / room type date ranges and status",
+        _statements(
+            "CREATE INDEX IF NOT EXISTS ix_bookings_hotel_id_check_in_date "
+            "ON bookings (hotel_id, check_in_date)",
+            "CREATE INDEX IF NOT EXISTS ix_bookings_room_type_id_check_in_date "
+            "ON bookings (room_type_id, check_in_date)",
+            "CREATE INDEX IF NOT EXISTS ix_bookings_status ON bookings (status)",
+        ),
+    ),
+    (
+        2,
+        "Backfill daily_occupancy (created by create_all) from existing bookings",
+        rebuild_occupancy,
+    ),
+    (
+        3,
+        "Booking (booking_date, id) index for the feature store's high-water mark",
+        _statements(
+            "CREATE INDEX IF NOT EXISTS ix_bookings_booking_date_id "
+            "ON bookings (booking_date, id)",
+        ),
+    ),
+]
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                " version INTEGER PRIMARY KEY,"
+                " description VARCHAR NOT NULL,"
+                " applied_at VARCHAR NOT NULL)"
+            )
+        )
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+        return [row[0] for row in rows]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied now."""
+    done = set(applied_versions(engine))
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version in done:
+            continue
+        # One transaction per step: the schema change and its bookkeeping row
+        with engine.begin() as conn:
+            already = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE version = :v"), {"v": version}
+            ).first()
+            if already:  # another worker got here first
+                continue
+            apply(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, description, applied_at) "
+                    "VALUES (:v, :d, :t)"
+                ),
+                {"v": version, "d": description, "t": datetime.now(timezone.utc).isoformat()},
+            )
+        applied.append(version)
+    return applied
+
+
+def init_schema(engine: Engine) -> List[int]:
+    """Create missing tables, then apply pending migrations; returns the versions applied now."""
+    from app import models
+
+    models.Base.metadata.create_all(bind=engine)
+    return run_migrations(engine)
+
+
+def main():
+    from app.database import engine
+
+    applied = init_schema(engine)
+    if applied:
+        print(f"Applied migrations: {applied}")
+    else:
+        print("Schema is up to date.")
+    print(f"Current schema version: {max(applied_versions(engine), default=0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+"""
+Rolling-origin backtesting of the price model over booking_date.
+
+Each fold trains on the confirmed bookings made before a monthly origin
+and scores the next BACKTEST_TEST_MONTHS months. With an "expanding"
+window the training set grows from the first month. With a "rolling"
+window it only covers the BACKTEST_TRAIN_MONTHS months before the origin.
+Errors are reported per fold and, within each fold, per segment (hotel or
+city).
+
+The bookings are read once and encoded into the compact float32 layout of
+the chunked trainer, sorted by booking date. The matrix, targets and
+segment codes are placed in shared memory. Pool workers attach to them
+once and cut every fold as a contiguous slice, so folds never copy or
+pickle the data.
+
+Fold results are cached under BACKTEST_DIR/<config>/fold-<origin>.json with
+a fingerprint of the encoded rows they used (one digest per booking month).
+A rerun reuses every fold whose months are unchanged. A new month of
+bookings therefore only computes the folds that touch it.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.ml.segments import SEGMENT_BY
+
+
+BACKTEST_DIR = os.getenv("BACKTEST_DIR", "backtests")
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+BACKTEST_TRAIN_MONTHS = int(os.getenv("BACKTEST_TRAIN_MONTHS", "12"))
+BACKTEST_TEST_MONTHS = int(os.getenv("BACKTEST_TEST_MONTHS", "1"))
+# Origins with fewer training bookings than this are skipped
+BACKTEST_MIN_TRAIN_ROWS = int(os.getenv("BACKTEST_MIN_TRAIN_ROWS", "1000"))
+
+WINDOWS = ("expanding", "rolling")
+
+# Part of the cache key, so changing them recomputes every fold
+BACKTEST_MODEL_PARAMS = {
+    "hist": {"max_iter": 300, "random_state": 42},
+    "forest": {"n_estimators": 200, "max_depth": 16, "random_state": 42},
+}
+
+
+# ---------- shared arrays ----------
+
+class SharedArrays:
+    """Named NumPy arrays backed by shared memory blocks owned by this process."""
+
+    def __init__(self):
+        self.arrays: Dict[str, np.ndarray] = {}
+        self._blocks: List[SharedMemory] = []
+
+    def allocate(self, name: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        block = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._blocks.append(block)
+        self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return self.arrays[name]
+
+    def specs(self) -> Dict[str, Tuple[str, Tuple[int, ...], str]]:
+        """What a worker needs to attach: name -> (block name, shape, dtype)."""
+        return {
+            name: (block.name, array.shape, array.dtype.str)
+            for (name, array), block in zip(self.arrays.items(), self._blocks)
+        }
+
+    def release(self) -> None:
+        self.arrays.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+
+# Worker side: blocks stay attached for the life of the worker process
+_attached: Dict[str, np.ndarray] = {}
+_attached_blocks: List[SharedMemory] = []
+
+
+def _attach(specs: Dict[str, Tuple[str, Tuple[int, ...], str]]) -> None:
+    """Pool initializer: map the parent's arrays into this worker without copying."""
+    from threadpoolctl import threadpool_limits
+
+    # Parallelism comes from the pool; one native thread per worker
+    threadpool_limits(limits=1)
+    for name, (block_name, shape, dtype) in specs.items():
+        block = SharedMemory(name=block_name)
+        _attached_blocks.append(block)
+        _attached[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+# ---------- loading ----------
+
+def _load_encoded(shared: SharedArrays, segment_by: str, chunk_size: int) -> dict:
+    """
+    Encode every confirmed booking into `shared` ("X", "y", "segment"),
+    sorted by booking date. Returns the feature layout and, per booking
+    month, its first row and the digest of its rows.
+    """
+    import pandas as pd
+
+    from app.ml.data_prep import count_bookings, load_booking_data, load_room_catalog
+    from app.ml.encoder import CATEGORICAL_FEATURES, NUMERIC_FEATURES, FeatureEncoder
+    from app.ml.model_train import TRAIN_CHUNK_SIZE, _encode_chunk
+
+    n_rows = count_bookings(status="confirmed")
+    catalog = load_room_catalog()
+    categories = {
+        "city": sorted(catalog["city"].astype(str).unique().tolist()),
+        "room_type_name": sorted(catalog["room_type_name"].astype(str).unique().tolist()),
+    }
+    feature_columns = list(NUMERIC_FEATURES) + list(CATEGORICAL_FEATURES)
+    encoder = FeatureEncoder(feature_columns, categories)
+
+    X = np.empty((n_rows, len(feature_columns)), dtype=np.float32)
+    y = np.empty(n_rows, dtype=np.float64)
+    booking_day = np.empty(n_rows, dtype="datetime64[D]")
+    segment_values = np.empty(n_rows, dtype=object)
+    offset = 0
+    for chunk in load_booking_data(status="confirmed", chunksize=chunk_size or TRAIN_CHUNK_SIZE):
+        chunk = chunk.iloc[: n_rows - offset]
+        if chunk.empty:
+            break
+        m = len(chunk)
+        _encode_chunk(encoder, chunk, X[offset:offset + m])
+        y[offset:offset + m] = chunk["price_sold"].to_numpy(dtype=np.float64)
+        booking_day[offset:offset + m] = pd.to_datetime(chunk["booking_date"]).to_numpy().astype("datetime64[D]")
+        column = "hotel_id" if segment_by == "hotel" else "city"
+        segment_values[offset:offset + m] = chunk[column].astype(str).to_numpy()
+        offset += m
+    # Fewer rows than counted (deletions mid-run): use what arrived
+    X, y, booking_day, segment_values = X[:offset], y[:offset], booking_day[:offset], segment_values[:offset]
+
+    # Stable, so rows of one day keep their id order and month digests are reproducible
+    order = np.argsort(booking_day, kind="stable")
+    segment_codes, segment_names = pd.factorize(segment_values[order], sort=True)
+    np.take(X, order, axis=0, out=shared.allocate("X", X.shape, np.float32))
+    np.take(y, order, out=shared.allocate("y", y.shape, np.float64))
+    shared.allocate("segment", segment_codes.shape, np.int32)[:] = segment_codes
+    del X, y
+
+    months = booking_day[order].astype("datetime64[M]")
+    X, y = shared.arrays["X"], shared.arrays["y"]
+    month_starts = {}
+    if months.size:
+        first, last = months[0], months[-1]
+        for month in np.arange(first, last + 1):
+            start, end = np.searchsorted(months, [month, month + 1])
+            digest = hashlib.sha256(X[start:end].data)
+            digest.update(y[start:end].data)
+            month_starts[str(month)] = (int(start), int(end), digest.hexdigest())
+
+    return {
+        "feature_columns": feature_columns,
+        "categories": categories,
+        "segment_names": [str(s) for s in segment_names],
+        "months": month_starts,
+    }
+
+
+# ---------- folds ----------
+
+def plan_folds(
+    months: Dict[str, Tuple[int, int, str]],
+    window: str,
+    train_months: int,
+    test_months: int,
+    min_train_rows: int,
+) -> List[dict]:
+    """
+    One fold per monthly origin with a full test period and at least
+    `min_train_rows` training rows. Row ranges index the date-sorted arrays.
+    """
+    names = list(months)
+    folds = []
+    for i in range(1, len(names) - test_months + 1):
+        first = 0 if window == "expanding" else max(0, i - train_months)
+        train, test = names[first:i], names[i:i + test_months]
+        train_rows = (months[train[0]][0], months[train[-1]][1])
+        test_rows = (months[test[0]][0], months[test[-1]][1])
+        if train_rows[1] - train_rows[0] < min_train_rows or test_rows[1] == test_rows[0]:
+            continue
+        fingerprint = hashlib.sha256(
+            json.dumps([[m, months[m][2]] for m in train + test]).encode()
+        ).hexdigest()
+        folds.append({
+            "origin": names[i],
+            "train_months": [train[0], train[-1]],
+            "test_months": [test[0], test[-1]],
+            "train_rows": train_rows,
+            "test_rows": test_rows,
+            "fingerprint": fingerprint,
+        })
+    return folds
+
+
+def _run_fold(fold: dict, estimator: str, categorical: List[int]) -> dict:
+    """Fit on the fold's training rows and score its test rows (runs in a worker)."""
+    from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+    from sklearn.metrics import r2_score
+
+    X, y, segment = _attached["X"], _attached["y"], _attached["segment"]
+    (train_start, train_end), (test_start, test_end) = fold["train_rows"], fold["test_rows"]
+
+    start = time.perf_counter()
+    if estimator == "hist":
+        model = HistGradientBoostingRegressor(
+            **BACKTEST_MODEL_PARAMS["hist"], categorical_features=categorical or None
+        )
+    else:
+        model = RandomForestRegressor(**BACKTEST_MODEL_PARAMS["forest"], n_jobs=1)
+    model.fit(X[train_start:train_end], y[train_start:train_end])
+    fitted = time.perf_counter()
+
+    y_test = y[test_start:test_end]
+    error = model.predict(X[test_start:test_end]) - y_test
+    codes = segment[test_start:test_end]
+    n_segments = int(codes.max()) + 1
+    per_segment = np.stack([
+        np.bincount(codes, minlength=n_segments),
+        np.bincount(codes, weights=np.abs(error), minlength=n_segments),
+        np.bincount(codes, weights=error ** 2, minlength=n_segments),
+        np.bincount(codes, weights=error, minlength=n_segments),
+    ], axis=1)
+
+    return {
+        "origin": fold["origin"],
+        "train": int(train_end - train_start),
+        "test": int(test_end - test_start),
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        "bias": float(np.mean(error)),
+        "r2": float(r2_score(y_test, y_test + error)) if len(y_test) > 1 else float("nan"),
+        "fit_seconds": fitted - start,
+        "seconds": time.perf_counter() - start,
+        # code -> [n, sum |e|, sum e^2, sum e]; names are filled in by the parent
+        "segments": {int(c): row.tolist() for c, row in enumerate(per_segment) if row[0] > 0},
+    }
+
+
+# ---------- driver ----------
+
+def _config_key(config: dict) -> str:
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def _read_cached(path: str, fingerprint: str) -> dict | None:
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return cached if cached.get("fingerprint") == fingerprint else None
+
+
+def _write_json(path: str, payload: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _summarize_segments(results: List[dict]) -> Dict[str, dict]:
+    totals: Dict[str, np.ndarray] = {}
+    folds: Dict[str, int] = {}
+    for result in results:
+        for name, row in result["segments"].items():
+            totals[name] = totals.get(name, 0) + np.asarray(row, dtype=np.float64)
+            folds[name] = folds.get(name, 0) + 1
+    return {
+        name: {
+            "folds": folds[name],
+            "test": int(n),
+            "mae": abs_sum / n,
+            "rmse": float(np.sqrt(sq_sum / n)),
+            "bias": err_sum / n,
+        }
+        for name, (n, abs_sum, sq_sum, err_sum) in sorted(totals.items())
+    }
+
+
+def backtest(
+    window: str = "expanding",
+    estimator: str = "hist",
+    train_months: int = BACKTEST_TRAIN_MONTHS,
+    test_months: int = BACKTEST_TEST_MONTHS,
+    min_train_rows: int = BACKTEST_MIN_TRAIN_ROWS,
+    segment_by: str = "city",
+    workers: int = BACKTEST_WORKERS,
+    cache_dir: str = BACKTEST_DIR,
+    resume: bool = True,
+    chunk_size: int | None = None,
+) -> dict:
+    """
+    Run (or resume) a rolling-origin backtest. Returns the summary that is
+    also written to <cache_dir>/<config>/summary.json: per-fold metrics,
+    per-segment metrics over all folds, and how many folds were computed.
+    """
+    from app.ml.model_train import ESTIMATORS, HIST_MAX_CATEGORIES
+
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window {window!r}; expected one of {WINDOWS}")
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator {estimator!r}; expected one of {ESTIMATORS}")
+    if segment_by not in SEGMENT_BY:
+        raise ValueError(f"Unknown segmentation {segment_by!r}; expected one of {SEGMENT_BY}")
+
+    started = time.perf_counter()
+    shared = SharedArrays()
+    try:
+        data = _load_encoded(shared, segment_by, chunk_size)
+        loaded = time.perf_counter()
+        config = {
+            "window": window,
+            "estimator": estimator,
+            "params": BACKTEST_MODEL_PARAMS[estimator],
+            "train_months": train_months if window == "rolling" else None,
+            "test_months": test_months,
+            "segment_by": segment_by,
+            "feature_columns": data["feature_columns"],
+        }
+        run_dir = os.path.join(cache_dir, _config_key(config))
+        os.makedirs(run_dir, exist_ok=True)
+        _write_json(os.path.join(run_dir, "config.json"), config)
+
+        folds = plan_folds(data["months"], window, train_months, test_months, min_train_rows)
+        results: Dict[str, dict] = {}
+        to_run = []
+        for fold in folds:
+            path = os.path.join(run_dir, f"fold-{fold['origin']}.json")
+            cached = _read_cached(path, fold["fingerprint"]) if resume else None
+            if cached is not None:
+                results[fold["origin"]] = dict(cached["result"], status="cached")
+            else:
+                to_run.append(fold)
+
+        categorical = [
+            data["feature_columns"].index(col)
+            for col, values in data["categories"].items()
+            if len(values) <= HIST_MAX_CATEGORIES
+        ]
+        segment_names = data["segment_names"]
+        if to_run:
+            # spawn: workers must not inherit the parent's database connections
+            with ProcessPoolExecutor(
+                max_workers=max(1, min(workers, len(to_run))),
+                mp_context=get_context("spawn"),
+                initializer=_attach,
+                initargs=(shared.specs(),),
+            ) as pool:
+                futures = {pool.submit(_run_fold, fold, estimator, categorical): fold for fold in to_run}
+                for future in as_completed(futures):
+                    fold = futures[future]
+                    result = future.result()
+                    result["segments"] = {segment_names[c]: row for c, row in result["segments"].items()}
+                    result.update(train_months=fold["train_months"], test_months=fold["test_months"])
+                    _write_json(
+                        os.path.join(run_dir, f"fold-{fold['origin']}.json"),
+                        {"fingerprint": fold["fingerprint"], "result": result},
+                    )
+                    results[fold["origin"]] = dict(result, status="computed")
+    finally:
+        shared.release()
+
+    ordered = [results[fold["origin"]] for fold in folds]
+    summary = {
+        "config": config,
+        "folds": ordered,
+        "segments": _summarize_segments(ordered),
+        "folds_computed": len(to_run),
+        "folds_cached": len(folds) - len(to_run),
+        "load_seconds": loaded - started,
+        "seconds": time.perf_counter() - started,
+    }
+    _write_json(os.path.join(run_dir, "summary.json"), summary)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of the price model over booking date.")
+    parser.add_argument("--window", choices=WINDOWS, default="expanding")
+    parser.add_argument("--estimator", choices=("hist", "forest"), default="hist")
+    parser.add_argument("--train-months", type=int, default=BACKTEST_TRAIN_MONTHS, help="with --window rolling")
+    parser.add_argument("--test-months", type=int, default=BACKTEST_TEST_MONTHS)
+    parser.add_argument("--min-train-rows", type=int, default=BACKTEST_MIN_TRAIN_ROWS)
+    parser.add_argument("--segment-by", choices=SEGMENT_BY, default="city")
+    parser.add_argument("--workers", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--cache-dir", default=BACKTEST_DIR)
+    parser.add_argument("--no-resume", action="store_true", help="recompute cached folds too")
+    args = parser.parse_args()
+
+    summary = backtest(
+        window=args.window,
+        estimator=args.estimator,
+        train_months=args.train_months,
+        test_months=args.test_months,
+        min_train_rows=args.min_train_rows,
+        segment_by=args.segment_by,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        resume=not args.no_resume,
+    )
+
+    print(f"\n{'origin':<8} {'train':>9} {'test':>8} {'MAE':>8} {'RMSE':>8} {'bias':>8} {'R^2':>7} {'fit s':>7}  status")
+    for r in summary["folds"]:
+        print(
+            f"{r['origin']:<8} {r['train']:>9} {r['test']:>8} {r['mae']:>8.2f} {r['rmse']:>8.2f} "
+            f"{r['bias']:>8.2f} {r['r2']:>7.3f} {r['fit_seconds']:>7.2f}  {r['status']}"
+        )
+    print(f"\n{args.segment_by:<28} {'folds':>6} {'test':>8} {'MAE':>8} {'RMSE':>8} {'bias':>8}")
+    for name, s in summary["segments"].items():
+        print(f"{name:<28} {s['folds']:>6} {s['test']:>8} {s['mae']:>8.2f} {s['rmse']:>8.2f} {s['bias']:>8.2f}")
+    print(
+        f"\n{len(summary['folds'])} folds ({summary['folds_computed']} computed, "
+        f"{summary['folds_cached']} cached) in {summary['seconds']:.1f}s "
+        f"(load+encode {summary['load_seconds']:.1f}s) with {args.workers} workers"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Micro-batching scheduler for single-stay predictions.
+
+Concurrent /price-recommendation requests each need the model on one
+encoded row. A forest predict on 256 rows costs about as much as one on a
+single row, so rows are queued and run together. A batch is flushed when it
+reaches INFERENCE_BATCH_MAX_SIZE rows, or when its oldest row has waited
+INFERENCE_BATCH_MAX_WAIT_MS. Each caller's future then gets its own value.
+Rows are grouped per LoadedModel, so a batch never mixes model versions or
+segment models.
+
+Batches run on the inference executor's pool. A small flusher thread
+handles the wait deadlines. At most INFERENCE_BATCH_MAX_QUEUE rows may wait
+for a flush. Past that, submit raises InferenceQueueFull and the API
+answers 503. INFERENCE_BATCH_MAX_SIZE=1 turns batching off: every row is
+dispatched as soon as it arrives.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
+
+from app.metrics import PRICING_STAGE_SECONDS, histogram, register_gauge
+from app.ml.inference import (
+    INFERENCE_RETRY_AFTER_SECONDS,
+    InferenceExecutor,
+    InferenceQueueFull,
+    inference_executor,
+)
+from app.ml.predict import LoadedModel, prediction_cache, prepare_stay
+from app.profiler import profiler
+
+
+INFERENCE_BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "256"))
+INFERENCE_BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "2"))
+INFERENCE_BATCH_MAX_QUEUE = int(os.getenv("INFERENCE_BATCH_MAX_QUEUE", "4096"))
+
+BATCH_SIZE_ROWS = histogram(
+    "inference_batch_size_rows",
+    "Rows per flushed inference batch, by flush trigger (size, wait, shutdown).",
+    ("trigger",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+BATCH_WAIT_SECONDS = histogram(
+    "inference_batch_wait_seconds",
+    "Time from a batch's first row to its flush.",
+)
+
+
+class _Batch:
+    __slots__ = ("model", "rows", "futures", "opened_at", "deadline", "route")
+
+    def __init__(self, model: LoadedModel, max_wait: float, route: str | None = None):
+        self.model = model
+        # Profiler attribution: the route of the first row
+        self.route = route
+        self.rows: List[np.ndarray] = []
+        self.futures: List[Future] = []
+        self.opened_at = time.monotonic()
+        self.deadline = self.opened_at + max_wait
+
+
+def _fail(futures: List[Future], exc: BaseException) -> None:
+    for future in futures:
+        # A caller that went away has cancelled its future already
+        try:
+            future.set_exception(exc)
+        except InvalidStateError:
+            pass
+
+
+def _run_batch(batch: _Batch) -> None:
+    """Predict a whole batch and resolve every caller's future."""
+    # Drop the rows of callers that went away; the rest can no longer be cancelled
+    live = [i for i, future in enumerate(batch.futures) if future.set_running_or_notify_cancel()]
+    if not live:
+        return
+    futures = [batch.futures[i] for i in live]
+    try:
+        with profiler.attributed(batch.route), PRICING_STAGE_SECONDS.time("model_predict"):
+            y_pred = batch.model.predict_rows(np.vstack([batch.rows[i] for i in live]))
+    except BaseException as exc:
+        _fail(futures, exc)
+        return
+    for future, value in zip(futures, y_pred.tolist()):
+        try:
+            future.set_result(value)
+        except InvalidStateError:
+            pass
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        max_batch_size: int = INFERENCE_BATCH_MAX_SIZE,
+        max_wait_ms: float = INFERENCE_BATCH_MAX_WAIT_MS,
+        max_queue: int = INFERENCE_BATCH_MAX_QUEUE,
+        executor: InferenceExecutor = inference_executor,
+        retry_after: int = INFERENCE_RETRY_AFTER_SECONDS,
+    ):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_queue = max(1, max_queue)
+        self.executor = executor
+        self.retry_after = retry_after
+        self.queued = 0
+        self.rejected = 0
+        # Open batches in the order they were opened, so the first one
+        # always has the earliest deadline
+        self._batches: Dict[LoadedModel, _Batch] = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread: threading.Thread | None = None
+
+    def submit(self, model: LoadedModel, row: np.ndarray) -> Future:
+        """
+        Queue one encoded row (1-D, owned by the batcher from now on) for
+        `model`. Returns a future resolving to the predicted value.
+        """
+        future: Future = Future()
+        full = None
+        route = profiler.caller_route()
+        with self._cond:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise InferenceQueueFull(self.retry_after)
+            if self._thread is None or not self._thread.is_alive():
+                self._start()
+            batch = self._batches.get(model)
+            if batch is None:
+                batch = self._batches[model] = _Batch(model, self.max_wait, route)
+                self._cond.notify()
+            batch.rows.append(row)
+            batch.futures.append(future)
+            self.queued += 1
+            if len(batch.rows) >= self.max_batch_size:
+                full = self._take(model)
+        if full is not None:
+            self._dispatch(full, "size")
+        return future
+
+    def _start(self) -> None:
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def _take(self, model: LoadedModel) -> _Batch:
+        # Caller holds the lock
+        batch = self._batches.pop(model)
+        self.queued -= len(batch.rows)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stop:
+                        return
+                    if not self._batches:
+                        self._cond.wait()
+                        continue
+                    model, batch = next(iter(self._batches.items()))
+                    remaining = batch.deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._take(model)
+                        break
+                    self._cond.wait(remaining)
+            self._dispatch(batch, "wait")
+
+    def _dispatch(self, batch: _Batch, trigger: str) -> None:
+        BATCH_SIZE_ROWS.observe(len(batch.rows), trigger)
+        BATCH_WAIT_SECONDS.observe(time.monotonic() - batch.opened_at)
+        try:
+            self.executor.submit(_run_batch, batch)
+        except InferenceQueueFull as exc:
+            _fail(batch.futures, exc)
+
+    def shutdown(self) -> None:
+        """Stop the flusher thread and flush whatever is still queued."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+            batches = [self._take(model) for model in list(self._batches)]
+        if thread is not None:
+            thread.join()
+        for batch in batches:
+            self._dispatch(batch, "shutdown")
+
+
+batcher = MicroBatcher()
+
+
+async def predict_price_for_stay_batched(
+    city: str,
+    room_type_name: str,
+    base_price: float,
+    room_capacity: int,
+    check_in_date: date,
+    stay_length: int,
+    booking_window: int,
+    hotel_id: int | None = None,
+) -> float:
+    """
+    predict_price_for_stay for async callers. Price table and cache hits
+    return at once; misses are queued on the batcher.
+    """
+    model, price, X, cache_key = prepare_stay(
+        city=city,
+        room_type_name=room_type_name,
+        base_price=base_price,
+        room_capacity=room_capacity,
+        check_in_date=check_in_date,
+        stay_length=stay_length,
+        booking_window=booking_window,
+        hotel_id=hotel_id,
+    )
+    if price is not None:
+        return price
+
+    # X is the encoder's per-thread buffer; the next request reuses it
+    y_pred = await asyncio.wrap_future(batcher.submit(model, X[0].copy()))
+    prediction_cache.put(cache_key, y_pred)
+    return y_pred
+
+
+def _batcher_samples():
+    yield ("max_batch_size",), batcher.max_batch_size
+    yield ("max_wait_seconds",), batcher.max_wait
+    yield ("max_queue",), batcher.max_queue
+    yield ("queued",), batcher.queued
+    yield ("rejected",), batcher.rejected
+
+
+register_gauge(
+    "inference_batcher",
+    "Micro-batching settings, rows waiting for a flush, and cumulative rejections.",
+    _batcher_samples,
+    ("stat",),
+)
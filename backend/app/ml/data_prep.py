@@ -1,12 +1,49 @@
+from typing import Iterator, Sequence
+
 import pandas as pd
+from sqlalchemy import bindparam, text
 
 from app.database import engine
 
 
-def load_booking_data() -> pd.DataFrame:
+BOOKING_JOIN = """
+    FROM bookings b
+    JOIN room_types rt ON b.room_type_id = rt.id
+    JOIN hotels h ON b.hotel_id = h.id
+"""
+
+
+def _booking_filters(status: str | None, hotel_ids: Sequence[int] | None) -> tuple[str, dict]:
+    conditions, params = [], {}
+    if status is not None:
+        conditions.append("b.status = :status")
+        params["status"] = status
+    if hotel_ids is not None:
+        conditions.append("b.hotel_id IN :hotel_ids")
+        params["hotel_ids"] = list(hotel_ids)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    return where, params
+
+
+def _booking_query(sql: str, params: dict):
+    stmt = text(sql)
+    if "hotel_ids" in params:
+        stmt = stmt.bindparams(bindparam("hotel_ids", expanding=True))
+    return stmt
+
+
+def load_booking_data(
+    status: str | None = None,
+    chunksize: int | None = None,
+    hotel_ids: Sequence[int] | None = None,
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
     """
     Load bookings joined with hotels and room_types into a single DataFrame.
     This will be the base dataset for our ML model.
+
+    `status` and `hotel_ids` filter in SQL. With `chunksize`, returns an
+    iterator of DataFrames of at most that many rows (in booking id order)
+    instead.
     """
     query = """
     SELECT
@@ -24,14 +61,65 @@ def load_booking_data() -> pd.DataFrame:
         h.name AS hotel_name,
         h.city,
         h.country
-    FROM bookings b
-    JOIN room_types rt ON b.room_type_id = rt.id
-    JOIN hotels h ON b.hotel_id = h.id
+    """ + BOOKING_JOIN
+    where, params = _booking_filters(status, hotel_ids)
+    query += where
+    if chunksize is not None:
+        query += " ORDER BY b.id"
+        return _read_sql_chunks(_booking_query(query, params), params, chunksize)
+    df = pd.read_sql(_booking_query(query, params), con=engine, params=params)
+    return df
+
+
+def _read_sql_chunks(stmt, params: dict, chunksize: int) -> Iterator[pd.DataFrame]:
+    # Server-side streaming, so only one chunk is held in memory at a time
+    with engine.connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(stmt, con=conn, params=params, chunksize=chunksize)
+
+
+def count_bookings(status: str | None = None, hotel_ids: Sequence[int] | None = None) -> int:
+    """Number of rows load_booking_data(status, hotel_ids=...) would return."""
+    where, params = _booking_filters(status, hotel_ids)
+    query = "SELECT COUNT(*)" + BOOKING_JOIN + where
+    with engine.connect() as conn:
+        return int(conn.execute(_booking_query(query, params), params).scalar_one())
+
+
+def load_room_catalog() -> pd.DataFrame:
+    """
+    Load the current room type catalog (one row per room type) with the
+    hotel's city, using the same column names as load_booking_data.
+    """
+    query = """
+    SELECT
+        rt.id AS room_type_id,
+        rt.hotel_id,
+        rt.name AS room_type_name,
+        rt.capacity AS room_capacity,
+        rt.base_price,
+        h.city
+    FROM room_types rt
+    JOIN hotels h ON rt.hotel_id = h.id
     """
     df = pd.read_sql(query, con=engine)
     return df
 
 
+def load_daily_occupancy(hotel_ids: Sequence[int] | None = None) -> pd.DataFrame:
+    """
+    The daily_occupancy aggregate (see app/occupancy.py), optionally for
+    some hotels only, with stay_date as datetime64 for joining.
+    """
+    query = "SELECT * FROM daily_occupancy"
+    params = {}
+    if hotel_ids is not None:
+        query += " WHERE hotel_id IN :hotel_ids"
+        params["hotel_ids"] = list(hotel_ids)
+    df = pd.read_sql(_booking_query(query, params), con=engine, params=params)
+    df["stay_date"] = pd.to_datetime(df["stay_date"])
+    return df
+
+
 def main():
     df = load_booking_data()
     print("Loaded booking dataset:")
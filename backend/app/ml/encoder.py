@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+from datetime import date
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+NUMERIC_FEATURES = (
+    "base_price",
+    "room_capacity",
+    "stay_length",
+    "booking_window",
+    "check_in_weekday",
+    "is_weekend_checkin",
+)
+
+CITY_PREFIX = "city_"
+ROOM_TYPE_PREFIX = "room_type_name_"
+
+# Compact layout: one integer-code column per categorical instead of one-hot
+# columns, with the vocabularies saved next to the model
+CATEGORICAL_FEATURES = ("city", "room_type_name")
+CATEGORIES_FILENAME = "feature_categories.json"
+
+
+def save_categories(path: str, categories: Dict[str, Sequence[str]]) -> None:
+    with open(os.path.join(path, CATEGORIES_FILENAME), "w") as f:
+        json.dump({col: list(values) for col, values in categories.items()}, f, indent=2)
+
+
+def load_categories(path: str) -> Dict[str, List[str]] | None:
+    """Category vocabularies of a compact model directory, None for one-hot models."""
+    try:
+        with open(os.path.join(path, CATEGORIES_FILENAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class FeatureEncoder:
+    """
+    Encodes pricing inputs straight into NumPy rows using the model's feature layout.
+
+    Built once per loaded model: column positions and the city / room type
+    one-hot lookup tables are resolved up front, so encoding a request is a
+    handful of array writes with no pandas and no string formatting.
+
+    Models trained with compact categoricals have plain "city" and
+    "room_type_name" columns instead; pass their vocabularies as
+    `categories` and those columns get the value's index (-1 if unknown).
+    """
+
+    def __init__(
+        self,
+        feature_columns: Sequence[str],
+        categories: Dict[str, Sequence[str]] | None = None,
+    ):
+        self.feature_columns: List[str] = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+
+        col_index = {col: i for i, col in enumerate(self.feature_columns)}
+        self.numeric_index = {
+            col: col_index[col] for col in NUMERIC_FEATURES if col in col_index
+        }
+        self.city_index = {
+            col[len(CITY_PREFIX):]: i
+            for col, i in col_index.items()
+            if col.startswith(CITY_PREFIX)
+        }
+        self.room_type_index = {
+            col[len(ROOM_TYPE_PREFIX):]: i
+            for col, i in col_index.items()
+            if col.startswith(ROOM_TYPE_PREFIX)
+        }
+
+        # Categorical code columns: column index and value -> code lookup
+        categories = categories or {}
+        self.categories = {
+            col: list(categories[col]) for col in CATEGORICAL_FEATURES
+            if col in categories and col in col_index
+        }
+        self.code_index = {col: col_index[col] for col in self.categories}
+        self.category_codes = {
+            col: {value: code for code, value in enumerate(values)}
+            for col, values in self.categories.items()
+        }
+        self._city_code_idx = self.code_index.get("city", -1)
+        self._room_type_code_idx = self.code_index.get("room_type_name", -1)
+
+        # Resolve numeric slots once (-1 = not used by the model)
+        self._base_price_idx = self.numeric_index.get("base_price", -1)
+        self._capacity_idx = self.numeric_index.get("room_capacity", -1)
+        self._stay_idx = self.numeric_index.get("stay_length", -1)
+        self._window_idx = self.numeric_index.get("booking_window", -1)
+        self._weekday_idx = self.numeric_index.get("check_in_weekday", -1)
+        self._weekend_idx = self.numeric_index.get("is_weekend_checkin", -1)
+
+        # One reusable (1, n_features) row per thread
+        self._local = threading.local()
+
+    def _buffer(self) -> np.ndarray:
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = np.zeros((1, self.n_features), dtype=np.float64)
+            self._local.row = row
+        return row
+
+    def encode_into(
+        self,
+        out: np.ndarray,
+        city: str,
+        room_type_name: str,
+        base_price: float,
+        room_capacity: int,
+        check_in_date: date,
+        stay_length: int,
+        booking_window: int,
+    ) -> np.ndarray:
+        """Write one feature row into `out` (1-D view of length n_features)."""
+        out.fill(0.0)
+
+        check_in_weekday = check_in_date.weekday()  # 0=Mon, 6=Sun
+
+        if self._base_price_idx >= 0:
+            out[self._base_price_idx] = base_price
+        if self._capacity_idx >= 0:
+            out[self._capacity_idx] = room_capacity
+        if self._stay_idx >= 0:
+            out[self._stay_idx] = stay_length
+        if self._window_idx >= 0:
+            out[self._window_idx] = booking_window
+        if self._weekday_idx >= 0:
+            out[self._weekday_idx] = check_in_weekday
+        if self._weekend_idx >= 0 and check_in_weekday in (4, 5):
+            out[self._weekend_idx] = 1.0
+
+        city_idx = self.city_index.get(city)
+        if city_idx is not None:
+            out[city_idx] = 1.0
+
+        rt_idx = self.room_type_index.get(room_type_name)
+        if rt_idx is not None:
+            out[rt_idx] = 1.0
+
+        if self._city_code_idx >= 0:
+            out[self._city_code_idx] = self.category_codes["city"].get(city, -1)
+        if self._room_type_code_idx >= 0:
+            out[self._room_type_code_idx] = self.category_codes["room_type_name"].get(room_type_name, -1)
+
+        return out
+
+    def encode(
+        self,
+        city: str,
+        room_type_name: str,
+        base_price: float,
+        room_capacity: int,
+        check_in_date: date,
+        stay_length: int,
+        booking_window: int,
+    ) -> np.ndarray:
+        """
+        Encode a single request into this thread's reusable (1, n_features) buffer.
+        The returned array is overwritten by the next call on the same thread.
+        """
+        row = self._buffer()
+        self.encode_into(
+            row[0],
+            city=city,
+            room_type_name=room_type_name,
+            base_price=base_price,
+            room_capacity=room_capacity,
+            check_in_date=check_in_date,
+            stay_length=stay_length,
+            booking_window=booking_window,
+        )
+        return row
+
+    def encode_arrays(
+        self,
+        city_names: Sequence[str],
+        city_codes: np.ndarray,
+        room_type_names: Sequence[str],
+        room_type_codes: np.ndarray,
+        base_prices: np.ndarray,
+        room_capacities: np.ndarray,
+        check_in_weekdays: np.ndarray,
+        stay_lengths: np.ndarray,
+        booking_windows: np.ndarray,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """
+        Encode many rows at once into an (n_rows, n_features) matrix.
+
+        Numeric inputs are per-row arrays. Categoricals are given as a small
+        vocabulary plus per-row integer codes into it, so the one-hot lookup
+        runs once per distinct value instead of once per row.
+
+        With `out` (any float dtype, e.g. a slice of a preallocated float32
+        training matrix) the rows are written there instead of a new array.
+        """
+        check_in_weekdays = np.asarray(check_in_weekdays)
+        n_rows = check_in_weekdays.shape[0]
+
+        numeric_values = {
+            "base_price": base_prices,
+            "room_capacity": room_capacities,
+            "stay_length": stay_lengths,
+            "booking_window": booking_windows,
+            "check_in_weekday": check_in_weekdays,
+            "is_weekend_checkin": np.isin(check_in_weekdays, (4, 5)),
+        }
+
+        if out is None:
+            X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        else:
+            X = out
+            X.fill(0.0)
+        for col, idx in self.numeric_index.items():
+            X[:, idx] = numeric_values[col]
+
+        # One-hot columns; unknown categories stay all-zero
+        rows = np.arange(n_rows)
+        for names, codes, index in (
+            (city_names, city_codes, self.city_index),
+            (room_type_names, room_type_codes, self.room_type_index),
+        ):
+            if not index:
+                continue
+            vocab_cols = np.array([index.get(name, -1) for name in names], dtype=np.int64)
+            row_cols = vocab_cols[np.asarray(codes)]
+            known = row_cols >= 0
+            X[rows[known], row_cols[known]] = 1.0
+
+        # Code columns; unknown categories get -1
+        for col, names, codes in (
+            ("city", city_names, city_codes),
+            ("room_type_name", room_type_names, room_type_codes),
+        ):
+            if col in self.code_index:
+                lookup = self.category_codes[col]
+                vocab_codes = np.array([lookup.get(name, -1) for name in names], dtype=np.int64)
+                X[:, self.code_index[col]] = vocab_codes[np.asarray(codes)]
+
+        return X
+
+    @staticmethod
+    def check_in_keys(check_in_dates: Sequence[date]) -> np.ndarray:
+        """
+        All encode_grid keeps of each check-in date (its weekday): dates
+        with equal keys get identical feature rows.
+        """
+        # 1970-01-01 was a Thursday (weekday 3)
+        days = np.array(check_in_dates, dtype="datetime64[D]").astype(np.int64)
+        return (days + 3) % 7
+
+    def encode_grid(
+        self,
+        city: str,
+        room_types: Sequence[Tuple[str, float, int]],
+        check_in_dates: Sequence[date],
+        stay_lengths: Sequence[int],
+        booking_windows: Sequence[int],
+    ) -> np.ndarray:
+        """
+        Build the feature matrix for the full grid
+        room_types x check_in_dates x stay_lengths x booking_windows,
+        in C order (booking window varies fastest).
+        """
+        grid_shape = (
+            len(room_types),
+            len(check_in_dates),
+            len(stay_lengths),
+            len(booking_windows),
+        )
+        rt_idx, date_idx, stay_idx, window_idx = (
+            idx.reshape(-1) for idx in np.indices(grid_shape)
+        )
+
+        base_prices = np.array([rt[1] for rt in room_types], dtype=np.float64)
+        capacities = np.array([rt[2] for rt in room_types], dtype=np.float64)
+        weekdays = self.check_in_keys(check_in_dates)
+
+        return self.encode_arrays(
+            city_names=[city],
+            city_codes=np.zeros_like(rt_idx),
+            room_type_names=[rt[0] for rt in room_types],
+            room_type_codes=rt_idx,
+            base_prices=base_prices[rt_idx],
+            room_capacities=capacities[rt_idx],
+            check_in_weekdays=weekdays[date_idx],
+            stay_lengths=np.asarray(stay_lengths, dtype=np.float64)[stay_idx],
+            booking_windows=np.asarray(booking_windows, dtype=np.float64)[window_idx],
+        )
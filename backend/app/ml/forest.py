@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+from typing import List
+
+import numpy as np
+
+
+# Directory artifact: manifest.json plus one raw .npy file per node array
+FOREST_DIRNAME = "price_forest"
+FOREST_FORMAT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+NODE_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+# Marker used by sklearn for leaf children
+TREE_LEAF = -1
+
+# Above this many rows sklearn's compiled traversal wins over the NumPy one
+FLAT_FOREST_MAX_ROWS = 512
+
+
+class FlatForest:
+    """
+    A fitted tree ensemble flattened into plain NumPy arrays.
+
+    All trees share one set of node arrays; `roots[t]` is the index of tree
+    t's root, and child indices are global. Leaves point back at themselves,
+    so prediction can walk every tree for every row at once, one level per
+    iteration for `max_depth` iterations, with no per-row branching. The
+    leaf values are then averaged, which is what RandomForestRegressor.predict
+    does minus the input validation and joblib dispatch.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        n_features: int,
+        max_depth: int,
+        feature_columns: List[str] | None = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.feature_columns = list(feature_columns) if feature_columns is not None else None
+        self.n_trees = int(roots.shape[0])
+
+    @classmethod
+    def from_sklearn(cls, model, feature_columns: List[str] | None = None) -> "FlatForest":
+        """Flatten a fitted RandomForestRegressor (single output)."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left == TREE_LEAF
+            node_ids = np.arange(tree.node_count) + offset
+
+            # Leaves loop to themselves: feature 0, and an infinite threshold
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.intp))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.intp))
+            values.append(tree.value[:, 0, 0].astype(np.float64))
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.array(roots, dtype=np.intp),
+            n_features=model.n_features_in_,
+            max_depth=max_depth,
+            feature_columns=feature_columns,
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict for an (n_rows, n_features) matrix; returns shape (n_rows,)."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows = X.shape[0]
+        X_flat = X.reshape(-1)
+
+        # One cursor per (row, tree), advanced one level per iteration
+        nodes = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows, dtype=np.intp) * self.n_features, self.n_trees)
+
+        for _ in range(self.max_depth):
+            x = X_flat[row_offset + self.feature[nodes]]
+            nodes = np.where(x <= self.threshold[nodes], self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].reshape(n_rows, self.n_trees).sum(axis=1) / self.n_trees
+
+    def save(self, path: str) -> None:
+        """
+        Write the forest as a directory of uncompressed .npy files plus a
+        manifest. The directory is assembled next to `path` and renamed into
+        place, so readers never see a half-written artifact.
+        """
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        arrays = {}
+        for name in NODE_ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+            arrays[name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+
+        manifest = {
+            "format_version": FOREST_FORMAT_VERSION,
+            "n_trees": self.n_trees,
+            "n_features": self.n_features,
+            "max_depth": self.max_depth,
+            "feature_columns": self.feature_columns,
+            "arrays": arrays,
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILENAME), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "FlatForest":
+        """
+        Load a saved forest. With `mmap` the node arrays are read-only views
+        of the page cache, shared by every process that maps the same files.
+        """
+        with open(os.path.join(path, MANIFEST_FILENAME)) as f:
+            manifest = json.load(f)
+        if manifest.get("format_version") != FOREST_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported forest format {manifest.get('format_version')!r} in {path}"
+            )
+
+        arrays = {}
+        for name in NODE_ARRAYS:
+            array = np.load(
+                os.path.join(path, f"{name}.npy"),
+                mmap_mode="r" if mmap else None,
+                allow_pickle=False,
+            )
+            # Plain ndarray view of the mapping (skips np.memmap's per-op wrapping)
+            arrays[name] = array.view(np.ndarray)
+
+        return cls(
+            n_features=manifest["n_features"],
+            max_depth=manifest["max_depth"],
+            feature_columns=manifest.get("feature_columns"),
+            **arrays,
+        )
+
+
+def is_flattenable(model) -> bool:
+    """True for fitted single-output tree ensembles that FlatForest can export."""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or getattr(model, "n_outputs_", 1) != 1:
+        return False
+    return all(hasattr(est, "tree_") for est in estimators)
+
+
+def main():
+    """Export the pickled model in the flat models directory without retraining."""
+    from app.ml.predict import MODELS_DIR, _load_sklearn_model
+
+    model, feature_columns = _load_sklearn_model(MODELS_DIR)
+    path = os.path.join(MODELS_DIR, FOREST_DIRNAME)
+    FlatForest.from_sklearn(model, feature_columns).save(path)
+    print(f"Flattened forest saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
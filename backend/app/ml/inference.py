@@ -0,0 +1,129 @@
+"""
+Dedicated thread pool for model inference.
+
+Async endpoints hand predictions to this pool instead of Starlette's
+shared threadpool, so CPU-bound model calls never starve DB-bound
+handlers. The pool has a fixed size. Each model call is single-threaded:
+pickled models are loaded with n_jobs=1 (see predict._load_sklearn_model)
+and native thread pools (OpenMP / BLAS) are limited to one thread. Request
+concurrency comes from the number of pool threads, not from fan-out
+inside one call.
+
+At most INFERENCE_MAX_PENDING calls may be queued or running. Past that,
+submit raises InferenceQueueFull; the API answers 503 with Retry-After,
+so load is shed instead of piling up latency.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.metrics import register_gauge
+from app.profiler import profiler
+
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", str(16 * INFERENCE_WORKERS)))
+INFERENCE_RETRY_AFTER_SECONDS = int(os.getenv("INFERENCE_RETRY_AFTER_SECONDS", "1"))
+
+T = TypeVar("T")
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue already holds max_pending calls."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+def _attributed(route: str, fn: Callable[..., T], *args, **kwargs) -> T:
+    # Lets the sampling profiler count this pool thread under the submitting route
+    with profiler.attributed(route):
+        return fn(*args, **kwargs)
+
+
+def _limit_native_threads() -> None:
+    from threadpoolctl import threadpool_limits
+
+    # Process-wide: serving parallelism comes from the pool threads
+    threadpool_limits(limits=1)
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        max_pending: int = INFERENCE_MAX_PENDING,
+        retry_after: int = INFERENCE_RETRY_AFTER_SECONDS,
+    ):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    _limit_native_threads()
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="inference"
+                    )
+        return self._executor
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) on the pool, or raise InferenceQueueFull."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise InferenceQueueFull(self.retry_after)
+            self.pending += 1
+        route = profiler.caller_route()
+        if route is not None:
+            fn, args = _attributed, (route, fn, *args)
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future | None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn(*args, **kwargs) on the pool, or raise InferenceQueueFull."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Stop the pool; the next run() starts a fresh one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+inference_executor = InferenceExecutor()
+
+
+def _executor_samples():
+    yield ("workers",), inference_executor.workers
+    yield ("max_pending",), inference_executor.max_pending
+    yield ("pending",), inference_executor.pending
+    yield ("rejected",), inference_executor.rejected
+
+
+register_gauge(
+    "inference_executor",
+    "Inference pool size, queue limit, calls queued or running, and cumulative rejections.",
+    _executor_samples,
+    ("stat",),
+)
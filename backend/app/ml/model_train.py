@@ -1,19 +1,57 @@
+import argparse
 import os
-from typing import List
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
 
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 
-from app.ml.data_prep import load_booking_data
+from app.ml import registry
+from app.ml.data_prep import count_bookings, load_booking_data, load_room_catalog
+from app.ml.encoder import CATEGORICAL_FEATURES, NUMERIC_FEATURES, FeatureEncoder, save_categories
+from app.ml.feature_store import read_feature_store, sync_feature_store
+from app.ml.forest import FOREST_DIRNAME, FlatForest, is_flattenable
+from app.ml.price_table import PRICE_TABLE_FILENAME, PRICE_TABLE_MAX_CELLS, compile_price_table
+from app.ml.segments import carry_forward_segments
 
 
-def engineer_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, List[str]]:
+# Bounded-memory (--chunked) training
+TRAIN_CHUNK_SIZE = int(os.getenv("TRAIN_CHUNK_SIZE", "100000"))
+TEST_SIZE = 0.2
+ESTIMATORS = ("hist", "forest")
+FOREST_MAX_DEPTH = 16
+# HistGradientBoosting treats a feature as categorical only up to max_bins (255) values
+HIST_MAX_CATEGORIES = 255
+
+
+# Optional demand features, from the daily_occupancy row of the check-in night
+DEMAND_FEATURES = {
+    "occupancy_rooms_booked": "rooms_booked",
+    "occupancy_on_books_7d": "on_books_7d",
+    "occupancy_on_books_14d": "on_books_14d",
+    "occupancy_on_books_30d": "on_books_30d",
+    "occupancy_cancellations": "cancellations",
+}
+
+
+def engineer_features(
+    df: pd.DataFrame,
+    demand: pd.DataFrame | None = None,
+) -> tuple[pd.DataFrame, pd.Series, List[str]]:
     """
     Take raw joined bookings DataFrame and return:
     X (features), y (target), feature_columns (list of feature names).
+
+    With `demand` (data_prep.load_daily_occupancy()), DEMAND_FEATURES are
+    added from the check-in night's row: a keyed join on
+    (hotel_id, room_type_id, stay_date), nights without bookings count as 0.
     """
 
     # Only use confirmed bookings for training (price actually realized)
@@ -30,6 +68,15 @@ def engineer_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, List[s
     df["check_in_weekday"] = df["check_in_date"].dt.weekday  # 0=Mon, 6=Sun
     df["is_weekend_checkin"] = df["check_in_weekday"].isin([4, 5]).astype(int)
 
+    if demand is not None:
+        nights = demand.rename(columns={"stay_date": "check_in_date", **{v: k for k, v in DEMAND_FEATURES.items()}})
+        df = df.merge(
+            nights[["hotel_id", "room_type_id", "check_in_date", *DEMAND_FEATURES]],
+            on=["hotel_id", "room_type_id", "check_in_date"],
+            how="left",
+        )
+        df[list(DEMAND_FEATURES)] = df[list(DEMAND_FEATURES)].fillna(0)
+
     # Target
     y = df["price_sold"]
 
@@ -42,9 +89,16 @@ def engineer_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, List[s
         "check_in_weekday",
         "is_weekend_checkin",
     ]
+    if demand is not None:
+        feature_cols += list(DEMAND_FEATURES)
 
     # Categorical features to one-hot encode
     cat_cols = ["city", "room_type_name"]
+    for col in cat_cols:
+        # Category columns (feature store) would otherwise get dummies for
+        # values that only appear in filtered-out rows
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
 
     df_cat = pd.get_dummies(df[cat_cols], prefix=cat_cols)
     X_num = df[feature_cols]
@@ -55,9 +109,71 @@ def engineer_features(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series, List[s
     return X, y, all_feature_cols
 
 
-def train_price_model():
-    print("Loading data from database...")
-    df = load_booking_data()
+def _publish_model(
+    model,
+    feature_columns: List[str],
+    domain: pd.DataFrame,
+    metadata: dict,
+    categories: Dict[str, List[str]] | None = None,
+    stay_range: Tuple[int, int] | None = None,
+    window_range: Tuple[int, int] | None = None,
+) -> str:
+    """
+    Save a fitted model into a staging directory, publish it as a new
+    registry version and activate it; serving workers pick it up without a
+    restart. Returns the version.
+    """
+    models_dir = registry.create_staging_dir()
+
+    model_path = os.path.join(models_dir, "price_model.pkl")
+    features_path = os.path.join(models_dir, "feature_columns.pkl")
+
+    joblib.dump(model, model_path)
+    joblib.dump(feature_columns, features_path)
+    if categories is not None:
+        save_categories(models_dir, categories)
+
+    # Flattened, memory-mappable node arrays for the serving path
+    if is_flattenable(model):
+        forest_path = os.path.join(models_dir, FOREST_DIRNAME)
+        FlatForest.from_sklearn(model, feature_columns).save(forest_path)
+
+    # Precompute prices over the input domain, unless it is too large
+    print("\nCompiling price lookup table...")
+    table = compile_price_table(
+        model,
+        feature_columns,
+        domain,
+        categories=categories,
+        stay_range=stay_range,
+        window_range=window_range,
+    )
+    if table is None:
+        print(f"Price table would exceed {PRICE_TABLE_MAX_CELLS} cells; serving uses the model")
+    else:
+        table.save(os.path.join(models_dir, PRICE_TABLE_FILENAME))
+        print(f"Price table cells: {table.prices.size}")
+
+    # Segment models don't depend on the global one; keep serving them
+    metadata = {**metadata, **carry_forward_segments(models_dir)}
+
+    version = registry.publish_version(models_dir, metadata=metadata)
+    registry.activate_version(version)
+
+    print(f"\nModel version {version} saved to: {registry.version_path(version)}")
+    print("Activated as the current model.")
+    return version
+
+
+def train_price_model(use_feature_store: bool = False):
+    if use_feature_store:
+        print("Syncing feature store...")
+        added = sync_feature_store()
+        print(f"New bookings since last run: {added}")
+        df = read_feature_store()
+    else:
+        print("Loading data from database...")
+        df = load_booking_data()
     print(f"Raw rows: {df.shape[0]}")
 
     X, y, feature_columns = engineer_features(df)
@@ -89,22 +205,223 @@ def train_price_model():
     print(f"  MAE: {mae:.2f}")
     print(f"  R^2: {r2:.3f}")
 
-    # Save model and feature columns
-    models_dir = os.path.join("app", "ml", "models")
-    os.makedirs(models_dir, exist_ok=True)
+    _publish_model(
+        model,
+        feature_columns,
+        domain=pd.concat([df, load_room_catalog()], ignore_index=True),
+        metadata={
+            "mae": float(mae),
+            "r2": float(r2),
+            "training_rows": int(X.shape[0]),
+            "n_features": int(X.shape[1]),
+        },
+    )
 
-    model_path = os.path.join(models_dir, "price_model.pkl")
-    features_path = os.path.join(models_dir, "feature_columns.pkl")
 
-    joblib.dump(model, model_path)
-    joblib.dump(feature_columns, features_path)
+# ---------- bounded-memory training ----------
+
+@contextmanager
+def _stage(name: str, report: List[dict]):
+    """Time a training stage and record its peak traced memory and the process max RSS."""
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20 if tracing else None
+    # ru_maxrss is in KiB on Linux
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    report.append({"stage": name, "seconds": elapsed, "peak_mb": peak_mb, "max_rss_mb": max_rss_mb})
+    peak = f"{peak_mb:8.1f} MB" if peak_mb is not None else "       -   "
+    print(f"  [{name:<11}] {elapsed:7.2f} s   peak {peak}   max RSS {max_rss_mb:8.1f} MB")
+
+
+def _encode_chunk(
+    encoder: FeatureEncoder,
+    chunk: pd.DataFrame,
+    out: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode one chunk of bookings into `out`; returns its stay lengths and booking windows."""
+    booking = pd.to_datetime(chunk["booking_date"]).to_numpy().astype("datetime64[D]")
+    check_in = pd.to_datetime(chunk["check_in_date"]).to_numpy().astype("datetime64[D]")
+    check_out = pd.to_datetime(chunk["check_out_date"]).to_numpy().astype("datetime64[D]")
+    stay_lengths = (check_out - check_in).astype(np.int64)
+    booking_windows = (check_in - booking).astype(np.int64)
+
+    city_codes, city_names = pd.factorize(chunk["city"])
+    room_type_codes, room_type_names = pd.factorize(chunk["room_type_name"])
+    encoder.encode_arrays(
+        city_names=list(city_names),
+        city_codes=city_codes,
+        room_type_names=list(room_type_names),
+        room_type_codes=room_type_codes,
+        base_prices=chunk["base_price"].to_numpy(),
+        room_capacities=chunk["room_capacity"].to_numpy(),
+        # 1970-01-01 was a Thursday (weekday 3)
+        check_in_weekdays=(check_in.astype(np.int64) + 3) % 7,
+        stay_lengths=stay_lengths,
+        booking_windows=booking_windows,
+        out=out,
+    )
+    return stay_lengths, booking_windows
+
+
+def train_price_model_chunked(
+    estimator: str = "hist",
+    max_depth: int = FOREST_MAX_DEPTH,
+    chunk_size: int = TRAIN_CHUNK_SIZE,
+    trace_memory: bool = True,
+) -> List[dict]:
+    """
+    Train without ever materialising the booking history as a DataFrame.
+
+    Confirmed bookings are streamed from the database `chunk_size` rows at
+    a time and encoded straight into preallocated float32 train/test
+    matrices (rows are assigned to the test set up front, so there is no
+    split copy). City and room type are single integer-code columns
+    instead of one-hot dummies. `estimator` is "hist" (gradient boosting
+    with native categorical support) or "forest" (random forest capped at
+    `max_depth`). Returns the per-stage timing / memory report.
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator {estimator!r}; expected one of {ESTIMATORS}")
+
+    report: List[dict] = []
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        with _stage("prepare", report):
+            n_rows = count_bookings(status="confirmed")
+            catalog = load_room_catalog()
+            categories = {
+                "city": sorted(catalog["city"].astype(str).unique().tolist()),
+                "room_type_name": sorted(catalog["room_type_name"].astype(str).unique().tolist()),
+            }
+            feature_columns = list(NUMERIC_FEATURES) + list(CATEGORICAL_FEATURES)
+            encoder = FeatureEncoder(feature_columns, categories)
+
+            test_mask = np.random.default_rng(42).random(n_rows) < TEST_SIZE
+            n_test = int(test_mask.sum())
+            X_train = np.empty((n_rows - n_test, len(feature_columns)), dtype=np.float32)
+            X_test = np.empty((n_test, len(feature_columns)), dtype=np.float32)
+            y_train = np.empty(n_rows - n_test, dtype=np.float64)
+            y_test = np.empty(n_test, dtype=np.float64)
+            buffer = np.empty((chunk_size, len(feature_columns)), dtype=np.float32)
+        print(f"Training rows: {n_rows} ({n_rows - n_test} train / {n_test} test)")
+
+        with _stage("load+encode", report):
+            offset = n_train_filled = n_test_filled = 0
+            stay_range = window_range = None
+            for chunk in load_booking_data(status="confirmed", chunksize=chunk_size):
+                # Bookings inserted after the count are left for the next run
+                chunk = chunk.iloc[: n_rows - offset]
+                if chunk.empty:
+                    break
+                m = len(chunk)
+                stays, windows = _encode_chunk(encoder, chunk, buffer[:m])
+                stay_range = _widen(stay_range, stays)
+                window_range = _widen(window_range, windows)
+
+                is_test = test_mask[offset:offset + m]
+                k_test = int(is_test.sum())
+                k_train = m - k_test
+                prices = chunk["price_sold"].to_numpy(dtype=np.float64)
+                X_train[n_train_filled:n_train_filled + k_train] = buffer[:m][~is_test]
+                y_train[n_train_filled:n_train_filled + k_train] = prices[~is_test]
+                X_test[n_test_filled:n_test_filled + k_test] = buffer[:m][is_test]
+                y_test[n_test_filled:n_test_filled + k_test] = prices[is_test]
+                n_train_filled += k_train
+                n_test_filled += k_test
+                offset += m
+
+            # Fewer rows than counted (deletions mid-run): use what arrived
+            X_train, y_train = X_train[:n_train_filled], y_train[:n_train_filled]
+            X_test, y_test = X_test[:n_test_filled], y_test[:n_test_filled]
 
-    print(f"\nModel saved to: {model_path}")
-    print(f"Feature columns saved to: {features_path}")
+        with _stage("fit", report):
+            if estimator == "hist":
+                categorical = [
+                    feature_columns.index(col)
+                    for col, values in categories.items()
+                    if len(values) <= HIST_MAX_CATEGORIES
+                ]
+                model = HistGradientBoostingRegressor(
+                    max_iter=300,
+                    categorical_features=categorical or None,
+                    random_state=42,
+                )
+            else:
+                model = RandomForestRegressor(
+                    n_estimators=200,
+                    max_depth=max_depth,
+                    random_state=42,
+                    n_jobs=-1,
+                )
+            model.fit(X_train, y_train)
+
+        with _stage("evaluate", report):
+            y_pred = model.predict(X_test) if len(y_test) else np.empty(0)
+            mae = mean_absolute_error(y_test, y_pred) if len(y_test) else float("nan")
+            r2 = r2_score(y_test, y_pred) if len(y_test) > 1 else float("nan")
+        print(f"  MAE: {mae:.2f}")
+        print(f"  R^2: {r2:.3f}")
+
+        with _stage("publish", report):
+            _publish_model(
+                model,
+                feature_columns,
+                domain=catalog,
+                metadata={
+                    "mae": float(mae),
+                    "r2": float(r2),
+                    "training_rows": int(n_train_filled + n_test_filled),
+                    "n_features": len(feature_columns),
+                    "estimator": estimator,
+                },
+                categories=categories,
+                stay_range=stay_range,
+                window_range=window_range,
+            )
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    total = sum(r["seconds"] for r in report)
+    print(f"\nTotal: {total:.2f} s, max RSS {report[-1]['max_rss_mb']:.1f} MB")
+    return report
+
+
+def _widen(current: Tuple[int, int] | None, values: np.ndarray) -> Tuple[int, int] | None:
+    if values.size == 0:
+        return current
+    low, high = int(values.min()), int(values.max())
+    if current is None:
+        return low, high
+    return min(current[0], low), max(current[1], high)
 
 
 def main():
-    train_price_model()
+    parser = argparse.ArgumentParser(description="Train the price model and publish it to the registry.")
+    parser.add_argument("--feature-store", action="store_true", help="read the incremental feature store instead of the full join")
+    parser.add_argument("--from-db", action="store_true", help="read the full join (the default)")
+    parser.add_argument("--chunked", action="store_true", help="bounded-memory streaming pipeline")
+    parser.add_argument("--estimator", choices=ESTIMATORS, default="hist", help="with --chunked")
+    parser.add_argument("--max-depth", type=int, default=FOREST_MAX_DEPTH, help="with --estimator forest")
+    parser.add_argument("--chunk-size", type=int, default=TRAIN_CHUNK_SIZE)
+    parser.add_argument("--no-trace-memory", action="store_true", help="skip tracemalloc (faster, RSS only)")
+    args = parser.parse_args()
+
+    if args.chunked:
+        train_price_model_chunked(
+            estimator=args.estimator,
+            max_depth=args.max_depth,
+            chunk_size=args.chunk_size,
+            trace_memory=not args.no_trace_memory,
+        )
+    else:
+        train_price_model(use_feature_store=args.feature_store and not args.from_db)
 
 
 if __name__ == "__main__":
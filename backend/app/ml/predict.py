@@ -1,31 +1,269 @@
 import os
+import threading
+import time
+import warnings
 from datetime import date
-from typing import List
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
-import pandas as pd
-import joblib
 
+from app.metrics import PRICING_STAGE_SECONDS, register_gauge
+from app.ml import registry
+from app.ml.cache import PredictionCache
+from app.ml.encoder import FeatureEncoder, load_categories
+from app.ml.forest import (
+    FLAT_FOREST_MAX_ROWS,
+    FOREST_DIRNAME,
+    FlatForest,
+    is_flattenable,
+)
+from app.ml.price_table import PRICE_TABLE_FILENAME, PriceTable
+from app.ml.segments import SEGMENTS_DIRNAME, load_segment_index
 
-# Lazy-loaded globals
-_model = None
-_feature_columns: List[str] | None = None
 
+# Business rule: recommendations are clamped around the room's base price
+PRICE_FLOOR_MULTIPLIER = 0.7
+PRICE_CEILING_MULTIPLIER = 1.8
 
-def _load_model_and_features():
-    global _model, _feature_columns
+# Pre-registry flat model directory, used when the registry has no active version
+MODELS_DIR = os.path.join("app", "ml", "models")
+LEGACY_VERSION = "legacy"
+
+# How often workers check the registry for a newly activated version
+MODEL_RELOAD_INTERVAL_SECONDS = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "5"))
+
+# Serve only from exported artifacts (price_forest/): the pickled sklearn
+# model is never loaded, so the API process needs neither scikit-learn nor
+# joblib. Versions without an exported forest fail to load.
+INFERENCE_EXPORTED_ONLY = os.getenv("INFERENCE_EXPORTED_ONLY", "0") == "1"
+# Rows per FlatForest call when large batches can't go to sklearn
+EXPORTED_PREDICT_CHUNK_ROWS = 4096
+
+# Result cache in front of the model for inputs the price table doesn't cover
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300"))
+
+prediction_cache = PredictionCache(
+    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+)
+
+# The encoder writes columns in exactly the training order, so plain NumPy
+# input is safe; silence sklearn's "no feature names" warning for it.
+warnings.filterwarnings(
+    "ignore",
+    message="X does not have valid feature names",
+    category=UserWarning,
+)
+
+
+def _load_sklearn_model(models_dir: str):
+    """Load a pickled sklearn model and its feature columns from a model directory."""
+    # Unpickling imports scikit-learn; keep both out of the API's import path
+    import joblib
+
+    with PRICING_STAGE_SECONDS.time("sklearn_load"):
+        model = joblib.load(os.path.join(models_dir, "price_model.pkl"))
+        feature_columns = joblib.load(os.path.join(models_dir, "feature_columns.pkl"))
+    # Trained with n_jobs=-1; when serving, one call must not fan out over every core
+    if getattr(model, "n_jobs", None) is not None:
+        model.n_jobs = 1
+    return model, feature_columns
+
+
+class LoadedModel:
+    """
+    Everything needed to serve one model version.
+
+    Instances are immutable once built; a reload builds a new one and swaps
+    the module-level reference, so a request that already holds a
+    LoadedModel finishes on that version.
+    """
+
+    def __init__(self, version: str, path: str):
+        self.version = version
+        self.path = path
+        self._sklearn_model = None
+        self._sklearn_lock = threading.Lock()
+
+        self.forest: FlatForest | None = None
+        feature_columns = None
+
+        forest_path = os.path.join(path, FOREST_DIRNAME)
+        if os.path.isdir(forest_path):
+            self.forest = FlatForest.load(forest_path)
+            feature_columns = self.forest.feature_columns
+        if feature_columns is None and INFERENCE_EXPORTED_ONLY:
+            raise RuntimeError(
+                f"{path} has no exported {FOREST_DIRNAME} with feature columns; "
+                "it can't be served with INFERENCE_EXPORTED_ONLY=1"
+            )
+        if feature_columns is None:
+            model, feature_columns = self.sklearn_model_and_features()
+            if self.forest is None and is_flattenable(model):
+                self.forest = FlatForest.from_sklearn(model, feature_columns)
+
+        self.feature_columns: List[str] = list(feature_columns)
+        self.encoder = FeatureEncoder(self.feature_columns, load_categories(path))
+
+        # Optional precompiled table (written by train_price_model)
+        self.price_table: PriceTable | None = None
+        table_path = os.path.join(path, PRICE_TABLE_FILENAME)
+        if os.path.exists(table_path):
+            self.price_table = PriceTable.load(table_path)
+
+        # Per-hotel / per-city models of a segmented version, loaded on first use
+        self.segment_index = load_segment_index(path)
+        self._segments: Dict[str, "LoadedModel"] = {}
+        self._segments_lock = threading.Lock()
 
-    if _model is not None and _feature_columns is not None:
-        return _model, _feature_columns
+    def sklearn_model_and_features(self):
+        """The pickled model, loaded on first use (large batches, fallbacks, tooling)."""
+        if INFERENCE_EXPORTED_ONLY:
+            raise RuntimeError("The pickled model is not loaded with INFERENCE_EXPORTED_ONLY=1")
+        if self._sklearn_model is None:
+            with self._sklearn_lock:
+                if self._sklearn_model is None:
+                    self._sklearn_model = _load_sklearn_model(self.path)
+        return self._sklearn_model
 
-    models_dir = os.path.join("app", "ml", "models")
-    model_path = os.path.join(models_dir, "price_model.pkl")
-    features_path = os.path.join(models_dir, "feature_columns.pkl")
+    def predict_rows(self, X: np.ndarray) -> np.ndarray:
+        """
+        Run the model on encoded rows. Small inputs go through the flattened
+        forest; large batches are cheaper in sklearn's compiled traversal.
+        """
+        if self.forest is not None and X.shape[0] <= FLAT_FOREST_MAX_ROWS:
+            return self.forest.predict(X)
+        if INFERENCE_EXPORTED_ONLY:
+            # Chunked, so the per-(row, tree) cursors stay small
+            return np.concatenate([
+                self.forest.predict(X[start:start + EXPORTED_PREDICT_CHUNK_ROWS])
+                for start in range(0, X.shape[0], EXPORTED_PREDICT_CHUNK_ROWS)
+            ])
+        model, _ = self.sklearn_model_and_features()
+        return np.asarray(model.predict(X), dtype=np.float64)
 
-    _model = joblib.load(model_path)
-    _feature_columns = joblib.load(features_path)
+    def segment_for(self, hotel_id: int | None, city: str) -> "LoadedModel | None":
+        """The segment model serving this hotel (or city), None to use this model."""
+        index = self.segment_index
+        if index is None:
+            return None
+        key = index["hotels"].get(str(hotel_id)) if hotel_id is not None else None
+        if key is None:
+            key = index["cities"].get(city)
+        if key is None:
+            return None
 
-    return _model, _feature_columns
+        segment = self._segments.get(key)
+        if segment is None:
+            with self._segments_lock:
+                segment = self._segments.get(key)
+                if segment is None:
+                    segment = LoadedModel(
+                        f"{self.version}/{key}", os.path.join(self.path, SEGMENTS_DIRNAME, key)
+                    )
+                    self._segments[key] = segment
+        return segment
+
+    def warm_up(self) -> None:
+        self.predict_rows(np.zeros((1, self.encoder.n_features), dtype=np.float64))
+
+
+# Active model; replaced wholesale on reload
+_active: LoadedModel | None = None
+_load_lock = threading.Lock()
+_watcher: threading.Thread | None = None
+_watcher_stop = threading.Event()
+_loaded_at: float | None = None
+
+
+def _resolve_active_version() -> Tuple[str, str]:
+    """(version, path) the registry points at, or the legacy flat directory."""
+    version = registry.get_current_version()
+    if version is not None:
+        return version, registry.version_path(version)
+    return LEGACY_VERSION, MODELS_DIR
+
+
+def _get_active_model() -> LoadedModel:
+    model = _active
+    if model is None:
+        with _load_lock:
+            if _active is None:
+                _swap_in(*_resolve_active_version())
+            model = _active
+    return model
+
+
+def _swap_in(version: str, path: str) -> LoadedModel:
+    """Build and warm up a model off to the side, then make it active."""
+    global _active, _loaded_at
+    with PRICING_STAGE_SECONDS.time("model_load"):
+        model = LoadedModel(version, path)
+        model.warm_up()
+    _active = model
+    _loaded_at = time.time()
+    # Keys carry the version, so this only frees memory held by the old model
+    prediction_cache.clear()
+    return model
+
+
+def reload_model(force: bool = False) -> bool:
+    """
+    Load the registry's active version if it differs from the served one.
+    Returns True when a new model was swapped in.
+    """
+    version, path = _resolve_active_version()
+    with _load_lock:
+        if not force and _active is not None and _active.version == version:
+            return False
+        _swap_in(version, path)
+    return True
+
+
+def get_loaded_version() -> str | None:
+    return _active.version if _active is not None else None
+
+
+def _watch_registry(interval: float) -> None:
+    while not _watcher_stop.wait(interval):
+        try:
+            reload_model()
+        except Exception as exc:  # keep serving the current model
+            print(f"Model reload failed: {exc!r}")
+
+
+def start_model_watcher(interval: float = MODEL_RELOAD_INTERVAL_SECONDS) -> None:
+    """Poll the registry in a background thread and hot-swap new versions."""
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _watcher_stop.clear()
+    _watcher = threading.Thread(
+        target=_watch_registry, args=(interval,), name="model-watcher", daemon=True
+    )
+    _watcher.start()
+
+
+def stop_model_watcher() -> None:
+    _watcher_stop.set()
+
+
+def load_price_model() -> None:
+    """
+    Eagerly load the model and run one prediction, so the first real
+    request doesn't pay for loading. Called at application startup.
+    """
+    _get_active_model()
+
+
+def _load_model_and_features():
+    """The active version's pickled sklearn model and feature columns."""
+    return _get_active_model().sklearn_model_and_features()
+
+
+def _get_encoder() -> FeatureEncoder:
+    return _get_active_model().encoder
 
 
 def _build_feature_row(
@@ -36,42 +274,80 @@ def _build_feature_row(
     check_in_date: date,
     stay_length: int,
     booking_window: int,
-) -> pd.DataFrame:
-    model, feature_columns = _load_model_and_features()
+) -> np.ndarray:
+    """
+    Encode one request as a (1, n_features) float64 row.
+    Uses the encoder's per-thread buffer, so the row is only valid until the
+    next call on the same thread.
+    """
+    encoder = _get_encoder()
+    with PRICING_STAGE_SECONDS.time("feature_build"):
+        return encoder.encode(
+            city=city,
+            room_type_name=room_type_name,
+            base_price=base_price,
+            room_capacity=room_capacity,
+            check_in_date=check_in_date,
+            stay_length=stay_length,
+            booking_window=booking_window,
+        )
 
-    # Start with all zeros
-    data = {col: 0.0 for col in feature_columns}
 
-    # Time features
-    check_in_weekday = check_in_date.weekday()  # 0=Mon, 6=Sun
-    is_weekend_checkin = 1 if check_in_weekday in (4, 5) else 0
-
-    # Fill numeric features if present
-    numeric_values = {
-        "base_price": base_price,
-        "room_capacity": room_capacity,
-        "stay_length": stay_length,
-        "booking_window": booking_window,
-        "check_in_weekday": check_in_weekday,
-        "is_weekend_checkin": is_weekend_checkin,
-    }
+def prepare_stay(
+    city: str,
+    room_type_name: str,
+    base_price: float,
+    room_capacity: int,
+    check_in_date: date,
+    stay_length: int,
+    booking_window: int,
+    hotel_id: int | None = None,
+) -> Tuple[LoadedModel, float | None, np.ndarray | None, tuple | None]:
+    """
+    Everything short of the model call for one stay.
 
-    for col, val in numeric_values.items():
-        if col in data:
-            data[col] = float(val)
+    Returns (model, price, X, cache_key). `price` is set when the price table
+    or the prediction cache already answers; otherwise X is the encoded
+    (1, n_features) row (the encoder's per-thread buffer) and the caller
+    runs the model on it and stores the result under `cache_key`.
+    """
+    # Pin one model version for the whole call
+    model = _get_active_model()
+    model = model.segment_for(hotel_id, city) or model
 
-    # One-hot for city
-    city_col = f"city_{city}"
-    if city_col in data:
-        data[city_col] = 1.0
+    # O(1) answer for anything inside the precompiled domain
+    if model.price_table is not None:
+        with PRICING_STAGE_SECONDS.time("price_table"):
+            price = model.price_table.lookup(
+                city=city,
+                room_type_name=room_type_name,
+                base_price=base_price,
+                room_capacity=room_capacity,
+                check_in_date=check_in_date,
+                stay_length=stay_length,
+                booking_window=booking_window,
+            )
+        if price is not None:
+            return model, price, None, None
 
-    # One-hot for room type name
-    rt_col = f"room_type_name_{room_type_name}"
-    if rt_col in data:
-        data[rt_col] = 1.0
+    with PRICING_STAGE_SECONDS.time("feature_build"):
+        X = model.encoder.encode(
+            city=city,
+            room_type_name=room_type_name,
+            base_price=base_price,
+            room_capacity=room_capacity,
+            check_in_date=check_in_date,
+            stay_length=stay_length,
+            booking_window=booking_window,
+        )
 
-    df = pd.DataFrame([data])
-    return df
+    # Many requests share a feature vector (hotel id and exact date aren't
+    # model inputs); base_price is part of it, so price changes never hit stale entries
+    cache_key = (model.version, X.tobytes())
+    cached = prediction_cache.get(cache_key)
+    if cached is not None:
+        return model, cached, None, None
+    return model, None, X, cache_key
 
 
 def predict_price_for_stay(
@@ -82,9 +358,14 @@ def predict_price_for_stay(
     check_in_date: date,
     stay_length: int,
     booking_window: int,
+    hotel_id: int | None = None,
 ) -> float:
-    model, _ = _load_model_and_features()
-    X = _build_feature_row(
+    """
+    Model price for one stay. With `hotel_id`, a segmented model version
+    routes to that hotel's (or its city's) segment model; hotels without a
+    segment use the global model.
+    """
+    model, price, X, cache_key = prepare_stay(
         city=city,
         room_type_name=room_type_name,
         base_price=base_price,
@@ -92,6 +373,107 @@ def predict_price_for_stay(
         check_in_date=check_in_date,
         stay_length=stay_length,
         booking_window=booking_window,
+        hotel_id=hotel_id,
     )
-    y_pred = model.predict(X)[0]
-    return float(y_pred)
+    if price is not None:
+        return price
+
+    with PRICING_STAGE_SECONDS.time("model_predict"):
+        y_pred = float(model.predict_rows(X)[0])
+    prediction_cache.put(cache_key, y_pred)
+    return y_pred
+
+
+def clamp_to_base_price(prices, base_prices):
+    """
+    Clamp model prices to the allowed band around base price.
+    Works on scalars and on NumPy arrays (broadcasting as usual).
+    """
+    lower_bound = np.multiply(base_prices, PRICE_FLOOR_MULTIPLIER)
+    upper_bound = np.multiply(base_prices, PRICE_CEILING_MULTIPLIER)
+    return np.clip(prices, lower_bound, upper_bound)
+
+
+def predict_prices_batch(
+    city: str,
+    room_types: Sequence[Tuple[str, float, int]],
+    check_in_dates: Sequence[date],
+    stay_lengths: Sequence[int],
+    booking_windows: Sequence[int],
+    hotel_id: int | None = None,
+) -> np.ndarray:
+    """
+    Predict model prices for every combination of room type, check-in date,
+    stay length and booking window with a single model call, routed to the
+    hotel's segment model like predict_price_for_stay. Check-in dates that
+    encode alike (same weekday) are predicted once.
+
+    `room_types` is a sequence of (name, base_price, capacity) tuples.
+    Returns an array of shape
+    (len(room_types), len(check_in_dates), len(stay_lengths), len(booking_windows)).
+    """
+    grid_shape = (
+        len(room_types),
+        len(check_in_dates),
+        len(stay_lengths),
+        len(booking_windows),
+    )
+    if 0 in grid_shape:
+        return np.empty(grid_shape, dtype=np.float64)
+
+    model = _get_active_model()
+    model = model.segment_for(hotel_id, city) or model
+    with PRICING_STAGE_SECONDS.time("feature_build"):
+        # Dates only reach the model as their weekday: predict one date per
+        # distinct key and broadcast, so a year of dates costs 7 columns
+        _, first, inverse = np.unique(
+            model.encoder.check_in_keys(check_in_dates), return_index=True, return_inverse=True
+        )
+        X = model.encoder.encode_grid(
+            city=city,
+            room_types=room_types,
+            check_in_dates=[check_in_dates[i] for i in first],
+            stay_lengths=stay_lengths,
+            booking_windows=booking_windows,
+        )
+    with PRICING_STAGE_SECONDS.time("model_predict"):
+        y_pred = model.predict_rows(X)
+    return y_pred.reshape(grid_shape[0], len(first), *grid_shape[2:])[:, inverse.reshape(-1)]
+
+
+# ---------- metrics ----------
+
+def _model_samples():
+    model = _active
+    if model is not None:
+        yield (model.version,), 1
+
+
+def _model_loaded_at_samples():
+    if _loaded_at is not None:
+        yield (), _loaded_at
+
+
+def _cache_samples():
+    stats = prediction_cache.stats()
+    for key in ("size", "max_entries", "hits", "misses", "hit_ratio", "evictions", "expirations", "invalidations"):
+        yield (key,), stats[key]
+
+
+register_gauge(
+    "pricing_model_info",
+    "Model version served by this worker (value 1).",
+    _model_samples,
+    ("version",),
+)
+register_gauge(
+    "pricing_model_loaded_timestamp_seconds",
+    "Unix time the served model version was swapped in.",
+    _model_loaded_at_samples,
+)
+register_gauge(
+    "prediction_cache",
+    "Prediction cache size and cumulative counters.",
+    _cache_samples,
+    ("stat",),
+)
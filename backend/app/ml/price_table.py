@@ -0,0 +1,250 @@
+import os
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import numpy as np
+
+from app.ml.encoder import FeatureEncoder
+
+if TYPE_CHECKING:
+    # Only compiling a table needs pandas; serving just loads one
+    import pandas as pd
+
+
+PRICE_TABLE_FILENAME = "price_table.npz"
+
+# Minimum domain covered regardless of what the training data contains
+DEFAULT_STAY_LENGTHS = (1, 3)
+DEFAULT_BOOKING_WINDOWS = (1, 30)
+
+# Above this many cells no table is compiled and serving uses the model
+PRICE_TABLE_MAX_CELLS = int(os.getenv("PRICE_TABLE_MAX_CELLS", "2000000"))
+# Grid rows encoded and predicted per model call while compiling
+PRICE_TABLE_CHUNK_ROWS = int(os.getenv("PRICE_TABLE_CHUNK_ROWS", "100000"))
+
+# (city, room type name, base_price, capacity)
+TableKey = Tuple[str, str, float, int]
+
+
+class PriceTable:
+    """
+    Dense table of model prices over the enumerable input domain.
+
+    Axes: (city, room profile) pair x check-in weekday x stay length x
+    booking window. Only pairs that actually occur (one per room type) are
+    stored, not every city x profile combination. Lookups are one dict hit
+    and one array index; anything outside the grid returns None so the
+    caller can fall back to the real model.
+    """
+
+    def __init__(
+        self,
+        keys: List[TableKey],
+        stay_range: Tuple[int, int],
+        window_range: Tuple[int, int],
+        prices: np.ndarray,
+    ):
+        self.keys = [(str(c), str(n), float(b), int(cap)) for c, n, b, cap in keys]
+        self.stay_min, self.stay_max = int(stay_range[0]), int(stay_range[1])
+        self.window_min, self.window_max = int(window_range[0]), int(window_range[1])
+        self.prices = prices
+
+        self._key_index: Dict[TableKey, int] = {k: i for i, k in enumerate(self.keys)}
+
+    def lookup(
+        self,
+        city: str,
+        room_type_name: str,
+        base_price: float,
+        room_capacity: int,
+        check_in_date: date,
+        stay_length: int,
+        booking_window: int,
+    ) -> float | None:
+        key_idx = self._key_index.get(
+            (city, room_type_name, float(base_price), int(room_capacity))
+        )
+        if key_idx is None:
+            return None
+        if not (self.stay_min <= stay_length <= self.stay_max):
+            return None
+        if not (self.window_min <= booking_window <= self.window_max):
+            return None
+
+        return float(
+            self.prices[
+                key_idx,
+                check_in_date.weekday(),
+                stay_length - self.stay_min,
+                booking_window - self.window_min,
+            ]
+        )
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            key_cities=np.array([k[0] for k in self.keys], dtype=str),
+            key_names=np.array([k[1] for k in self.keys], dtype=str),
+            key_base_prices=np.array([k[2] for k in self.keys], dtype=np.float64),
+            key_capacities=np.array([k[3] for k in self.keys], dtype=np.int64),
+            stay_range=np.array([self.stay_min, self.stay_max], dtype=np.int64),
+            window_range=np.array([self.window_min, self.window_max], dtype=np.int64),
+            prices=self.prices,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "PriceTable":
+        with np.load(path, allow_pickle=False) as data:
+            prices = data["prices"]
+            if "key_cities" in data:
+                keys = list(zip(
+                    data["key_cities"].tolist(),
+                    data["key_names"].tolist(),
+                    data["key_base_prices"].tolist(),
+                    data["key_capacities"].tolist(),
+                ))
+            else:
+                # Older versions: city x profile axes, flattened into pairs
+                profiles = list(zip(
+                    data["profile_names"].tolist(),
+                    data["profile_base_prices"].tolist(),
+                    data["profile_capacities"].tolist(),
+                ))
+                keys = [(city, *profile) for city in data["cities"].tolist() for profile in profiles]
+                prices = prices.reshape((len(keys),) + prices.shape[2:])
+            return cls(
+                keys=keys,
+                stay_range=tuple(data["stay_range"].tolist()),
+                window_range=tuple(data["window_range"].tolist()),
+                prices=prices.copy(),
+            )
+
+
+def compile_price_table(
+    model,
+    feature_columns: List[str],
+    df: "pd.DataFrame",
+    categories: Dict[str, List[str]] | None = None,
+    stay_range: Tuple[int, int] | None = None,
+    window_range: Tuple[int, int] | None = None,
+    max_cells: int = PRICE_TABLE_MAX_CELLS,
+    chunk_rows: int = PRICE_TABLE_CHUNK_ROWS,
+) -> PriceTable | None:
+    """
+    Evaluate `model` once over every point of the input domain seen in `df`.
+
+    `df` needs city, room_type_name, base_price and room_capacity columns
+    (raw bookings and/or the room catalog); every distinct combination of
+    the four is a table key. Stay length and booking window ranges cover
+    the defaults plus whatever the bookings contain, plus `stay_range` /
+    `window_range` when the caller has already computed them (e.g. while
+    streaming bookings it didn't keep). `categories` are the vocabularies
+    of a compact-categorical model.
+
+    The grid is encoded and predicted about `chunk_rows` rows at a time, so
+    memory stays bounded by the table itself. Returns None, without calling
+    the model, when the table would exceed `max_cells`.
+    """
+    import pandas as pd
+
+    key_frame = (
+        pd.DataFrame({
+            "city": df["city"].astype(str),
+            "room_type_name": df["room_type_name"].astype(str),
+            "base_price": df["base_price"].astype(float),
+            "room_capacity": df["room_capacity"].astype(int),
+        })
+        .drop_duplicates()
+        .sort_values(["city", "room_type_name", "base_price", "room_capacity"])
+    )
+    keys: List[TableKey] = list(key_frame.itertuples(index=False, name=None))
+
+    stay_min, stay_max = DEFAULT_STAY_LENGTHS
+    window_min, window_max = DEFAULT_BOOKING_WINDOWS
+    date_cols = ["booking_date", "check_in_date", "check_out_date"]
+    if set(date_cols) <= set(df.columns):
+        dated = df[date_cols].dropna()
+        check_in = pd.to_datetime(dated["check_in_date"])
+        stays = (pd.to_datetime(dated["check_out_date"]) - check_in).dt.days
+        windows = (check_in - pd.to_datetime(dated["booking_date"])).dt.days
+        if len(dated):
+            stay_min = max(1, min(stay_min, int(stays.min())))
+            stay_max = max(stay_max, int(stays.max()))
+            window_min = max(0, min(window_min, int(windows.min())))
+            window_max = max(window_max, int(windows.max()))
+    if stay_range is not None:
+        stay_min = max(1, min(stay_min, stay_range[0]))
+        stay_max = max(stay_max, stay_range[1])
+    if window_range is not None:
+        window_min = max(0, min(window_min, window_range[0]))
+        window_max = max(window_max, window_range[1])
+
+    key_shape = (7, stay_max - stay_min + 1, window_max - window_min + 1)
+    cells_per_key = int(np.prod(key_shape))
+    if not keys or len(keys) * cells_per_key > max_cells:
+        return None
+
+    cities = sorted({k[0] for k in keys})
+    names = sorted({k[1] for k in keys})
+    city_code = {city: i for i, city in enumerate(cities)}
+    name_code = {name: i for i, name in enumerate(names)}
+    key_city_codes = np.array([city_code[k[0]] for k in keys], dtype=np.int64)
+    key_name_codes = np.array([name_code[k[1]] for k in keys], dtype=np.int64)
+    key_base_prices = np.array([k[2] for k in keys], dtype=np.float64)
+    key_capacities = np.array([k[3] for k in keys], dtype=np.float64)
+
+    # Whole keys per chunk; the in-key axes are the same for every chunk
+    keys_per_chunk = max(1, chunk_rows // cells_per_key)
+    weekday, stay_idx, window_idx = (idx.reshape(-1) for idx in np.indices(key_shape))
+    encoder = FeatureEncoder(feature_columns, categories)
+    buffer = np.empty((keys_per_chunk * cells_per_key, encoder.n_features), dtype=np.float32)
+
+    prices = np.empty((len(keys),) + key_shape, dtype=np.float64)
+    for start in range(0, len(keys), keys_per_chunk):
+        chunk = np.arange(start, min(start + keys_per_chunk, len(keys)))
+        key_idx = np.repeat(chunk, cells_per_key)
+        n = key_idx.shape[0]
+        X = encoder.encode_arrays(
+            city_names=cities,
+            city_codes=key_city_codes[key_idx],
+            room_type_names=names,
+            room_type_codes=key_name_codes[key_idx],
+            base_prices=key_base_prices[key_idx],
+            room_capacities=key_capacities[key_idx],
+            check_in_weekdays=np.tile(weekday, len(chunk)),
+            stay_lengths=np.tile(stay_idx + stay_min, len(chunk)).astype(np.float64),
+            booking_windows=np.tile(window_idx + window_min, len(chunk)).astype(np.float64),
+            out=buffer[:n],
+        )
+        prices[chunk] = np.asarray(model.predict(X), dtype=np.float64).reshape((len(chunk),) + key_shape)
+
+    return PriceTable(
+        keys=keys,
+        stay_range=(stay_min, stay_max),
+        window_range=(window_min, window_max),
+        prices=prices,
+    )
+
+
+def main():
+    """Compile the price table for the flat models directory without retraining."""
+    import pandas as pd
+
+    from app.ml.data_prep import load_booking_data, load_room_catalog
+    from app.ml.encoder import load_categories
+    from app.ml.predict import MODELS_DIR, _load_sklearn_model
+
+    model, feature_columns = _load_sklearn_model(MODELS_DIR)
+    domain = pd.concat([load_booking_data(), load_room_catalog()], ignore_index=True)
+
+    table = compile_price_table(model, feature_columns, domain, load_categories(MODELS_DIR))
+    if table is None:
+        print(f"Price table would exceed {PRICE_TABLE_MAX_CELLS} cells; not compiled")
+        return
+    path = os.path.join(MODELS_DIR, PRICE_TABLE_FILENAME)
+    table.save(path)
+    print(f"Price table with {table.prices.size} cells saved to: {path}")
+
+
+if __name__ == "__main__":
+    main()
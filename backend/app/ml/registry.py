@@ -0,0 +1,182 @@
+"""
+Versioned model registry.
+
+Layout:
+    registry/versions/<version>/   one immutable directory per trained model
+    registry/CURRENT               name of the active version
+    registry/HISTORY               every activation, oldest first (for rollback)
+
+Versions are assembled in a staging directory and renamed into place, and
+CURRENT is replaced atomically, so a reader never sees a half-written model.
+"""
+
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from typing import List
+
+
+REGISTRY_DIR = os.path.join("app", "ml", "models", "registry")
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILENAME = "CURRENT"
+HISTORY_FILENAME = "HISTORY"
+METADATA_FILENAME = "metadata.json"
+
+
+def _versions_dir(registry_dir: str) -> str:
+    return os.path.join(registry_dir, VERSIONS_DIRNAME)
+
+
+def version_path(version: str, registry_dir: str = REGISTRY_DIR) -> str:
+    return os.path.join(_versions_dir(registry_dir), version)
+
+
+def create_staging_dir(registry_dir: str = REGISTRY_DIR) -> str:
+    """Empty directory to write a new model's artifacts into before publishing."""
+    staging = os.path.join(registry_dir, f".staging-{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    return staging
+
+
+def publish_version(
+    staging_dir: str,
+    metadata: dict | None = None,
+    registry_dir: str = REGISTRY_DIR,
+) -> str:
+    """Move a fully written staging directory into the registry; returns the version."""
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+    metadata = dict(metadata or {})
+    metadata["version"] = version
+    metadata["created_at"] = datetime.now(timezone.utc).isoformat()
+    with open(os.path.join(staging_dir, METADATA_FILENAME), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    os.makedirs(_versions_dir(registry_dir), exist_ok=True)
+    os.rename(staging_dir, version_path(version, registry_dir))
+    return version
+
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def get_current_version(registry_dir: str = REGISTRY_DIR) -> str | None:
+    try:
+        with open(os.path.join(registry_dir, CURRENT_FILENAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _read_history(registry_dir: str) -> List[str]:
+    try:
+        with open(os.path.join(registry_dir, HISTORY_FILENAME)) as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def activate_version(version: str, registry_dir: str = REGISTRY_DIR) -> None:
+    """Point CURRENT at `version`. Raises KeyError for unknown versions."""
+    versions_dir = _versions_dir(registry_dir)
+    if not os.path.isdir(versions_dir) or version not in os.listdir(versions_dir):
+        raise KeyError(version)
+
+    history = _read_history(registry_dir)
+    history.append(version)
+    _write_atomic(os.path.join(registry_dir, HISTORY_FILENAME), "\n".join(history) + "\n")
+    _write_atomic(os.path.join(registry_dir, CURRENT_FILENAME), version + "\n")
+
+
+def rollback(registry_dir: str = REGISTRY_DIR) -> str:
+    """
+    Re-activate the version that was active before the current one.
+    Raises LookupError when there is nothing to roll back to.
+    """
+    current = get_current_version(registry_dir)
+    history = _read_history(registry_dir)
+
+    # Walk back past the current activation to the previous distinct version
+    for version in reversed(history):
+        if version != current and os.path.isdir(version_path(version, registry_dir)):
+            # Drop the rolled-back activation so repeated rollbacks keep going back
+            while history and history[-1] != version:
+                history.pop()
+            _write_atomic(
+                os.path.join(registry_dir, HISTORY_FILENAME), "\n".join(history) + "\n"
+            )
+            _write_atomic(os.path.join(registry_dir, CURRENT_FILENAME), version + "\n")
+            return version
+
+    raise LookupError("No previous model version to roll back to")
+
+
+def list_versions(registry_dir: str = REGISTRY_DIR) -> List[dict]:
+    """Metadata of every published version, newest first."""
+    versions_dir = _versions_dir(registry_dir)
+    if not os.path.isdir(versions_dir):
+        return []
+
+    current = get_current_version(registry_dir)
+    versions = []
+    for version in sorted(os.listdir(versions_dir), reverse=True):
+        metadata_path = os.path.join(versions_dir, version, METADATA_FILENAME)
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            continue
+        metadata["active"] = version == current
+        versions.append(metadata)
+    return versions
+
+
+def import_legacy(models_dir: str, registry_dir: str = REGISTRY_DIR) -> str:
+    """Copy the flat pre-registry model directory into a new registry version."""
+    staging = create_staging_dir(registry_dir)
+    for name in os.listdir(models_dir):
+        src = os.path.join(models_dir, name)
+        if name == os.path.basename(registry_dir):
+            continue
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(staging, name))
+        else:
+            shutil.copy2(src, os.path.join(staging, name))
+    return publish_version(staging, {"source": "legacy import"}, registry_dir)
+
+
+def main(argv: List[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else "list"
+
+    if command == "list":
+        for v in list_versions():
+            marker = "*" if v["active"] else " "
+            print(f"{marker} {v['version']}  created {v['created_at']}")
+    elif command == "activate" and len(argv) == 2:
+        activate_version(argv[1])
+        print(f"Activated {argv[1]}")
+    elif command == "rollback":
+        print(f"Rolled back to {rollback()}")
+    elif command == "import-legacy":
+        from app.ml.predict import MODELS_DIR
+
+        version = import_legacy(MODELS_DIR)
+        activate_version(version)
+        print(f"Imported {MODELS_DIR} as {version} and activated it")
+    else:
+        print("Usage: python -m app.ml.registry [list | activate <version> | rollback | import-legacy]")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
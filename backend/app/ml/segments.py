@@ -0,0 +1,311 @@
+"""
+Per-hotel / per-city segment models.
+
+A segmented registry version holds the global model at its root (the
+fallback) plus one model directory per segment:
+
+    versions/<version>/segments/index.json        segment keys, routing maps, fingerprints
+    versions/<version>/segments/<key>/            price_model.pkl, feature_columns.pkl, price_forest/
+
+Segments are trained in parallel in a process pool. A segment whose
+fingerprint (its confirmed bookings plus its slice of the catalog) matches
+the one in the active version is not retrained; its directory is
+hard-linked into the new version instead. When nothing changed, no
+version is published at all.
+
+Publishing a new global model (model_train) carries the active version's
+segments forward, so routing survives a global retrain.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from app.ml import registry
+
+
+SEGMENTS_DIRNAME = "segments"
+INDEX_FILENAME = "index.json"
+SEGMENT_BY = ("hotel", "city")
+
+# Process pool size; each worker fits single-threaded
+SEGMENT_TRAIN_WORKERS = int(os.getenv("SEGMENT_TRAIN_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Segments with fewer confirmed bookings than this use the global model
+MIN_SEGMENT_ROWS = int(os.getenv("MIN_SEGMENT_ROWS", "50"))
+
+# Part of the fingerprint, so changing them retrains every segment
+SEGMENT_MODEL_PARAMS = {"n_estimators": 100, "max_depth": None, "random_state": 42}
+
+
+def segment_key(by: str, value) -> str:
+    if by == "hotel":
+        return f"hotel-{int(value)}"
+    return "city-" + re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-")
+
+
+def load_segment_index(version_dir: str) -> dict | None:
+    """The segment index of a registry version, None for unsegmented versions."""
+    try:
+        with open(os.path.join(version_dir, SEGMENTS_DIRNAME, INDEX_FILENAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ---------- planning ----------
+
+def _segment_stats(by: str) -> Dict[str, dict]:
+    """
+    Segment key -> hotel ids, city and fingerprint, for every segment with
+    confirmed bookings. One aggregate query plus the room catalog.
+    """
+    from app.database import engine
+    from app.ml.data_prep import BOOKING_JOIN, load_room_catalog
+
+    with engine.connect() as conn:
+        per_hotel = conn.execute(
+            text(
+                "SELECT b.hotel_id, h.city, COUNT(*), MIN(b.id), MAX(b.id), SUM(b.price_sold)"
+                + BOOKING_JOIN
+                + " WHERE b.status = 'confirmed' GROUP BY b.hotel_id, h.city ORDER BY b.hotel_id"
+            )
+        ).all()
+    catalog = load_room_catalog().sort_values("room_type_id")
+
+    segments: Dict[str, dict] = {}
+    for hotel_id, city, n_rows, min_id, max_id, price_sum in per_hotel:
+        key = segment_key(by, hotel_id if by == "hotel" else city)
+        segment = segments.setdefault(
+            key, {"hotel_ids": [], "city": city, "rows": 0, "bookings": [], "catalog": []}
+        )
+        segment["hotel_ids"].append(int(hotel_id))
+        segment["rows"] += int(n_rows)
+        segment["bookings"].append([int(hotel_id), int(n_rows), int(min_id), int(max_id), round(float(price_sum), 4)])
+        rooms = catalog[catalog["hotel_id"] == hotel_id]
+        segment["catalog"].extend(
+            rooms[["room_type_id", "room_type_name", "room_capacity", "base_price"]].values.tolist()
+        )
+
+    for segment in segments.values():
+        payload = json.dumps(
+            {"bookings": segment.pop("bookings"), "catalog": segment.pop("catalog"), "params": SEGMENT_MODEL_PARAMS},
+            sort_keys=True,
+            default=str,
+        )
+        segment["fingerprint"] = hashlib.sha256(payload.encode()).hexdigest()
+    return segments
+
+
+# ---------- training (runs in worker processes) ----------
+
+def _train_segment(key: str, hotel_ids: List[int], out_dir: str) -> dict:
+    """Fit one segment's model and write its artifacts to `out_dir`."""
+    # Training-only imports; the serving path imports this module for the index helpers
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import train_test_split
+
+    from app.ml.data_prep import load_booking_data
+    from app.ml.forest import FOREST_DIRNAME, FlatForest
+    from app.ml.model_train import engineer_features
+
+    start = time.perf_counter()
+    df = load_booking_data(status="confirmed", hotel_ids=hotel_ids)
+    X, y, feature_columns = engineer_features(df)
+    loaded = time.perf_counter()
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = RandomForestRegressor(**SEGMENT_MODEL_PARAMS, n_jobs=1)
+    model.fit(X_train, y_train)
+    mae = float(mean_absolute_error(y_test, model.predict(X_test)))
+    fitted = time.perf_counter()
+
+    os.makedirs(out_dir)
+    joblib.dump(model, os.path.join(out_dir, "price_model.pkl"))
+    joblib.dump(feature_columns, os.path.join(out_dir, "feature_columns.pkl"))
+    FlatForest.from_sklearn(model, feature_columns).save(os.path.join(out_dir, FOREST_DIRNAME))
+
+    return {
+        "key": key,
+        "rows": int(X.shape[0]),
+        "mae": mae,
+        "load_seconds": loaded - start,
+        "fit_seconds": fitted - loaded,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _link_file(src: str, dst: str) -> None:
+    # Registry versions are immutable, so sharing inodes between them is safe
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _link_tree(src: str, dst: str) -> None:
+    """Copy a directory of immutable artifacts, hard-linking files where possible."""
+    shutil.copytree(src, dst, copy_function=_link_file)
+
+
+def carry_forward_segments(staging_dir: str) -> dict:
+    """
+    Link the active version's segments into a new (global model) staging
+    directory. Returns the metadata entries describing them, {} when the
+    active version is not segmented.
+    """
+    current = registry.get_current_version()
+    if current is None:
+        return {}
+    current_dir = registry.version_path(current)
+    index = load_segment_index(current_dir)
+    if index is None:
+        return {}
+    _link_tree(os.path.join(current_dir, SEGMENTS_DIRNAME), os.path.join(staging_dir, SEGMENTS_DIRNAME))
+    return {"segmented_by": index["by"], "segments": len(index["segments"])}
+
+
+def train_segments(
+    by: str = "hotel",
+    workers: int = SEGMENT_TRAIN_WORKERS,
+    force: bool = False,
+) -> str:
+    """
+    Train (or reuse) one model per segment and publish them, together with
+    the active global model, as a new registry version. Returns the version,
+    which is the active one when no segment changed.
+    """
+    if by not in SEGMENT_BY:
+        raise ValueError(f"Unknown segmentation {by!r}; expected one of {SEGMENT_BY}")
+
+    current = registry.get_current_version()
+    if current is None:
+        # Segments need a global model to fall back on
+        from app.ml.model_train import train_price_model
+
+        print("No active model; training the global model first...")
+        train_price_model()
+        current = registry.get_current_version()
+    current_dir = registry.version_path(current)
+    previous = load_segment_index(current_dir)
+    previous_segments = previous["segments"] if previous is not None and previous.get("by") == by else {}
+
+    planned = _segment_stats(by)
+    to_train = {}
+    unchanged = []
+    index_segments = {}
+    report = []
+    for key, segment in planned.items():
+        if segment["rows"] < MIN_SEGMENT_ROWS:
+            report.append({"key": key, "status": "too small", "rows": segment["rows"]})
+            continue
+        old = previous_segments.get(key)
+        old_dir = os.path.join(current_dir, SEGMENTS_DIRNAME, key)
+        if not force and old and old["fingerprint"] == segment["fingerprint"] and os.path.isdir(old_dir):
+            unchanged.append(key)
+            index_segments[key] = dict(old)
+            report.append({"key": key, "status": "unchanged", "rows": segment["rows"]})
+        else:
+            to_train[key] = segment
+
+    if not to_train and previous_segments and index_segments == previous_segments:
+        # A new version would only trigger reloads and cache / rate grid invalidation
+        print(f"All {len(index_segments)} segments unchanged; version {current} stays active.")
+        return current
+
+    staging = registry.create_staging_dir()
+    # The global model carries over unchanged
+    for name in os.listdir(current_dir):
+        if name in (SEGMENTS_DIRNAME, registry.METADATA_FILENAME):
+            continue
+        src = os.path.join(current_dir, name)
+        if os.path.isdir(src):
+            _link_tree(src, os.path.join(staging, name))
+        else:
+            _link_file(src, os.path.join(staging, name))
+    segments_dir = os.path.join(staging, SEGMENTS_DIRNAME)
+    os.makedirs(segments_dir)
+    for key in unchanged:
+        _link_tree(os.path.join(current_dir, SEGMENTS_DIRNAME, key), os.path.join(segments_dir, key))
+
+    start = time.perf_counter()
+    if to_train:
+        # spawn: workers must not inherit the parent's database connections
+        with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=get_context("spawn")) as pool:
+            futures = {
+                pool.submit(_train_segment, key, segment["hotel_ids"], os.path.join(segments_dir, key)): key
+                for key, segment in to_train.items()
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                key = result["key"]
+                segment = to_train[key]
+                index_segments[key] = {
+                    "hotel_ids": segment["hotel_ids"],
+                    "city": segment["city"],
+                    "fingerprint": segment["fingerprint"],
+                    "rows": result["rows"],
+                    "mae": result["mae"],
+                }
+                report.append({**result, "status": "trained"})
+    elapsed = time.perf_counter() - start
+
+    index = {
+        "by": by,
+        "segments": index_segments,
+        "hotels": {str(h): key for key, s in index_segments.items() for h in s["hotel_ids"]},
+        "cities": {s["city"]: key for key, s in index_segments.items()} if by == "city" else {},
+    }
+    with open(os.path.join(segments_dir, INDEX_FILENAME), "w") as f:
+        json.dump(index, f, indent=2)
+
+    with open(os.path.join(current_dir, registry.METADATA_FILENAME)) as f:
+        metadata = json.load(f)
+    metadata = {k: v for k, v in metadata.items() if k not in ("version", "created_at")}
+    metadata.update(
+        segmented_by=by,
+        segments=len(index_segments),
+        segments_trained=len(to_train),
+        global_version=metadata.get("global_version", current),
+    )
+    version = registry.publish_version(staging, metadata=metadata)
+    registry.activate_version(version)
+
+    print(f"\n{'segment':<28} {'status':<10} {'rows':>8} {'load s':>8} {'fit s':>8} {'MAE':>8}")
+    for r in sorted(report, key=lambda r: r["key"]):
+        if r["status"] == "trained":
+            print(
+                f"{r['key']:<28} {r['status']:<10} {r['rows']:>8} "
+                f"{r['load_seconds']:>8.2f} {r['fit_seconds']:>8.2f} {r['mae']:>8.2f}"
+            )
+        else:
+            print(f"{r['key']:<28} {r['status']:<10} {r['rows']:>8}")
+    print(
+        f"\nTrained {len(to_train)} of {len(planned)} segments in {elapsed:.2f}s "
+        f"with {workers} workers; version {version} activated."
+    )
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train per-hotel or per-city segment models.")
+    parser.add_argument("--by", choices=SEGMENT_BY, default="hotel")
+    parser.add_argument("--workers", type=int, default=SEGMENT_TRAIN_WORKERS)
+    parser.add_argument("--force", action="store_true", help="retrain unchanged segments too")
+    args = parser.parse_args()
+    train_segments(by=args.by, workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
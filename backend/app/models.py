@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -45,3 +45,58 @@ class Booking(Base):
 
     hotel = relationship("Hotel", back_populates="bookings")
     room_type = relationship("RoomType", back_populates="bookings")
+
+    # Existing databases get these through app/migrations.py
+    __table_args__ = (
+        Index("ix_bookings_hotel_id_check_in_date", "hotel_id", "check_in_date"),
+        Index("ix_bookings_room_type_id_check_in_date", "room_type_id", "check_in_date"),
+        Index("ix_bookings_status", "status"),
+        Index("ix_bookings_booking_date_id", "booking_date", "id"),
+    )
+
+
+class DailyOccupancy(Base):
+    """
+    Per-night demand for one room type, maintained incrementally from
+    bookings (see app/occupancy.py). One booking contributes to every night
+    from check_in_date up to, not including, check_out_date.
+    """
+    __tablename__ = "daily_occupancy"
+
+    hotel_id = Column(Integer, ForeignKey("hotels.id"), primary_key=True)
+    room_type_id = Column(Integer, ForeignKey("room_types.id"), primary_key=True)
+    stay_date = Column(Date, primary_key=True)
+
+    # Bookings holding the night (not cancelled / no-show) and their revenue
+    rooms_booked = Column(Integer, nullable=False, default=0)
+    room_revenue = Column(Float, nullable=False, default=0.0)
+    # Nights released by cancelled / no-show bookings
+    cancellations = Column(Integer, nullable=False, default=0)
+    # Pace: rooms already on the books 7 / 14 / 30 days before the night
+    on_books_7d = Column(Integer, nullable=False, default=0)
+    on_books_14d = Column(Integer, nullable=False, default=0)
+    on_books_30d = Column(Integer, nullable=False, default=0)
+
+
+class RateGrid(Base):
+    """
+    Precomputed recommendations for every room type x check-in date x stay
+    length in the pricing horizon, filled by the sweep in app/rate_grid.py.
+    The key starts with (hotel_id, stay_date), so a hotel's calendar is
+    one primary-key range read.
+    """
+    __tablename__ = "rate_grid"
+
+    hotel_id = Column(Integer, ForeignKey("hotels.id"), primary_key=True)
+    stay_date = Column(Date, primary_key=True)
+    room_type_id = Column(Integer, ForeignKey("room_types.id"), primary_key=True)
+    stay_length = Column(Integer, primary_key=True)
+
+    model_price = Column(Float, nullable=False)
+    recommended_price = Column(Float, nullable=False)
+
+    # Inputs the cell was computed from; a mismatch marks it stale
+    base_price = Column(Float, nullable=False)
+    model_version = Column(String, nullable=False)
+    rooms_booked = Column(Integer, nullable=False, default=0)
+    computed_at = Column(String, nullable=False)
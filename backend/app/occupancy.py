@@ -0,0 +1,265 @@
+"""
+Daily occupancy and booking-pace aggregates.
+
+The daily_occupancy table holds one row per (hotel, room type, night) with
+the rooms on the books for that night, their revenue, released
+(cancelled / no-show) nights and the pace counters. Writers keep it in step
+with bookings, inside the same transaction as the booking change:
+
+- create_booking and bulk imports add the booking's nights,
+- a status change moves the nights between held and released,
+- rebuild_occupancy recomputes the whole table from bookings.
+
+Every writer turns its bookings into per-night deltas with NumPy and
+applies them with one executemany upsert (`col = col + delta`), so
+concurrent writers never overwrite each other. Readers get a night with a
+primary-key lookup instead of aggregating bookings.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import dialect_insert
+
+
+# Statuses whose nights are released rather than held
+RELEASED_STATUSES = ("cancelled", "no-show")
+
+# Lead times (days before the night) with an on-the-books counter
+PACE_LEADS = (7, 14, 30)
+
+COUNTER_COLUMNS = (
+    "rooms_booked",
+    "room_revenue",
+    "cancellations",
+    *(f"on_books_{lead}d" for lead in PACE_LEADS),
+)
+
+# Bookings read per chunk by rebuild_occupancy
+REBUILD_CHUNK_ROWS = 200_000
+
+_table = models.DailyOccupancy.__table__
+
+
+@dataclass(frozen=True)
+class NightDemand:
+    rooms_booked: int = 0
+    room_revenue: float = 0.0
+    cancellations: int = 0
+    on_books_7d: int = 0
+    on_books_14d: int = 0
+    on_books_30d: int = 0
+
+    @property
+    def adr(self) -> float:
+        """Average daily rate of the rooms on the books (0 when none)."""
+        return self.room_revenue / self.rooms_booked if self.rooms_booked else 0.0
+
+    @property
+    def cancellation_rate(self) -> float:
+        total = self.rooms_booked + self.cancellations
+        return self.cancellations / total if total else 0.0
+
+
+# ---------- deltas ----------
+
+def _booking_columns(bookings: Iterable[Mapping]) -> Dict[str, np.ndarray]:
+    """Booking dicts (BookingCreate fields) -> the column arrays night_deltas takes."""
+    rows = list(bookings)
+    return {
+        "hotel_id": np.array([b["hotel_id"] for b in rows], dtype=np.int64),
+        "room_type_id": np.array([b["room_type_id"] for b in rows], dtype=np.int64),
+        "booking_date": np.array([b["booking_date"] for b in rows], dtype="datetime64[D]"),
+        "check_in_date": np.array([b["check_in_date"] for b in rows], dtype="datetime64[D]"),
+        "check_out_date": np.array([b["check_out_date"] for b in rows], dtype="datetime64[D]"),
+        "status": np.array([b["status"] for b in rows], dtype=object),
+        "price_sold": np.array([b["price_sold"] for b in rows], dtype=np.float64),
+    }
+
+
+def booking_row(booking: models.Booking) -> dict:
+    """The fields of an ORM booking that occupancy depends on."""
+    return {
+        "hotel_id": booking.hotel_id,
+        "room_type_id": booking.room_type_id,
+        "booking_date": booking.booking_date,
+        "check_in_date": booking.check_in_date,
+        "check_out_date": booking.check_out_date,
+        "status": booking.status,
+        "price_sold": booking.price_sold,
+    }
+
+
+def night_deltas(columns: Mapping[str, np.ndarray], sign: int = 1) -> Dict[str, np.ndarray]:
+    """
+    Per-night counter deltas for a set of bookings, summed per
+    (room type, night). `columns` holds hotel_id, room_type_id, the three
+    dates as datetime64[D], status (strings) and price_sold. With sign=-1
+    the deltas remove the bookings again.
+    """
+    check_in = columns["check_in_date"].astype("datetime64[D]")
+    nights = np.maximum((columns["check_out_date"].astype("datetime64[D]") - check_in).astype(np.int64), 0)
+
+    # One entry per booked night
+    booking = np.repeat(np.arange(nights.shape[0]), nights)
+    night_index = np.arange(booking.shape[0]) - np.repeat(np.cumsum(nights) - nights, nights)
+    stay_day = check_in[booking].astype(np.int64) + night_index
+    room_type_id = np.asarray(columns["room_type_id"], dtype=np.int64)[booking]
+    held = ~np.isin(np.asarray(columns["status"], dtype=object), RELEASED_STATUSES)[booking]
+    lead = stay_day - columns["booking_date"].astype("datetime64[D]").astype(np.int64)[booking]
+
+    # A room type belongs to one hotel, so (room type, day) is the key. Days
+    # are packed relative to the earliest one, so pre-1970 (negative) days work
+    first_day = int(stay_day.min()) if stay_day.shape[0] else 0
+    keys, inverse = np.unique((room_type_id << 24) | (stay_day - first_day), return_inverse=True)
+    hotel_id = np.empty(keys.shape[0], dtype=np.int64)
+    hotel_id[inverse] = np.asarray(columns["hotel_id"], dtype=np.int64)[booking]
+
+    def total(weights: np.ndarray) -> np.ndarray:
+        return np.bincount(inverse, weights=weights, minlength=keys.shape[0]) * sign
+
+    deltas = {
+        "hotel_id": hotel_id,
+        "room_type_id": keys >> 24,
+        "stay_date": ((keys & 0xFFFFFF) + first_day).astype("datetime64[D]"),
+        "rooms_booked": total(held.astype(np.float64)),
+        "room_revenue": total(np.where(held, np.asarray(columns["price_sold"], np.float64)[booking], 0.0)),
+        "cancellations": total((~held).astype(np.float64)),
+    }
+    for pace_lead in PACE_LEADS:
+        deltas[f"on_books_{pace_lead}d"] = total((held & (lead >= pace_lead)).astype(np.float64))
+    return deltas
+
+
+def _upsert_statement(dialect_name: str):
+    stmt = dialect_insert(dialect_name)(_table)
+    return stmt.on_conflict_do_update(
+        index_elements=["hotel_id", "room_type_id", "stay_date"],
+        set_={col: _table.c[col] + stmt.excluded[col] for col in COUNTER_COLUMNS},
+    )
+
+
+def apply_deltas(db: Session | Connection, deltas: Mapping[str, np.ndarray]) -> int:
+    """Add `deltas` to daily_occupancy in the caller's transaction; returns the nights touched."""
+    n = int(deltas["stay_date"].shape[0])
+    if n == 0:
+        return 0
+    counters = [
+        deltas[col].tolist() if col == "room_revenue" else np.rint(deltas[col]).astype(np.int64).tolist()
+        for col in COUNTER_COLUMNS
+    ]
+    names = ("hotel_id", "room_type_id", "stay_date") + COUNTER_COLUMNS
+    rows = [
+        dict(zip(names, values))
+        for values in zip(
+            deltas["hotel_id"].tolist(),
+            deltas["room_type_id"].tolist(),
+            deltas["stay_date"].astype(object).tolist(),
+            *counters,
+        )
+    ]
+    dialect = db.dialect if isinstance(db, Connection) else db.get_bind().dialect
+    db.execute(_upsert_statement(dialect.name), rows)
+    return n
+
+
+def add_bookings(db: Session | Connection, bookings: Iterable[Mapping]) -> int:
+    """Count newly inserted bookings (BookingCreate dicts) in their nights."""
+    return apply_deltas(db, night_deltas(_booking_columns(bookings)))
+
+
+def change_status(db: Session, booking: Mapping, new_status: str) -> int:
+    """Move a booking's nights from its current status to `new_status`."""
+    old = _booking_columns([booking])
+    new = dict(old, status=np.array([new_status], dtype=object))
+    removed, added = night_deltas(old, sign=-1), night_deltas(new)
+    # Same nights on both sides, so the keys line up
+    combined = dict(added)
+    for col in COUNTER_COLUMNS:
+        combined[col] = added[col] + removed[col]
+    return apply_deltas(db, combined)
+
+
+# ---------- reads ----------
+
+def night_demand(db: Session, hotel_id: int, room_type_id: int, stay_date: date) -> NightDemand:
+    """Demand for one night: a primary-key lookup, zeros when nothing is booked."""
+    row = db.get(models.DailyOccupancy, (hotel_id, room_type_id, stay_date))
+    if row is None:
+        return NightDemand()
+    return NightDemand(**{col: getattr(row, col) for col in COUNTER_COLUMNS})
+
+
+async def night_demand_async(db: AsyncSession, hotel_id: int, room_type_id: int, stay_date: date) -> NightDemand:
+    row = await db.get(models.DailyOccupancy, (hotel_id, room_type_id, stay_date))
+    if row is None:
+        return NightDemand()
+    return NightDemand(**{col: getattr(row, col) for col in COUNTER_COLUMNS})
+
+
+# ---------- rebuild ----------
+
+def rebuild_occupancy(db: Session | Connection, chunk_rows: int = REBUILD_CHUNK_ROWS) -> int:
+    """
+    Recompute daily_occupancy from all bookings in the caller's transaction,
+    reading bookings in id order `chunk_rows` at a time. Returns the number
+    of bookings read.
+    """
+    db.execute(delete(_table))
+    booking = models.Booking.__table__
+    columns = ("id", "hotel_id", "room_type_id", "booking_date", "check_in_date",
+               "check_out_date", "status", "price_sold")
+    query = (
+        select(*(booking.c[col] for col in columns))
+        .where(booking.c.id > bindparam("after"))
+        .order_by(booking.c.id)
+        .limit(chunk_rows)
+    )
+    after, n_read = 0, 0
+    while True:
+        rows = db.execute(query, {"after": after}).all()
+        if not rows:
+            return n_read
+        chunk = dict(zip(columns, zip(*rows)))
+        apply_deltas(db, night_deltas({
+            "hotel_id": np.array(chunk["hotel_id"], dtype=np.int64),
+            "room_type_id": np.array(chunk["room_type_id"], dtype=np.int64),
+            "booking_date": np.array(chunk["booking_date"], dtype="datetime64[D]"),
+            "check_in_date": np.array(chunk["check_in_date"], dtype="datetime64[D]"),
+            "check_out_date": np.array(chunk["check_out_date"], dtype="datetime64[D]"),
+            "status": np.array(chunk["status"], dtype=object),
+            "price_sold": np.array(chunk["price_sold"], dtype=np.float64),
+        }))
+        after = chunk["id"][-1]
+        n_read += len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily occupancy / pace table from bookings.")
+    parser.add_argument("--chunk-rows", type=int, default=REBUILD_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, engine
+    from app.migrations import init_schema
+
+    init_schema(engine)
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        n_read = rebuild_occupancy(db, chunk_rows=args.chunk_rows)
+        db.commit()
+        nights = db.query(models.DailyOccupancy).count()
+    print(f"Rebuilt {nights} nights from {n_read} bookings in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
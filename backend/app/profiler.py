@@ -0,0 +1,180 @@
+"""
+Opt-in sampling profiler with per-endpoint stacks.
+
+With PROFILER_ENABLED=1 a daemon thread wakes every PROFILER_INTERVAL_MS
+and reads every thread's current stack (sys._current_frames). A stack that
+passes through a route's endpoint function counts as one sample for that
+route. Attribution comes from the stack itself, so the request path does
+no extra work, and with the profiler off nothing runs at all.
+
+Work handed to the inference pool (model calls, micro-batches) runs on
+threads whose stacks never pass through an endpoint. While the profiler
+runs, the pool tags such jobs with the submitting route (caller_route /
+attributed), and those stacks are counted under that route, rooted at
+"(inference pool)". A micro-batch is counted under the route of its first
+row.
+
+Being a Python thread, the sampler only runs when it gets the GIL, so busy
+CPU-bound requests are sampled less often than the interval suggests.
+
+Samples are aggregated in the collapsed "frame;frame;frame count" format
+read by flamegraph.pl, speedscope and inferno, rooted at the endpoint.
+They are written to PROFILER_DIR/<route>.collapsed on shutdown or on demand.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from types import CodeType, FrameType
+from typing import Dict, Iterator, List
+
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_DIR = os.getenv("PROFILER_DIR", "profiles")
+
+# Deeper stacks are cut at the leaf end
+MAX_STACK_DEPTH = 128
+
+# Root frame of stacks attributed to a route from another thread
+POOL_ROOT_LABEL = "(inference pool)"
+
+
+class SamplingProfiler:
+    def __init__(self, interval_ms: float = PROFILER_INTERVAL_MS, output_dir: str = PROFILER_DIR):
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.samples = 0
+        self._endpoints: Dict[CodeType, str] = {}
+        self._labels: Dict[CodeType, str] = {}
+        self._stacks: Dict[str, Counter] = {}
+        # Thread id -> route of the job that thread is running for
+        self._thread_routes: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, endpoints: Dict[CodeType, str]) -> None:
+        """Start sampling; `endpoints` maps endpoint function code objects to route labels."""
+        if self.running:
+            return
+        self._endpoints = dict(endpoints)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._sample(frame, self._thread_routes.get(thread_id))
+
+    def _sample(self, frame: FrameType, thread_route: str | None = None) -> None:
+        # Walk leaf -> root until we hit an endpoint function
+        labels: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+            labels.append(label)
+            route = self._endpoints.get(code)
+            if route is not None:
+                self._record(route, reversed(labels[-MAX_STACK_DEPTH:]))
+                return
+            frame = frame.f_back
+        if thread_route is not None:
+            self._record(thread_route, [POOL_ROOT_LABEL, *reversed(labels[-MAX_STACK_DEPTH:])])
+
+    def _record(self, route: str, labels) -> None:
+        stack = ";".join(labels)
+        with self._lock:
+            self._stacks.setdefault(route, Counter())[stack] += 1
+            self.samples += 1
+
+    def caller_route(self) -> str | None:
+        """The route whose endpoint is on the calling thread's stack (None when not running)."""
+        if not self.running:
+            return None
+        frame = sys._getframe(1)
+        while frame is not None:
+            route = self._endpoints.get(frame.f_code)
+            if route is not None:
+                return route
+            frame = frame.f_back
+        return None
+
+    @contextmanager
+    def attributed(self, route: str | None) -> Iterator[None]:
+        """Count this thread's samples under `route` for the duration of the block."""
+        if route is None:
+            yield
+            return
+        thread_id = threading.get_ident()
+        previous = self._thread_routes.get(thread_id)
+        self._thread_routes[thread_id] = route
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._thread_routes.pop(thread_id, None)
+            else:
+                self._thread_routes[thread_id] = previous
+
+    def collapsed(self, route: str | None = None) -> str:
+        """Collapsed stacks, each prefixed with its route (or only `route`'s)."""
+        with self._lock:
+            stacks = {r: Counter(c) for r, c in self._stacks.items() if route in (None, r)}
+        return "".join(
+            f"{r};{stack} {count}\n"
+            for r, counter in sorted(stacks.items())
+            for stack, count in counter.most_common()
+        )
+
+    def dump(self) -> List[str]:
+        """Write one <route>.collapsed file per sampled route; returns the paths."""
+        with self._lock:
+            routes = list(self._stacks)
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+        for route in routes:
+            name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+            path = os.path.join(self.output_dir, f"{name}.collapsed")
+            with open(path, "w") as f:
+                f.write(self.collapsed(route))
+            paths.append(path)
+        return paths
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+
+profiler = SamplingProfiler()
+
+
+def endpoint_codes(routes) -> Dict[CodeType, str]:
+    """Endpoint code object -> "METHOD /path" label for every API route."""
+    codes = {}
+    for route in routes:
+        endpoint = getattr(route, "endpoint", None)
+        code = getattr(endpoint, "__code__", None)
+        if code is None:
+            continue
+        methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+        codes[code] = f"{methods} {route.path}".strip()
+    return codes
@@ -0,0 +1,302 @@
+"""
+Precomputed portfolio rate grid.
+
+The rate_grid table stores the recommendation for every hotel x room type x
+check-in date in the next RATE_GRID_DAYS days x stay length in
+RATE_GRID_STAY_LENGTHS. The booking window is fixed at
+RATE_GRID_BOOKING_WINDOW, the same default as the batch endpoint. That
+keeps a cell's inputs stable from one day to the next. The grid endpoint
+serves a hotel's calendar from the table with one range read on its
+primary key.
+
+sweep_rate_grid brings the table up to date, one hotel at a time. It
+compares the stored cells with their current inputs and recomputes only
+what changed:
+
+- every cell of a room type when the served model version or the room
+  type's base_price differs from the one the cell was computed with,
+- check-in dates that are missing, e.g. the day entering the horizon.
+
+Dirty cells of a room type are priced with one predict_prices_batch call
+and written back with an executemany upsert. The model takes no demand
+inputs, so when only the rooms on the books (daily_occupancy) of a date
+moved, its cells' rooms_booked is updated in place without a model call.
+Dates that have passed are deleted. Run it from cron / a process manager with
+`python -m app.rate_grid --loop`, or in-process with
+RATE_GRID_SWEEP_INTERVAL_SECONDS > 0 (best with a single API worker; with
+several, each sweeps).
+"""
+
+import argparse
+import os
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.catalog import RoomTypeEntry, load_portfolio
+from app.database import dialect_insert
+from app.metrics import register_gauge
+from app.ml.predict import (
+    clamp_to_base_price,
+    get_loaded_version,
+    load_price_model,
+    predict_prices_batch,
+)
+
+
+RATE_GRID_DAYS = int(os.getenv("RATE_GRID_DAYS", "365"))
+RATE_GRID_STAY_LENGTHS = tuple(
+    int(v) for v in os.getenv("RATE_GRID_STAY_LENGTHS", "1,2,3,7").split(",")
+)
+RATE_GRID_BOOKING_WINDOW = int(os.getenv("RATE_GRID_BOOKING_WINDOW", "7"))
+
+# In-process sweeper; 0 disables it
+RATE_GRID_SWEEP_INTERVAL_SECONDS = float(os.getenv("RATE_GRID_SWEEP_INTERVAL_SECONDS", "0"))
+
+_grid = models.RateGrid.__table__
+_occupancy = models.DailyOccupancy.__table__
+
+GRID_VALUE_COLUMNS = (
+    "model_price", "recommended_price", "base_price", "model_version", "rooms_booked", "computed_at",
+)
+
+# Result of the last sweep in this process, for /metrics
+last_sweep: Dict[str, float] = {}
+
+
+def _upsert_statement(dialect_name: str):
+    stmt = dialect_insert(dialect_name)(_grid)
+    return stmt.on_conflict_do_update(
+        index_elements=["hotel_id", "stay_date", "room_type_id", "stay_length"],
+        set_={col: stmt.excluded[col] for col in GRID_VALUE_COLUMNS},
+    )
+
+
+_rooms_booked_update = (
+    update(_grid)
+    .where(
+        _grid.c.hotel_id == bindparam("h"),
+        _grid.c.room_type_id == bindparam("rt"),
+        _grid.c.stay_date == bindparam("day"),
+    )
+    .values(rooms_booked=bindparam("rooms"))
+)
+
+
+def _dirty_dates(
+    room_type: RoomTypeEntry,
+    cells: Dict[Tuple[date, int], tuple],
+    booked: Dict[date, int],
+    dates: List[date],
+    version: str,
+    reasons: Counter,
+) -> Tuple[List[date], List[date]]:
+    """
+    Check-in dates of `room_type` whose cells must be (re)computed, and
+    dates whose cells only need their rooms_booked refreshed.
+    """
+    if any(
+        cell_version != version or cell_base != room_type.base_price
+        for cell_version, cell_base, _ in cells.values()
+    ):
+        reasons["model_or_base_price"] += len(dates)
+        return dates, []
+
+    dirty, rebooked = [], []
+    for day in dates:
+        stored = [cells.get((day, length)) for length in RATE_GRID_STAY_LENGTHS]
+        if any(cell is None for cell in stored):
+            reasons["missing"] += 1
+            dirty.append(day)
+        elif any(cell[2] != booked.get(day, 0) for cell in stored):
+            reasons["bookings"] += 1
+            rebooked.append(day)
+    return dirty, rebooked
+
+
+def _sweep_hotel(
+    db: Session,
+    hotel_id: int,
+    city: str,
+    room_types: List[RoomTypeEntry],
+    dates: List[date],
+    version: str,
+    reasons: Counter,
+) -> int:
+    """Recompute the stale cells of one hotel; returns the number repriced."""
+    start, end = dates[0], dates[-1]
+    stored = db.execute(
+        select(_grid.c.room_type_id, _grid.c.stay_date, _grid.c.stay_length,
+               _grid.c.model_version, _grid.c.base_price, _grid.c.rooms_booked)
+        .where(_grid.c.hotel_id == hotel_id, _grid.c.stay_date.between(start, end))
+    ).all()
+    cells: Dict[int, Dict[Tuple[date, int], tuple]] = {rt.id: {} for rt in room_types}
+    for rt_id, day, length, cell_version, cell_base, cell_booked in stored:
+        if rt_id in cells:
+            cells[rt_id][(day, length)] = (cell_version, cell_base, cell_booked)
+
+    booked: Dict[int, Dict[date, int]] = {rt.id: {} for rt in room_types}
+    for rt_id, day, rooms in db.execute(
+        select(_occupancy.c.room_type_id, _occupancy.c.stay_date, _occupancy.c.rooms_booked)
+        .where(_occupancy.c.hotel_id == hotel_id, _occupancy.c.stay_date.between(start, end))
+    ):
+        if rt_id in booked:
+            booked[rt_id][day] = rooms
+
+    computed_at = datetime.now(timezone.utc).isoformat()
+    rows, rebooked_rows = [], []
+    for room_type in room_types:
+        dirty, rebooked = _dirty_dates(room_type, cells[room_type.id], booked[room_type.id], dates, version, reasons)
+        rebooked_rows.extend(
+            {"h": hotel_id, "rt": room_type.id, "day": day, "rooms": booked[room_type.id].get(day, 0)}
+            for day in rebooked
+        )
+        if not dirty:
+            continue
+        model_prices = predict_prices_batch(
+            city=city,
+            room_types=[(room_type.name, room_type.base_price, room_type.capacity)],
+            check_in_dates=dirty,
+            stay_lengths=RATE_GRID_STAY_LENGTHS,
+            booking_windows=[RATE_GRID_BOOKING_WINDOW],
+            hotel_id=hotel_id,
+        )[0, :, :, 0]
+        recommended = np.round(clamp_to_base_price(model_prices, room_type.base_price), 2).tolist()
+        model_prices = np.round(model_prices, 2).tolist()
+        rt_booked = booked[room_type.id]
+        for d, day in enumerate(dirty):
+            for s, length in enumerate(RATE_GRID_STAY_LENGTHS):
+                rows.append({
+                    "hotel_id": hotel_id,
+                    "stay_date": day,
+                    "room_type_id": room_type.id,
+                    "stay_length": length,
+                    "model_price": model_prices[d][s],
+                    "recommended_price": recommended[d][s],
+                    "base_price": room_type.base_price,
+                    "model_version": version,
+                    "rooms_booked": rt_booked.get(day, 0),
+                    "computed_at": computed_at,
+                })
+
+    if rows:
+        db.execute(_upsert_statement(db.get_bind().dialect.name), rows)
+    if rebooked_rows:
+        # Every stay length of the date; prices stay as they are
+        db.execute(_rooms_booked_update, rebooked_rows)
+    return len(rows)
+
+
+def sweep_rate_grid(db: Session, today: date | None = None, days: int = RATE_GRID_DAYS) -> Dict[str, float]:
+    """
+    Bring rate_grid up to date for the whole portfolio, committing after
+    each hotel. Returns sweep statistics (cells written, per reason, seconds).
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    dates = [today + timedelta(days=i) for i in range(days)]
+
+    load_price_model()
+    version = get_loaded_version()
+
+    db.execute(delete(_grid).where(_grid.c.stay_date < today))
+    db.commit()
+
+    reasons: Counter = Counter()
+    cells = 0
+    for hotel_id, (city, room_types) in load_portfolio(db).items():
+        cells += _sweep_hotel(db, hotel_id, city, room_types, dates, version, reasons)
+        db.commit()
+
+    stats = {
+        "cells": cells,
+        "dates_model_or_base_price": reasons["model_or_base_price"],
+        "dates_missing": reasons["missing"],
+        "dates_bookings": reasons["bookings"],
+        "seconds": time.perf_counter() - started,
+        "finished_at": time.time(),
+    }
+    last_sweep.clear()
+    last_sweep.update(stats)
+    return stats
+
+
+# ---------- in-process sweeper ----------
+
+_sweeper: threading.Thread | None = None
+_sweeper_stop = threading.Event()
+
+
+def _sweep_loop(interval: float) -> None:
+    from app.database import SessionLocal
+
+    while True:
+        try:
+            with SessionLocal() as db:
+                sweep_rate_grid(db)
+        except Exception as exc:  # keep serving the grid we have
+            print(f"Rate grid sweep failed: {exc!r}")
+        if _sweeper_stop.wait(interval):
+            return
+
+
+def start_rate_grid_sweeper(interval: float = RATE_GRID_SWEEP_INTERVAL_SECONDS) -> None:
+    """Sweep every `interval` seconds in a background thread (no-op when interval <= 0)."""
+    global _sweeper
+    if interval <= 0 or (_sweeper is not None and _sweeper.is_alive()):
+        return
+    _sweeper_stop.clear()
+    _sweeper = threading.Thread(target=_sweep_loop, args=(interval,), name="rate-grid-sweeper", daemon=True)
+    _sweeper.start()
+
+
+def stop_rate_grid_sweeper() -> None:
+    _sweeper_stop.set()
+
+
+def _sweep_samples():
+    for key, value in last_sweep.items():
+        yield (key,), value
+
+
+register_gauge(
+    "rate_grid_last_sweep",
+    "Cells written by the last rate grid sweep in this process, dirty dates per reason, duration and finish time.",
+    _sweep_samples,
+    ("stat",),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill / refresh the precomputed rate grid.")
+    parser.add_argument("--days", type=int, default=RATE_GRID_DAYS)
+    parser.add_argument("--loop", action="store_true", help="keep sweeping every --interval seconds")
+    parser.add_argument("--interval", type=float, default=RATE_GRID_SWEEP_INTERVAL_SECONDS or 300)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal, engine
+    from app.migrations import init_schema
+
+    init_schema(engine)
+    while True:
+        with SessionLocal() as db:
+            stats = sweep_rate_grid(db, days=args.days)
+        print(
+            f"Repriced {stats['cells']} cells in {stats['seconds']:.1f}s "
+            f"(dirty dates: {stats['dates_model_or_base_price']} model/base price, "
+            f"{stats['dates_missing']} missing; rooms_booked refreshed on {stats['dates_bookings']} dates)"
+        )
+        if not args.loop:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
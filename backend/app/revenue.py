@@ -0,0 +1,601 @@
+"""
+Revenue-optimizing price search.
+
+The price recommendation endpoints predict what a stay would sell for and
+clamp that to the base-price band. This module instead picks, for every
+room type and check-in date, the candidate price with the highest expected
+revenue:
+
+    revenue(p) = p * realization(p) * min(demand to come * acceptance(p), free rooms)
+
+Candidates are REVENUE_CANDIDATE_* multiples of the date's model price,
+clamped to the base-price band, plus the clamped model price itself. The
+search therefore never expects less than the plain recommendation. Cells
+with no demand left (or no history) keep the clamped model price.
+
+DemandModel estimates the demand side from history:
+
+- acceptance: the share of bookings (every status) made at a price of at
+  least x times the room type's average nightly rate for that check-in
+  weekday and month, normalized to 1 at the average ratio. A candidate is
+  looked up by its ratio to the date's model price, which plays the part
+  of that average rate on the date,
+- realization: the share of bookings at that ratio that were not
+  cancelled or no-show, i.e. that actually paid,
+- volume: average nightly demand (rooms booked plus released) per
+  check-in weekday and month, from daily_occupancy,
+- pace: the share of a night's bookings already on the books 7/14/30 days
+  out, which turns volume into the demand still to come at a lead time,
+- inventory: the most rooms of the type held on one night.
+
+Room types with little history are shrunk towards the portfolio-wide curves
+with REVENUE_PRIOR_WEIGHT pseudo-bookings. The model is built in one
+streaming pass over bookings and one over daily_occupancy, then cached.
+After REVENUE_DEMAND_TTL_SECONDS a background thread rebuilds it while
+requests keep getting the cached one; the API starts that build at startup.
+
+The search is NumPy over a (room types x dates x candidates) array per
+hotel, with no Python loop over cells. `python -m app.revenue` runs it for
+the whole portfolio.
+"""
+
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.catalog import RoomTypeEntry, load_portfolio
+from app.metrics import register_gauge
+from app.ml.predict import PRICE_CEILING_MULTIPLIER, PRICE_FLOOR_MULTIPLIER, predict_prices_batch
+from app.occupancy import PACE_LEADS, RELEASED_STATUSES
+
+
+# Candidate prices, as multiples of the date's model price
+REVENUE_CANDIDATE_MIN = float(os.getenv("REVENUE_CANDIDATE_MIN", "0.6"))
+REVENUE_CANDIDATE_MAX = float(os.getenv("REVENUE_CANDIDATE_MAX", "1.6"))
+REVENUE_CANDIDATE_STEP = float(os.getenv("REVENUE_CANDIDATE_STEP", "0.02"))
+CANDIDATE_RATIOS = np.round(
+    np.arange(REVENUE_CANDIDATE_MIN, REVENUE_CANDIDATE_MAX + REVENUE_CANDIDATE_STEP / 2, REVENUE_CANDIDATE_STEP), 6
+)
+
+# Model price input, as in the rate grid
+REVENUE_BOOKING_WINDOW = int(os.getenv("REVENUE_BOOKING_WINDOW", "7"))
+
+# Pseudo-bookings pulling a room type's curves towards the portfolio's
+REVENUE_PRIOR_WEIGHT = float(os.getenv("REVENUE_PRIOR_WEIGHT", "50"))
+REVENUE_DEMAND_TTL_SECONDS = float(os.getenv("REVENUE_DEMAND_TTL_SECONDS", "3600"))
+
+# Demand still to come reaches zero this many days before the night
+REVENUE_MAX_LEAD_DAYS = 365
+
+# Price / reference rate ratios are binned this finely, up to 4x
+RATIO_BIN_WIDTH = 0.01
+N_RATIO_BINS = 400
+# Realization is estimated over coarser bins of this many fine bins
+REALIZATION_BIN_GROUP = 10
+
+# Rows fetched per round trip while building
+BUILD_CHUNK_ROWS = 200_000
+
+# date.toordinal() of 1970-01-01, i.e. day 0 of datetime64[D]
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@dataclass
+class DemandModel:
+    """
+    Per room type demand curves. Row i describes room_type_ids[i]; the last
+    row is the portfolio prior, used for room types created since the build.
+    """
+
+    room_type_ids: np.ndarray  # (R,) sorted
+    acceptance: np.ndarray  # (R + 1, N_RATIO_BINS)
+    realization: np.ndarray  # (R + 1, N_RATIO_BINS)
+    mean_ratio: np.ndarray  # (R + 1,)
+    volume: np.ndarray  # (R + 1, 7, 12) nightly demand by weekday, month
+    pace: np.ndarray  # (R + 1, len(PACE_LEADS))
+    inventory: np.ndarray  # (R + 1,)
+    bookings: int
+    nights: int
+    build_seconds: float
+    built_at: float = field(default_factory=time.time)
+
+    def rows(self, room_type_ids: Sequence[int]) -> np.ndarray:
+        """Row index of each room type; the prior row for unknown ones."""
+        return _positions(self.room_type_ids, np.asarray(room_type_ids, dtype=np.int64))
+
+
+def _positions(sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Index of each id in `sorted_ids`, len(sorted_ids) where missing."""
+    n = sorted_ids.shape[0]
+    if n == 0:
+        return np.zeros(ids.shape, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_ids, ids), n - 1)
+    return np.where(sorted_ids[pos] == ids, pos, n)
+
+
+# ---------- building ----------
+
+def _shrink(counts: np.ndarray, totals: np.ndarray, prior) -> np.ndarray:
+    """Rate counts / totals with REVENUE_PRIOR_WEIGHT pseudo-observations at `prior` (broadcasting)."""
+    return (counts + REVENUE_PRIOR_WEIGHT * prior) / (totals + REVENUE_PRIOR_WEIGHT)
+
+
+def _booking_curves(db: Session, room_type_ids: np.ndarray, reference: np.ndarray) -> dict:
+    """
+    Acceptance, realization and mean ratio per room type, streaming bookings
+    once. A booking's ratio is its price over `reference` (R + 1, 84): the
+    room type's average nightly rate for the check-in weekday and month.
+    """
+    n_rows = len(room_type_ids) + 1
+    counts = np.zeros(n_rows * N_RATIO_BINS)
+    paid = np.zeros(n_rows * N_RATIO_BINS)
+    ratio_sum = np.zeros(n_rows)
+
+    booking = models.Booking.__table__
+    query = select(booking.c.room_type_id, booking.c.check_in_date, booking.c.price_sold,
+                   booking.c.status.in_(RELEASED_STATUSES))
+    for rt_ids, check_ins, prices, released in _column_chunks(db, query):
+        pos = _positions(room_type_ids, np.array(rt_ids, dtype=np.int64))
+        known = pos < len(room_type_ids)
+        pos = pos[known]
+        day = _day_numbers(check_ins)[known]
+        prices = np.array(prices, dtype=np.float64)[known]
+        released = np.array(released, dtype=bool)[known]
+
+        ratio = prices / reference[pos, _bucket(day)]
+        key = pos * N_RATIO_BINS + np.clip((ratio / RATIO_BIN_WIDTH).astype(np.int64), 0, N_RATIO_BINS - 1)
+        counts += np.bincount(key, minlength=counts.shape[0])
+        paid += np.bincount(key, weights=~released, minlength=paid.shape[0])
+        ratio_sum += np.bincount(pos, weights=ratio, minlength=n_rows)
+
+    counts, paid = counts.reshape(n_rows, N_RATIO_BINS), paid.reshape(n_rows, N_RATIO_BINS)
+    # Last row: the whole portfolio
+    counts[-1], paid[-1], ratio_sum[-1] = counts[:-1].sum(axis=0), paid[:-1].sum(axis=0), ratio_sum[:-1].sum()
+    totals = counts.sum(axis=1)
+    n_bookings = int(totals[-1])
+
+    prior_share = counts[-1] / max(totals[-1], 1)
+    share = _shrink(counts, totals[:, None], prior_share)
+    share[-1] = prior_share
+    # survival[i, k]: share of bookings made at a ratio in bin k or above
+    survival = np.cumsum(share[:, ::-1], axis=1)[:, ::-1]
+
+    prior_mean = ratio_sum[-1] / totals[-1] if totals[-1] else 1.0
+    mean_ratio = _shrink(ratio_sum, totals, prior_mean)
+    mean_bin = np.clip((mean_ratio / RATIO_BIN_WIDTH).astype(np.int64), 0, N_RATIO_BINS - 1)
+    at_mean = survival[np.arange(n_rows), mean_bin]
+    acceptance = np.divide(survival, at_mean[:, None], out=np.zeros_like(survival), where=at_mean[:, None] > 0)
+
+    # Realization: per coarse ratio bin, shrunk to the room type's overall rate
+    grouped = (n_rows, N_RATIO_BINS // REALIZATION_BIN_GROUP, REALIZATION_BIN_GROUP)
+    coarse_counts, coarse_paid = counts.reshape(grouped).sum(axis=2), paid.reshape(grouped).sum(axis=2)
+    prior_rate = paid[-1].sum() / totals[-1] if totals[-1] else 1.0
+    rate = _shrink(paid.sum(axis=1), totals, prior_rate)
+    realization = np.repeat(_shrink(coarse_paid, coarse_counts, rate[:, None]), REALIZATION_BIN_GROUP, axis=1)
+
+    return {
+        "acceptance": acceptance,
+        "realization": realization,
+        "mean_ratio": mean_ratio,
+        "bookings": n_bookings,
+    }
+
+
+def _night_curves(db: Session, room_type_ids: np.ndarray, base_prices: np.ndarray, today: date) -> dict:
+    """
+    Volume, pace, inventory and the nightly rate reference per room type,
+    streaming past nights of daily_occupancy once.
+    """
+    n_rows = len(room_type_ids) + 1
+    gross = np.zeros(n_rows * 84)  # weekday x month buckets
+    held_by_bucket = np.zeros(n_rows * 84)
+    revenue = np.zeros(n_rows * 84)
+    held = np.zeros(n_rows)
+    on_books = np.zeros((n_rows, len(PACE_LEADS)))
+    inventory = np.zeros(n_rows)
+    first_day = np.full(n_rows, np.iinfo(np.int64).max)
+    last_day = np.full(n_rows, np.iinfo(np.int64).min)
+
+    occupancy = models.DailyOccupancy.__table__
+    pace_columns = [occupancy.c[f"on_books_{lead}d"] for lead in PACE_LEADS]
+    query = select(occupancy.c.room_type_id, occupancy.c.stay_date, occupancy.c.rooms_booked,
+                   occupancy.c.cancellations, occupancy.c.room_revenue, *pace_columns)
+    # Past nights only; filtered here so the query has no date parameter
+    today_number = np.datetime64(today, "D").astype(np.int64)
+    n_nights = 0
+    for columns in _column_chunks(db, query):
+        pos = _positions(room_type_ids, np.array(columns[0], dtype=np.int64))
+        day = _day_numbers(columns[1])
+        known = (pos < len(room_type_ids)) & (day < today_number)
+        pos, day = pos[known], day[known]
+        rooms = np.array(columns[2], dtype=np.float64)[known]
+        released = np.array(columns[3], dtype=np.float64)[known]
+        key = pos * 84 + _bucket(day)
+
+        gross += np.bincount(key, weights=rooms + released, minlength=gross.shape[0])
+        held_by_bucket += np.bincount(key, weights=rooms, minlength=gross.shape[0])
+        revenue += np.bincount(key, weights=np.array(columns[4], dtype=np.float64)[known], minlength=gross.shape[0])
+        held += np.bincount(pos, weights=rooms, minlength=n_rows)
+        for i, col in enumerate(columns[5:]):
+            on_books[:, i] += np.bincount(pos, weights=np.array(col, dtype=np.float64)[known], minlength=n_rows)
+        np.maximum.at(inventory, pos, rooms)
+        np.minimum.at(first_day, pos, day)
+        np.maximum.at(last_day, pos, day)
+        n_nights += int(pos.shape[0])
+
+    # Calendar nights per bucket between each room type's first and last booked night
+    seen = last_day >= first_day
+    nights = np.zeros((n_rows, 84))
+    if seen.any():
+        low, high = first_day[seen].min(), last_day[seen].max()
+        days = np.arange(low, high + 1)
+        cumulative = np.zeros((days.shape[0] + 1, 84))
+        cumulative[1:] = np.cumsum(np.eye(84)[_bucket(days)], axis=0)
+        nights[seen] = cumulative[last_day[seen] - low + 1] - cumulative[first_day[seen] - low]
+
+    gross = gross.reshape(n_rows, 84)
+    overall = np.divide(gross.sum(axis=1), nights.sum(axis=1), out=np.zeros(n_rows), where=nights.sum(axis=1) > 0)
+    volume = np.where(nights > 0, gross / np.maximum(nights, 1), overall[:, None])
+    # Prior row: no volume of its own, so unknown room types keep the model price
+    volume[-1] = 0.0
+
+    prior_held, prior_on_books = held[:-1].sum(), on_books[:-1].sum(axis=0)
+    prior_pace = prior_on_books / prior_held if prior_held else np.zeros(len(PACE_LEADS))
+    pace = _shrink(on_books, held[:, None], prior_pace)
+    pace[-1] = prior_pace
+
+    # Average nightly rate per bucket, shrunk to the room type's (base price without history)
+    held_by_bucket, revenue = held_by_bucket.reshape(n_rows, 84), revenue.reshape(n_rows, 84)
+    rate = np.append(base_prices, 1.0)
+    has_nights = held > 0
+    rate[has_nights] = revenue.sum(axis=1)[has_nights] / held[has_nights]
+    reference = _shrink(revenue, held_by_bucket, rate[:, None])
+
+    return {
+        "reference": reference,
+        # weekday, month order: bucket = weekday * 12 + month
+        "volume": volume.reshape(n_rows, 7, 12),
+        "pace": pace,
+        "inventory": inventory,
+        "nights": n_nights,
+    }
+
+
+def _column_chunks(db: Session, query) -> Iterator[List[tuple]]:
+    """
+    The columns of `query`'s rows, BUILD_CHUNK_ROWS rows at a time. SQLite
+    reads straight from the DB-API cursor, dates arriving as ISO strings:
+    skipping SQLAlchemy's Row objects and date parsing halves the read.
+    """
+    connection = db.connection()
+    if connection.dialect.name != "sqlite":
+        for rows in connection.execute(query, execution_options={"yield_per": BUILD_CHUNK_ROWS}).partitions():
+            yield list(zip(*rows))
+        return
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(str(query.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})))
+        while True:
+            rows = cursor.fetchmany(BUILD_CHUNK_ROWS)
+            if not rows:
+                return
+            yield list(zip(*rows))
+    finally:
+        cursor.close()
+
+
+def _day_numbers(dates: Sequence) -> np.ndarray:
+    """datetime64[D] day numbers (int64) of dates or ISO date strings."""
+    if dates and isinstance(dates[0], str):
+        return np.array(dates, dtype="datetime64[D]").astype(np.int64)
+    # Going through ordinals is ~30x faster than np.array(dates, "datetime64[D]")
+    return np.fromiter(map(date.toordinal, dates), dtype=np.int64, count=len(dates)) - _EPOCH_ORDINAL
+
+
+def _bucket(days: np.ndarray) -> np.ndarray:
+    """weekday * 12 + month (both 0-based) of datetime64[D] day numbers."""
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekday = (days + 3) % 7
+    month = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    return weekday * 12 + month
+
+
+def build_demand_model(db: Session, today: date | None = None) -> DemandModel:
+    """Estimate the demand curves of every room type from bookings and past nights."""
+    started = time.perf_counter()
+    rt = models.RoomType.__table__
+    catalog = db.execute(select(rt.c.id, rt.c.base_price).order_by(rt.c.id)).all()
+    room_type_ids = np.array([row[0] for row in catalog], dtype=np.int64)
+    base_prices = np.array([row[1] for row in catalog], dtype=np.float64)
+
+    nights = _night_curves(db, room_type_ids, base_prices, today or date.today())
+    curves = _booking_curves(db, room_type_ids, nights.pop("reference"))
+    return DemandModel(
+        room_type_ids=room_type_ids,
+        **curves,
+        **nights,
+        build_seconds=time.perf_counter() - started,
+    )
+
+
+_demand: DemandModel | None = None
+_demand_lock = threading.Lock()
+_refresher: threading.Thread | None = None
+_refresher_lock = threading.Lock()
+
+
+def _build_and_cache(db: Session | None) -> DemandModel:
+    # Callers hold _demand_lock
+    global _demand
+    if db is not None:
+        _demand = build_demand_model(db)
+    else:
+        from app.database import SessionLocal
+
+        with SessionLocal() as session:
+            _demand = build_demand_model(session)
+    return _demand
+
+
+def refresh_demand_model(db: Session | None = None) -> DemandModel:
+    """Rebuild the demand model now and cache it."""
+    with _demand_lock:
+        return _build_and_cache(db)
+
+
+def _refresh_in_background() -> None:
+    try:
+        refresh_demand_model()
+    except Exception as exc:  # keep serving the model we have
+        print(f"Demand model refresh failed: {exc!r}")
+
+
+def start_demand_refresh() -> None:
+    """Rebuild the demand model in a background thread, unless one is already at it."""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is not None and _refresher.is_alive():
+            return
+        _refresher = threading.Thread(target=_refresh_in_background, name="demand-refresh", daemon=True)
+        _refresher.start()
+
+
+def get_demand_model(max_age: float = REVENUE_DEMAND_TTL_SECONDS) -> DemandModel:
+    """
+    The cached demand model. Once older than `max_age` seconds it is still
+    served while start_demand_refresh rebuilds it; only a process with no
+    model yet waits, for the build already running if there is one.
+    """
+    demand = _demand
+    if demand is None:
+        with _demand_lock:
+            return _demand or _build_and_cache(None)
+    if time.time() - demand.built_at > max_age:
+        start_demand_refresh()
+    return demand
+
+
+# ---------- search ----------
+
+def _share_to_come(pace: np.ndarray, leads: np.ndarray) -> np.ndarray:
+    """
+    (R, D) share of a night's demand still to arrive `leads` days before it,
+    interpolating the pace points linearly per row.
+    """
+    xp = np.array([0, *PACE_LEADS, REVENUE_MAX_LEAD_DAYS], dtype=np.float64)
+    # Share booked at least x days ahead: everything at 0, nothing past the max lead
+    fp = np.column_stack([np.ones(pace.shape[0]), pace, np.zeros(pace.shape[0])])
+    # Bookings made today (lead days out) are still to come
+    x = np.clip(leads.astype(np.float64) + 1, 0, xp[-1])
+    k = np.clip(np.searchsorted(xp, x, side="right") - 1, 0, xp.shape[0] - 2)
+    t = (x - xp[k]) / (xp[k + 1] - xp[k])
+    booked_ahead = fp[:, k] * (1 - t) + fp[:, k + 1] * t
+    return np.where(leads >= 0, 1 - booked_ahead, 0.0)
+
+
+def search_prices(
+    demand: DemandModel,
+    room_type_ids: Sequence[int],
+    base_prices: np.ndarray,
+    model_prices: np.ndarray,
+    on_books: np.ndarray,
+    check_in_days: np.ndarray,
+    today: date,
+) -> Dict[str, np.ndarray]:
+    """
+    Revenue-maximizing price per (room type, date).
+
+    `model_prices` and `on_books` (rooms held now) are (R, D);
+    `check_in_days` is (D,) datetime64[D]. Returns (R, D) arrays:
+    recommended_price, expected_rooms (paid rooms still to sell),
+    expected_revenue and model_price_revenue (at the clamped model price).
+    """
+    rows = demand.rows(room_type_ids)
+    base = np.asarray(base_prices, dtype=np.float64)[:, None, None]
+    model_prices = np.maximum(np.asarray(model_prices, dtype=np.float64), 0.01)
+
+    # (R, D, C + 1): the ratio grid, then the clamped model price
+    candidates = np.concatenate(
+        [model_prices[:, :, None] * CANDIDATE_RATIOS, model_prices[:, :, None]], axis=2
+    )
+    candidates = np.clip(candidates, base * PRICE_FLOOR_MULTIPLIER, base * PRICE_CEILING_MULTIPLIER)
+
+    # Compare a candidate to the date's model price the way history compares
+    # a booking's ratio to the room type's average ratio
+    ratio = candidates / model_prices[:, :, None] * demand.mean_ratio[rows][:, None, None]
+    bins = np.clip((ratio / RATIO_BIN_WIDTH).astype(np.intp), 0, N_RATIO_BINS - 1)
+    acceptance = demand.acceptance[rows[:, None, None], bins]
+    realization = demand.realization[rows[:, None, None], bins]
+
+    days = check_in_days.astype("datetime64[D]").astype(np.int64)
+    weekday, month = (days + 3) % 7, days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) % 12
+    leads = days - np.datetime64(today, "D").astype(np.int64)
+    to_come = demand.volume[rows[:, None], weekday[None, :], month[None, :]] * _share_to_come(demand.pace[rows], leads)
+    free = np.maximum(demand.inventory[rows][:, None] - on_books, 0.0)
+
+    rooms = realization * np.minimum(to_come[:, :, None] * acceptance, free[:, :, None])
+    revenue = candidates * rooms
+    best = revenue.argmax(axis=2)
+    # Nothing left to sell (or no history): keep the clamped model price
+    best = np.where(np.take_along_axis(revenue, best[:, :, None], axis=2)[:, :, 0] > 0, best, revenue.shape[2] - 1)
+
+    def pick(values: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(values, best[:, :, None], axis=2)[:, :, 0]
+
+    return {
+        "recommended_price": pick(candidates),
+        "expected_rooms": pick(rooms),
+        "expected_revenue": pick(revenue),
+        "model_price_revenue": revenue[:, :, -1],
+    }
+
+
+def load_on_books(db: Session, start: date, days: int, hotel_id: int | None = None) -> Dict[int, np.ndarray]:
+    """Room type id -> rooms held for each of `days` nights from `start` (one range read)."""
+    occupancy = models.DailyOccupancy.__table__
+    query = select(occupancy.c.room_type_id, occupancy.c.stay_date, occupancy.c.rooms_booked).where(
+        occupancy.c.stay_date.between(start, start + timedelta(days=days - 1))
+    )
+    if hotel_id is not None:
+        query = query.where(occupancy.c.hotel_id == hotel_id)
+    on_books: Dict[int, np.ndarray] = {}
+    for rt_id, day, rooms in db.execute(query):
+        on_books.setdefault(rt_id, np.zeros(days))[(day - start).days] = rooms
+    return on_books
+
+
+def optimize_hotel_prices(
+    demand: DemandModel,
+    city: str,
+    hotel_id: int,
+    room_types: Sequence[RoomTypeEntry],
+    check_in_dates: Sequence[date],
+    on_books: Dict[int, np.ndarray],
+    today: date | None = None,
+) -> Dict[str, np.ndarray]:
+    """
+    search_prices for one hotel's room types, with model prices from one
+    predict_prices_batch call. Adds the (R, D) model_price array.
+    """
+    model_prices = _model_prices(city, hotel_id, room_types, check_in_dates)
+    result = _search_hotel(demand, room_types, check_in_dates, model_prices, on_books, today or date.today())
+    result["model_price"] = model_prices
+    return result
+
+
+def _model_prices(
+    city: str, hotel_id: int, room_types: Sequence[RoomTypeEntry], check_in_dates: Sequence[date]
+) -> np.ndarray:
+    return predict_prices_batch(
+        city=city,
+        room_types=[(rt.name, rt.base_price, rt.capacity) for rt in room_types],
+        check_in_dates=check_in_dates,
+        stay_lengths=[1],
+        booking_windows=[REVENUE_BOOKING_WINDOW],
+        hotel_id=hotel_id,
+    )[:, :, 0, 0]
+
+
+def _search_hotel(
+    demand: DemandModel,
+    room_types: Sequence[RoomTypeEntry],
+    check_in_dates: Sequence[date],
+    model_prices: np.ndarray,
+    on_books: Dict[int, np.ndarray],
+    today: date,
+) -> Dict[str, np.ndarray]:
+    n_days = len(check_in_dates)
+    return search_prices(
+        demand,
+        room_type_ids=[rt.id for rt in room_types],
+        base_prices=np.array([rt.base_price for rt in room_types], dtype=np.float64),
+        model_prices=model_prices,
+        on_books=np.array([on_books.get(rt.id, np.zeros(n_days)) for rt in room_types]).reshape(-1, n_days),
+        check_in_days=np.array(check_in_dates, dtype="datetime64[D]"),
+        today=today,
+    )
+
+
+def optimize_portfolio(db: Session, today: date | None = None, days: int = 365) -> Dict[str, float]:
+    """
+    Optimize every room type of every hotel for `days` nights from `today`,
+    rebuilding the demand model first. Returns cell count, expected revenue
+    at the optimized and at the model prices, and seconds per stage.
+    """
+    from app.ml.predict import load_price_model
+
+    started = time.perf_counter()
+    today = today or date.today()
+    demand = refresh_demand_model(db)
+    built = time.perf_counter()
+
+    load_price_model()
+    dates = [today + timedelta(days=i) for i in range(days)]
+    on_books = load_on_books(db, today, days)
+    stats = {"cells": 0, "expected_revenue": 0.0, "model_price_revenue": 0.0,
+             "predict_seconds": 0.0, "search_seconds": 0.0}
+    for hotel_id, (city, room_types) in load_portfolio(db).items():
+        t0 = time.perf_counter()
+        model_prices = _model_prices(city, hotel_id, room_types, dates)
+        t1 = time.perf_counter()
+        result = _search_hotel(demand, room_types, dates, model_prices, on_books, today)
+        stats["predict_seconds"] += t1 - t0
+        stats["search_seconds"] += time.perf_counter() - t1
+        stats["cells"] += result["recommended_price"].size
+        stats["expected_revenue"] += float(result["expected_revenue"].sum())
+        stats["model_price_revenue"] += float(result["model_price_revenue"].sum())
+    stats["demand_seconds"] = built - started
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _demand_samples():
+    demand = _demand
+    if demand is not None:
+        yield ("room_types",), len(demand.room_type_ids)
+        yield ("bookings",), demand.bookings
+        yield ("nights",), demand.nights
+        yield ("build_seconds",), demand.build_seconds
+        yield ("built_at",), demand.built_at
+
+
+register_gauge(
+    "revenue_demand_model",
+    "Room types, bookings and nights behind the cached demand model, its build time and age.",
+    _demand_samples,
+    ("stat",),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revenue-optimize prices for the whole portfolio.")
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        stats = optimize_portfolio(db, days=args.days)
+    uplift = stats["expected_revenue"] / stats["model_price_revenue"] - 1 if stats["model_price_revenue"] else 0.0
+    print(
+        f"Optimized {stats['cells']} room type-nights in {stats['seconds']:.1f}s "
+        f"(demand model {stats['demand_seconds']:.2f}s, model prices {stats['predict_seconds']:.2f}s, "
+        f"search {stats['search_seconds']:.2f}s)"
+    )
+    print(
+        f"Expected revenue {stats['expected_revenue']:,.0f} vs {stats['model_price_revenue']:,.0f} "
+        f"at the model price ({uplift:+.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
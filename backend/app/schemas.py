@@ -1,5 +1,8 @@
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PositiveInt, field_validator
+
+# Most stay lengths / booking windows one batch request may ask for
+MAX_BATCH_AXIS_VALUES = 32
 
 
 # ---------- HOTEL SCHEMAS ----------
@@ -60,12 +63,34 @@ class BookingCreate(BookingBase):
     pass
 
 
+class BookingStatusUpdate(BaseModel):
+    """Schema used when changing a booking's status (e.g. to cancelled)."""
+    status: str
+
+
 class Booking(BookingBase):
     id: int
 
     class Config:
         from_attributes = True
 
+
+class BookingPage(BaseModel):
+    items: list[Booking]
+    next_cursor: int | None = None  # pass as ?cursor= to get the next page
+
+
+class BulkBookingError(BaseModel):
+    row: int  # 1-based position in the upload
+    error: str
+
+
+class BulkBookingResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: list[BulkBookingError]  # capped; `failed` is the full count
+
 # ---------- PRICE RECOMMENDATION SCHEMAS ----------
 
 class PriceRecommendationRequest(BaseModel):
@@ -84,3 +109,108 @@ class PriceRecommendationResponse(BaseModel):
     model_price: float
     base_price: float
     currency: str = "USD"
+
+
+class PriceRecommendationBatchRequest(BaseModel):
+    hotel_id: int
+    room_type_ids: list[int] | None = None  # defaults to every room type of the hotel
+    start_date: date
+    end_date: date  # inclusive
+    stay_lengths: list[PositiveInt] = Field([1], min_length=1, max_length=MAX_BATCH_AXIS_VALUES)
+    booking_windows: list[PositiveInt] = Field([7], min_length=1, max_length=MAX_BATCH_AXIS_VALUES)
+
+    @field_validator("stay_lengths", "booking_windows")
+    @classmethod
+    def _no_duplicates(cls, values: list[int]) -> list[int]:
+        if len(set(values)) != len(values):
+            raise ValueError("values must be unique")
+        return values
+
+
+class PriceRecommendationBatchItem(BaseModel):
+    room_type_id: int
+    check_in_date: date
+    stay_length: int
+    booking_window: int
+    recommended_price: float
+    model_price: float
+    base_price: float
+
+
+class PriceRecommendationBatchResponse(BaseModel):
+    hotel_id: int
+    currency: str = "USD"
+    items: list[PriceRecommendationBatchItem]
+
+
+class PriceOptimizationRequest(BaseModel):
+    hotel_id: int
+    room_type_ids: list[int] | None = None  # defaults to every room type of the hotel
+    start_date: date
+    end_date: date  # inclusive
+
+
+class PriceOptimizationItem(BaseModel):
+    room_type_id: int
+    check_in_date: date
+    recommended_price: float  # revenue-maximizing candidate
+    model_price: float
+    base_price: float
+    expected_rooms: float  # paid (not cancelled / no-show) rooms still to sell
+    expected_revenue: float
+    model_price_revenue: float  # expected revenue at the clamped model price
+
+
+class PriceOptimizationResponse(BaseModel):
+    hotel_id: int
+    currency: str = "USD"
+    booking_window: int  # model price input
+    items: list[PriceOptimizationItem]
+
+
+class RateGridCell(BaseModel):
+    room_type_id: int
+    stay_date: date  # check-in date
+    stay_length: int
+    recommended_price: float
+    model_price: float
+    base_price: float
+    rooms_booked: int
+
+
+class RateGridResponse(BaseModel):
+    hotel_id: int
+    currency: str = "USD"
+    start_date: date
+    end_date: date
+    booking_window: int
+    cells: list[RateGridCell]
+
+
+# ---------- MODEL REGISTRY SCHEMAS ----------
+
+class ModelVersion(BaseModel):
+    version: str
+    created_at: str
+    active: bool
+    mae: float | None = None
+    r2: float | None = None
+    training_rows: int | None = None
+
+
+class ModelRegistryStatus(BaseModel):
+    active_version: str | None  # what the registry points at
+    loaded_version: str | None  # what this worker is serving
+    versions: list[ModelVersion]
+
+
+class PredictionCacheStats(BaseModel):
+    size: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    expirations: int
+    invalidations: int
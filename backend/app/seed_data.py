@@ -3,16 +3,23 @@ from datetime import date, timedelta
 
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
 from app import models
+from app.migrations import init_schema
+from app.ml.feature_store import invalidate_feature_store
+from app.occupancy import add_bookings, booking_row
 
 
 def reset_database(db: Session) -> None:
     """Optional: clear existing data so seeding is repeatable."""
+    db.query(models.DailyOccupancy).delete()
+    db.query(models.RateGrid).delete()
     db.query(models.Booking).delete()
     db.query(models.RoomType).delete()
     db.query(models.Hotel).delete()
     db.commit()
+    # Booking ids get reused by the new data
+    invalidate_feature_store()
 
 
 def seed_hotels(db: Session):
@@ -119,11 +126,14 @@ def seed_bookings(db: Session, hotels, room_types, days_back: int = 120, days_fo
                 db.add(booking)
                 bookings.append(booking)
 
+    add_bookings(db, [booking_row(b) for b in bookings])
     db.commit()
     return bookings
 
 
 def main():
+    # Older databases may miss tables reset_database clears
+    init_schema(engine)
     db = SessionLocal()
     try:
         print("Resetting database...")
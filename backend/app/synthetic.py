@@ -0,0 +1,323 @@
+"""
+Vectorized synthetic dataset generator for load tests and benchmarks.
+
+Generates N hotels x M room types x D days of bookings. Per-cell booking
+counts are drawn for a whole block of hotels with one Poisson call, and
+every booking attribute is then one NumPy draw over the block. Blocks are
+sized to about `chunk_rows` bookings, so memory stays bounded at any scale,
+and each block has its own seed derived from (seed, first hotel), so the
+output depends only on the arguments.
+
+The statistics follow app/seed_data.py: more bookings and higher prices on
+Friday and Saturday check-ins, 1-3 night stays booked 1-30 days ahead, and
+75% confirmed / 20% cancelled / 5% no-show.
+
+Bookings go to the database with chunked executemany inserts, and/or
+straight to the training feature store (see app.ml.feature_store). The
+catalog is always written to the database, since the store joins it on read.
+
+Run from the backend directory:
+    python -m app.synthetic --hotels 1000 --room-types 5 --days 1095 --feature-store
+"""
+
+import argparse
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert
+
+from app import models
+from app.database import engine
+from app.occupancy import apply_deltas, night_deltas
+
+
+CITIES = (
+    ("Hyderabad", "India"),
+    ("Kansas City", "USA"),
+    ("Miami", "USA"),
+    ("Berlin", "Germany"),
+    ("Lisbon", "Portugal"),
+    ("Tokyo", "Japan"),
+    ("Sydney", "Australia"),
+    ("Toronto", "Canada"),
+)
+
+# (name, capacity, base price); hotels with more room types cycle through these
+ROOM_TYPE_CONFIGS = (
+    ("Standard", 2, 80.0),
+    ("Deluxe", 2, 120.0),
+    ("Suite", 4, 200.0),
+    ("Family", 4, 150.0),
+    ("Executive", 2, 170.0),
+)
+
+STATUSES = ("confirmed", "cancelled", "no-show")
+STATUS_WEIGHTS = (0.75, 0.2, 0.05)
+
+# Average bookings per room type per check-in day (before weekday and hotel effects)
+MEAN_BOOKINGS = 1.0
+WEEKEND_DEMAND = 2.0
+
+# Bookings generated per block, and rows per INSERT executemany
+CHUNK_ROWS = 1_000_000
+INSERT_BATCH_SIZE = 50_000
+
+
+def generate_catalog(
+    n_hotels: int,
+    room_types_per_hotel: int,
+    seed: int = 42,
+) -> tuple[List[dict], List[dict]]:
+    """Hotel and room type rows (with ids starting at 1), ready for insert."""
+    rng = np.random.default_rng(seed)
+    city_idx = rng.integers(0, len(CITIES), n_hotels)
+    # Per-hotel price level, so hotels don't all share the same base prices
+    price_level = rng.uniform(0.8, 1.4, n_hotels)
+
+    hotels = [
+        {"id": h + 1, "name": f"Hotel {h + 1}", "city": CITIES[c][0], "country": CITIES[c][1]}
+        for h, c in enumerate(city_idx.tolist())
+    ]
+    room_types = []
+    for h in range(n_hotels):
+        for k in range(room_types_per_hotel):
+            name, capacity, base_price = ROOM_TYPE_CONFIGS[k % len(ROOM_TYPE_CONFIGS)]
+            if k >= len(ROOM_TYPE_CONFIGS):
+                name = f"{name} {k // len(ROOM_TYPE_CONFIGS) + 1}"
+            room_types.append(
+                {
+                    "id": h * room_types_per_hotel + k + 1,
+                    "hotel_id": h + 1,
+                    "name": name,
+                    "capacity": capacity,
+                    "base_price": round(base_price * float(price_level[h]), 2),
+                }
+            )
+    return hotels, room_types
+
+
+def generate_bookings(
+    room_types: Sequence[dict],
+    n_days: int,
+    start_date: date,
+    seed: int = 42,
+    mean_bookings: float = MEAN_BOOKINGS,
+    chunk_rows: int = CHUNK_ROWS,
+    first_id: int = 1,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Yield bookings for every room type x check-in day, one block of hotels
+    at a time, as feature-store columns (see COLUMN_DTYPES) with status as
+    codes into STATUSES. Booking ids are consecutive from `first_id`, in
+    (hotel, room type, check-in date) order.
+    """
+    rt_ids = np.array([rt["id"] for rt in room_types], dtype=np.int64)
+    rt_hotels = np.array([rt["hotel_id"] for rt in room_types], dtype=np.int64)
+    rt_prices = np.array([rt["base_price"] for rt in room_types], dtype=np.float64)
+    order = np.lexsort((rt_ids, rt_hotels))
+    rt_ids, rt_hotels, rt_prices = rt_ids[order], rt_hotels[order], rt_prices[order]
+
+    check_in_days = np.datetime64(start_date, "D") + np.arange(n_days)
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekdays = (check_in_days.astype(np.int64) + 3) % 7
+    day_demand = np.where(np.isin(weekdays, (4, 5)), WEEKEND_DEMAND, 1.0)
+    day_demand *= mean_bookings * n_days / day_demand.sum()
+
+    # Whole hotels per block, each block holding about chunk_rows bookings
+    rts_per_block = max(1, int(chunk_rows // max(mean_bookings * n_days, 1e-9)))
+    hotel_bounds = np.flatnonzero(np.r_[rt_hotels[1:] != rt_hotels[:-1], True]) + 1
+    block_bounds = [0]
+    for bound in hotel_bounds.tolist():
+        if bound - block_bounds[-1] >= rts_per_block or bound == len(rt_ids):
+            block_bounds.append(bound)
+
+    next_id = first_id
+    for block_start, block_end in zip(block_bounds[:-1], block_bounds[1:]):
+        block = slice(block_start, block_end)
+        rng = np.random.default_rng([seed, int(rt_hotels[block_start])])
+
+        # Hotel popularity scales every room type of the hotel
+        hotels, hotel_pos = np.unique(rt_hotels[block], return_inverse=True)
+        popularity = rng.lognormal(0.0, 0.3, hotels.shape[0])[hotel_pos]
+
+        counts = rng.poisson(popularity[:, None] * day_demand[None, :])
+        cells = np.repeat(np.arange(counts.size), counts.ravel())
+        rt_pos = cells // n_days + block_start
+        day_pos = cells % n_days
+        n = cells.shape[0]
+
+        check_in = check_in_days[day_pos]
+        stay_length = rng.integers(1, 4, n)
+        booking_window = rng.integers(1, 31, n)
+        weekend = np.isin(weekdays[day_pos], (4, 5))
+        multiplier = 1.0 + np.where(
+            weekend, rng.uniform(0.2, 0.5, n), rng.uniform(-0.1, 0.2, n)
+        )
+
+        yield {
+            "booking_id": np.arange(next_id, next_id + n, dtype=np.int64),
+            "hotel_id": rt_hotels[rt_pos],
+            "room_type_id": rt_ids[rt_pos],
+            "booking_date": check_in - booking_window,
+            "check_in_date": check_in,
+            "check_out_date": check_in + stay_length,
+            "status": rng.choice(len(STATUSES), n, p=STATUS_WEIGHTS).astype(np.int16),
+            "price_sold": np.round(rt_prices[rt_pos] * multiplier, 2),
+        }
+        next_id += n
+
+
+# ---------- writers ----------
+
+def write_catalog(conn, hotels: List[dict], room_types: List[dict], reset: bool = True) -> None:
+    """Insert the catalog; with `reset`, existing bookings and catalog are deleted first."""
+    if reset:
+        conn.execute(delete(models.DailyOccupancy))
+        conn.execute(delete(models.Booking))
+        conn.execute(delete(models.RoomType))
+        conn.execute(delete(models.Hotel))
+    conn.execute(insert(models.Hotel.__table__), hotels)
+    conn.execute(insert(models.RoomType.__table__), room_types)
+
+
+BOOKING_COLUMNS = (
+    "id", "hotel_id", "room_type_id", "booking_date", "check_in_date",
+    "check_out_date", "status", "price_sold",
+)
+
+
+def insert_bookings(conn, columns: Dict[str, np.ndarray], batch_size: int = INSERT_BATCH_SIZE) -> int:
+    """
+    Insert one chunk of generated columns with executemany batches of
+    `batch_size`, and count them in daily_occupancy.
+    """
+    statuses = np.array(STATUSES, dtype=object)
+    # SQLite: plain DB-API executemany with ISO date strings. Skipping
+    # SQLAlchemy's per-row parameter processing makes it ~3x faster. Other
+    # databases go through Core, which batches executemany into multi-row
+    # INSERTs ("insertmanyvalues").
+    raw = conn.dialect.name == "sqlite"
+    date_type = str if raw else object
+    sql = (
+        f"INSERT INTO bookings ({', '.join(BOOKING_COLUMNS)}) "
+        f"VALUES ({', '.join('?' * len(BOOKING_COLUMNS))})"
+    )
+
+    n_rows = int(columns["booking_id"].shape[0])
+    for start in range(0, n_rows, batch_size):
+        batch = slice(start, start + batch_size)
+        rows = zip(
+            columns["booking_id"][batch].tolist(),
+            columns["hotel_id"][batch].tolist(),
+            columns["room_type_id"][batch].tolist(),
+            # datetime64[D] -> str / datetime.date, converted in C by NumPy
+            columns["booking_date"][batch].astype(date_type).tolist(),
+            columns["check_in_date"][batch].astype(date_type).tolist(),
+            columns["check_out_date"][batch].astype(date_type).tolist(),
+            statuses[columns["status"][batch]].tolist(),
+            columns["price_sold"][batch].tolist(),
+        )
+        if raw:
+            conn.exec_driver_sql(sql, list(rows))
+        else:
+            conn.execute(
+                insert(models.Booking.__table__), [dict(zip(BOOKING_COLUMNS, row)) for row in rows]
+            )
+
+    apply_deltas(conn, night_deltas(dict(columns, status=statuses[columns["status"]])))
+    return n_rows
+
+
+def generate_dataset(
+    n_hotels: int,
+    room_types_per_hotel: int,
+    n_days: int,
+    start_date: date,
+    seed: int = 42,
+    mean_bookings: float = MEAN_BOOKINGS,
+    to_database: bool = True,
+    feature_store_root: str | None = None,
+    chunk_rows: int = CHUNK_ROWS,
+    verbose: bool = True,
+) -> int:
+    """
+    Replace the database contents with a generated dataset. Bookings are
+    inserted into the database unless `to_database` is False, and exported
+    to the feature store at `feature_store_root` if given. Returns the
+    number of bookings generated.
+    """
+    from app.ml.feature_store import export_feature_store
+
+    hotels, room_types = generate_catalog(n_hotels, room_types_per_hotel, seed)
+    with engine.begin() as conn:
+        write_catalog(conn, hotels, room_types)
+
+    start = time.perf_counter()
+    n_total = 0
+
+    def chunks() -> Iterator[Dict[str, np.ndarray]]:
+        nonlocal n_total
+        blocks = generate_bookings(
+            room_types, n_days, start_date, seed=seed, mean_bookings=mean_bookings, chunk_rows=chunk_rows
+        )
+        for columns in blocks:
+            if to_database:
+                # One transaction per block keeps the write-ahead log bounded
+                with engine.begin() as conn:
+                    insert_bookings(conn, columns)
+            n_total += int(columns["booking_id"].shape[0])
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f"  {n_total:>12,} bookings  {elapsed:7.1f}s  ({n_total / elapsed:,.0f} rows/s)")
+            yield columns
+
+    if feature_store_root is not None:
+        export_feature_store(chunks(), STATUSES, feature_store_root)
+    else:
+        for _ in chunks():
+            pass
+    return n_total
+
+
+def main():
+    from app.ml.feature_store import FEATURE_STORE_DIR
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic hotel / booking dataset.")
+    parser.add_argument("--hotels", type=int, default=200)
+    parser.add_argument("--room-types", type=int, default=5, help="room types per hotel")
+    parser.add_argument("--days", type=int, default=3 * 365, help="check-in days per room type")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2023, 1, 1), help="first check-in date")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mean-bookings", type=float, default=MEAN_BOOKINGS,
+                        help="average bookings per room type per day")
+    parser.add_argument("--feature-store", nargs="?", const=FEATURE_STORE_DIR, default=None,
+                        help=f"also export to the feature store (default {FEATURE_STORE_DIR})")
+    parser.add_argument("--no-db-bookings", action="store_true",
+                        help="write only the catalog to the database (needs --feature-store)")
+    args = parser.parse_args()
+    if args.no_db_bookings and args.feature_store is None:
+        parser.error("--no-db-bookings needs --feature-store")
+
+    models.Base.metadata.create_all(bind=engine)
+    print(
+        f"Generating {args.hotels} hotels x {args.room_types} room types x {args.days} days "
+        f"(seed {args.seed})..."
+    )
+    start = time.perf_counter()
+    n_total = generate_dataset(
+        args.hotels,
+        args.room_types,
+        args.days,
+        args.start,
+        seed=args.seed,
+        mean_bookings=args.mean_bookings,
+        to_database=not args.no_db_bookings,
+        feature_store_root=args.feature_store,
+    )
+    print(f"Generated {n_total:,} bookings in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
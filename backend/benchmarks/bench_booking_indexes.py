@@ -0,0 +1,125 @@
+"""
+Benchmark: booking query plans and timings before and after the index migration.
+
+Seeds a scratch SQLite database with millions of bookings, drops the
+composite indexes to mimic a pre-migration database, then times the
+hot booking queries, runs app.migrations and times them again.
+
+Run from the backend directory:
+    python -m benchmarks.bench_booking_indexes [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from app import models
+from app.database import create_db_engine
+from app.migrations import MIGRATIONS, run_migrations
+
+N_HOTELS = 200
+ROOM_TYPES_PER_HOTEL = 5
+INDEX_NAMES = (
+    "ix_bookings_hotel_id_check_in_date",
+    "ix_bookings_room_type_id_check_in_date",
+    "ix_bookings_status",
+)
+
+QUERIES = {
+    "bookings for hotel": (
+        "SELECT * FROM bookings WHERE hotel_id = :hotel_id",
+        {"hotel_id": 42},
+    ),
+    "hotel check-in range": (
+        "SELECT * FROM bookings WHERE hotel_id = :hotel_id "
+        "AND check_in_date BETWEEN :start AND :end",
+        {"hotel_id": 42, "start": "2024-03-01", "end": "2024-03-31"},
+    ),
+    "room type check-in range": (
+        "SELECT COUNT(*) FROM bookings WHERE room_type_id = :room_type_id "
+        "AND check_in_date BETWEEN :start AND :end",
+        {"room_type_id": 211, "start": "2024-03-01", "end": "2024-03-31"},
+    ),
+    "no-show bookings": (
+        "SELECT COUNT(*) FROM bookings WHERE status = :status",
+        {"status": "no-show"},
+    ),
+}
+
+
+def seed(engine, n_rows: int) -> None:
+    rng = np.random.default_rng(42)
+    hotel_ids = rng.integers(1, N_HOTELS + 1, n_rows)
+    room_type_ids = (hotel_ids - 1) * ROOM_TYPES_PER_HOTEL + rng.integers(1, ROOM_TYPES_PER_HOTEL + 1, n_rows)
+    check_in = np.datetime64("2022-01-01") + rng.integers(0, 3 * 365, n_rows)
+    check_out = check_in + rng.integers(1, 4, n_rows)
+    booking = check_in - rng.integers(1, 31, n_rows)
+    status = rng.choice(np.array(["confirmed", "cancelled", "no-show"]), n_rows, p=[0.75, 0.2, 0.05])
+    price = np.round(rng.uniform(60, 400, n_rows), 2)
+
+    rows = zip(
+        hotel_ids.tolist(),
+        room_type_ids.tolist(),
+        booking.astype(str).tolist(),
+        check_in.astype(str).tolist(),
+        check_out.astype(str).tolist(),
+        status.tolist(),
+        price.tolist(),
+    )
+    raw = engine.raw_connection()
+    try:
+        raw.cursor().executemany(
+            "INSERT INTO bookings (hotel_id, room_type_id, booking_date, check_in_date, "
+            "check_out_date, status, price_sold) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def measure(engine, label: str) -> None:
+    print(f"\n{label}")
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).fetchall()
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                conn.execute(text(sql), params).fetchall()
+                timings.append(time.perf_counter() - start)
+            print(f"  {name:<26} {min(timings) * 1000:9.2f} ms   plan: {plan[0][-1]}")
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.Base.metadata.create_all(bind=engine)
+
+        # Pretend this database predates the indexes
+        with engine.begin() as conn:
+            for name in INDEX_NAMES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+        start = time.perf_counter()
+        seed(engine, n_rows)
+        print(f"Seeded {n_rows:,} bookings in {time.perf_counter() - start:.1f}s")
+
+        measure(engine, "Before migration (primary key only)")
+
+        start = time.perf_counter()
+        applied = run_migrations(engine)
+        print(f"\nApplied migrations {applied} in {time.perf_counter() - start:.1f}s")
+        assert applied == [v for v, _, _ in MIGRATIONS]
+
+        measure(engine, "After migration")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: booking ingestion throughput, one POST /bookings per row versus
+POST /bookings/bulk with JSON, NDJSON and CSV bodies.
+
+Runs the app in-process against a scratch SQLite database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bulk_ingest [bulk_rows]
+"""
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+N_HOTELS = 50
+ROOM_TYPES_PER_HOTEL = 4
+SINGLE_ROWS = 1000
+DEFAULT_BULK_ROWS = 100_000
+
+
+def make_bookings(n_rows: int, seed: int = 0) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    hotel_ids = rng.integers(1, N_HOTELS + 1, n_rows)
+    room_type_ids = (hotel_ids - 1) * ROOM_TYPES_PER_HOTEL + rng.integers(1, ROOM_TYPES_PER_HOTEL + 1, n_rows)
+    check_in = np.datetime64("2024-01-01") + rng.integers(0, 365, n_rows)
+    check_out = check_in + rng.integers(1, 5, n_rows)
+    booking = check_in - rng.integers(1, 60, n_rows)
+    status = rng.choice(np.array(["confirmed", "cancelled", "no-show"]), n_rows, p=[0.75, 0.2, 0.05])
+    price = np.round(rng.uniform(60, 300, n_rows), 2)
+    return [
+        {
+            "hotel_id": int(h),
+            "room_type_id": int(r),
+            "booking_date": str(b),
+            "check_in_date": str(ci),
+            "check_out_date": str(co),
+            "status": str(s),
+            "price_sold": float(p),
+        }
+        for h, r, b, ci, co, s, p in zip(hotel_ids, room_type_ids, booking, check_in, check_out, status, price)
+    ]
+
+
+def encode(rows: list[dict], fmt: str) -> tuple[bytes, str]:
+    if fmt == "json":
+        return json.dumps(rows).encode(), "application/json"
+    if fmt == "ndjson":
+        return "".join(json.dumps(r) + "\n" for r in rows).encode(), "application/x-ndjson"
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue().encode(), "text/csv"
+
+
+def main():
+    bulk_rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BULK_ROWS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # The app binds its engine at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from fastapi.testclient import TestClient
+
+        from app import models
+        from app.database import SessionLocal, engine
+        from app.main import app
+
+        with SessionLocal() as db:
+            for h in range(1, N_HOTELS + 1):
+                db.add(models.Hotel(id=h, name=f"Hotel {h}", city="Miami", country="USA"))
+                for k in range(ROOM_TYPES_PER_HOTEL):
+                    db.add(
+                        models.RoomType(
+                            id=(h - 1) * ROOM_TYPES_PER_HOTEL + k + 1,
+                            hotel_id=h,
+                            name="Standard",
+                            capacity=2,
+                            base_price=100.0,
+                        )
+                    )
+            db.commit()
+
+        # No lifespan: the model isn't needed for writes
+        client = TestClient(app)
+
+        rows = make_bookings(SINGLE_ROWS, seed=1)
+        start = time.perf_counter()
+        for row in rows:
+            client.post("/bookings", json=row).raise_for_status()
+        single_rate = SINGLE_ROWS / (time.perf_counter() - start)
+        print(f"POST /bookings (one row per request): {single_rate:10.0f} rows/s  ({SINGLE_ROWS} rows)")
+
+        rows = make_bookings(bulk_rows, seed=2)
+        for fmt in ("json", "ndjson", "csv"):
+            body, content_type = encode(rows, fmt)
+            start = time.perf_counter()
+            response = client.post("/bookings/bulk", content=body, headers={"content-type": content_type})
+            elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            result = response.json()
+            assert result["inserted"] == bulk_rows, result
+            rate = bulk_rows / elapsed
+            print(
+                f"POST /bookings/bulk ({fmt:<6})           : {rate:10.0f} rows/s  "
+                f"({bulk_rows} rows, {elapsed:.2f}s, {rate / single_rate:.0f}x)"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
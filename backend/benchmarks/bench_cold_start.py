@@ -0,0 +1,98 @@
+"""
+Benchmark: worker cold start and memory, pickled model vs memory-mapped artifact.
+
+Starts several worker processes at once (like uvicorn --workers N). Each one
+loads the model and runs its first prediction, then all of them report memory
+while still alive, so shared pages show up in PSS (proportional set size).
+
+Run from the backend directory:
+    python -m benchmarks.bench_cold_start
+"""
+import multiprocessing as mp
+import os
+import time
+
+N_WORKERS = 4
+
+
+def _memory_kb() -> dict:
+    """Rss and Pss of the current process, from /proc (Linux only)."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key.lower()] = int(rest.split()[0])
+    return usage
+
+
+def _worker(mode: str, barrier, results) -> None:
+    before = _memory_kb()
+    start = time.perf_counter()
+
+    if mode == "pickle":
+        import numpy as np
+        from app.ml.predict import _load_model_and_features
+
+        model, feature_columns = _load_model_and_features()
+        model.predict(np.zeros((1, len(feature_columns))))
+    else:
+        from app.ml.predict import load_price_model
+
+        load_price_model()
+
+    elapsed = time.perf_counter() - start
+
+    # Measure while every worker is still holding its model
+    barrier.wait()
+    after = _memory_kb()
+    results.put(
+        {
+            "load_s": elapsed,
+            "rss_mb": (after["rss"] - before["rss"]) / 1024,
+            "pss_mb": (after["pss"] - before["pss"]) / 1024,
+        }
+    )
+    barrier.wait()
+
+
+def run(mode: str, n_workers: int = N_WORKERS) -> list[dict]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(n_workers)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(mode, barrier, results))
+        for _ in range(n_workers)
+    ]
+    for p in procs:
+        p.start()
+    stats = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return stats
+
+
+def main():
+    from app.ml.forest import FOREST_DIRNAME
+    from app.ml.predict import MODELS_DIR
+
+    if not os.path.isdir(os.path.join(MODELS_DIR, FOREST_DIRNAME)):
+        print("No forest artifact found; exporting it first (python -m app.ml.forest)")
+        from app.ml import forest
+
+        forest.main()
+
+    print(f"{N_WORKERS} workers, model load + first prediction, memory delta per worker")
+    for mode in ("pickle", "artifact"):
+        stats = run(mode)
+        load = sorted(s["load_s"] for s in stats)
+        rss = sum(s["rss_mb"] for s in stats) / len(stats)
+        pss = sum(s["pss_mb"] for s in stats) / len(stats)
+        print(
+            f"  {mode:<9} cold start {load[len(load) // 2] * 1000:8.1f} ms (median)"
+            f"   RSS +{rss:6.1f} MB   PSS +{pss:6.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark: concurrent booking writes under different database configurations.
+
+Several writer processes insert bookings one commit at a time (like
+POST /bookings) while reader processes keep scanning the bookings table
+(like GET /bookings). Reports write throughput and how many writes failed
+with "database is locked".
+
+Run from the backend directory:
+    python -m benchmarks.bench_db_writes
+Set BENCH_POSTGRES_URL to include a PostgreSQL run.
+"""
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+N_WRITERS = 4
+N_READERS = 2
+WRITES_PER_WRITER = 300
+SEED_BOOKINGS = 20_000
+
+MODES = {
+    # What app/database.py did before: rollback journal, full fsync, pysqlite's 5s timeout
+    "sqlite rollback journal": dict(
+        sqlite_journal_mode="DELETE", sqlite_synchronous="FULL", sqlite_busy_timeout_ms=5000
+    ),
+    "sqlite WAL + NORMAL": dict(
+        sqlite_journal_mode="WAL", sqlite_synchronous="NORMAL", sqlite_busy_timeout_ms=5000
+    ),
+}
+
+
+def _session_factory(url: str, options: dict):
+    from app.database import create_db_engine
+
+    engine = create_db_engine(url, **options)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _writer(url: str, options: dict, results) -> None:
+    from app import models
+
+    engine, Session = _session_factory(url, options)
+    ok = locked = 0
+    for i in range(WRITES_PER_WRITER):
+        db = Session()
+        try:
+            db.add(
+                models.Booking(
+                    hotel_id=1,
+                    room_type_id=1,
+                    booking_date=date(2025, 1, 1),
+                    check_in_date=date(2025, 2, 1),
+                    check_out_date=date(2025, 2, 2),
+                    status="confirmed",
+                    price_sold=100.0 + i,
+                )
+            )
+            db.commit()
+            ok += 1
+        except OperationalError:
+            db.rollback()
+            locked += 1
+        finally:
+            db.close()
+    engine.dispose()
+    results.put((ok, locked))
+
+
+def _reader(url: str, options: dict, stop) -> None:
+    from app import models
+
+    engine, Session = _session_factory(url, options)
+    while not stop.is_set():
+        db = Session()
+        try:
+            db.query(models.Booking).filter(models.Booking.hotel_id == 1).all()
+        except OperationalError:
+            pass
+        finally:
+            db.close()
+    engine.dispose()
+
+
+def _prepare(url: str, options: dict) -> None:
+    from app import models
+    from app.database import Base
+
+    engine, Session = _session_factory(url, options)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session()
+    db.add(models.Hotel(id=1, name="Bench Hotel", city="Miami", country="USA"))
+    db.add(models.RoomType(id=1, hotel_id=1, name="Standard", capacity=2, base_price=80.0))
+    db.commit()
+    db.execute(
+        models.Booking.__table__.insert(),
+        [
+            dict(
+                hotel_id=1,
+                room_type_id=1,
+                booking_date=date(2024, 1, 1),
+                check_in_date=date(2024, 2, 1),
+                check_out_date=date(2024, 2, 2),
+                status="confirmed",
+                price_sold=90.0,
+            )
+        ]
+        * SEED_BOOKINGS,
+    )
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def run(url: str, options: dict) -> dict:
+    _prepare(url, options)
+
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    stop = ctx.Event()
+    readers = [ctx.Process(target=_reader, args=(url, options, stop)) for _ in range(N_READERS)]
+    writers = [ctx.Process(target=_writer, args=(url, options, results)) for _ in range(N_WRITERS)]
+
+    for p in readers:
+        p.start()
+    start = time.perf_counter()
+    for p in writers:
+        p.start()
+    counts = [results.get() for _ in writers]
+    elapsed = time.perf_counter() - start
+    for p in writers:
+        p.join()
+    stop.set()
+    for p in readers:
+        p.join()
+
+    engine, Session = _session_factory(url, options)
+    with Session() as db:
+        from app import models
+
+        total = db.execute(select(func.count()).select_from(models.Booking)).scalar_one()
+    engine.dispose()
+
+    ok = sum(c[0] for c in counts)
+    return {
+        "writes_ok": ok,
+        "writes_locked": sum(c[1] for c in counts),
+        "writes_per_s": ok / elapsed,
+        "rows": total,
+    }
+
+
+def main():
+    print(
+        f"{N_WRITERS} writers x {WRITES_PER_WRITER} single-booking commits, "
+        f"{N_READERS} concurrent readers, {SEED_BOOKINGS} pre-seeded rows"
+    )
+    targets = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, options in MODES.items():
+            url = f"sqlite:///{os.path.join(tmp, label.replace(' ', '_'))}.db"
+            targets.append((label, url, options))
+        if os.getenv("BENCH_POSTGRES_URL"):
+            targets.append(("postgresql (pooled)", os.environ["BENCH_POSTGRES_URL"], {}))
+
+        for label, url, options in targets:
+            r = run(url, options)
+            print(
+                f"  {label:<26} {r['writes_per_s']:8.1f} writes/s   "
+                f"ok {r['writes_ok']:5d}   locked {r['writes_locked']:4d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
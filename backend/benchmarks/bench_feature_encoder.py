@@ -0,0 +1,109 @@
+"""
+Micro-benchmark: single-row feature encoding, before and after the compiled encoder.
+
+Run from the backend directory:
+    python -m benchmarks.bench_feature_encoder
+"""
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.ml.predict import _build_feature_row, _load_model_and_features
+
+
+REQUEST = dict(
+    city="Miami",
+    room_type_name="Deluxe",
+    base_price=120.0,
+    room_capacity=2,
+    check_in_date=date(2025, 12, 19),
+    stay_length=2,
+    booking_window=5,
+)
+
+
+def legacy_build_feature_row(
+    feature_columns,
+    city,
+    room_type_name,
+    base_price,
+    room_capacity,
+    check_in_date,
+    stay_length,
+    booking_window,
+) -> pd.DataFrame:
+    """The original dict -> one-row DataFrame implementation, kept for comparison."""
+    data = {col: 0.0 for col in feature_columns}
+
+    check_in_weekday = check_in_date.weekday()
+    is_weekend_checkin = 1 if check_in_weekday in (4, 5) else 0
+
+    numeric_values = {
+        "base_price": base_price,
+        "room_capacity": room_capacity,
+        "stay_length": stay_length,
+        "booking_window": booking_window,
+        "check_in_weekday": check_in_weekday,
+        "is_weekend_checkin": is_weekend_checkin,
+    }
+    for col, val in numeric_values.items():
+        if col in data:
+            data[col] = float(val)
+
+    city_col = f"city_{city}"
+    if city_col in data:
+        data[city_col] = 1.0
+
+    rt_col = f"room_type_name_{room_type_name}"
+    if rt_col in data:
+        data[rt_col] = 1.0
+
+    return pd.DataFrame([data])
+
+
+def measure(fn, iterations: int) -> np.ndarray:
+    """Return per-call latencies in microseconds."""
+    for _ in range(min(iterations, 100)):  # warm-up
+        fn()
+    samples = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        samples[i] = time.perf_counter_ns() - start
+    return samples / 1000.0
+
+
+def report(label: str, samples: np.ndarray) -> None:
+    p50, p99 = np.percentile(samples, [50, 99])
+    print(f"  {label:<28} p50 {p50:10.1f} us   p99 {p99:10.1f} us")
+
+
+def main(iterations: int = 5000, predict_iterations: int = 300):
+    model, feature_columns = _load_model_and_features()
+
+    legacy_row = legacy_build_feature_row(feature_columns, **REQUEST)
+    new_row = _build_feature_row(**REQUEST)
+    assert np.array_equal(legacy_row.to_numpy(dtype=np.float64), new_row)
+
+    print(f"Feature encoding ({iterations} calls):")
+    report("before (dict -> DataFrame)", measure(
+        lambda: legacy_build_feature_row(feature_columns, **REQUEST), iterations
+    ))
+    report("after (compiled encoder)", measure(
+        lambda: _build_feature_row(**REQUEST), iterations
+    ))
+
+    print(f"\nEncode + model.predict ({predict_iterations} calls):")
+    report("before (dict -> DataFrame)", measure(
+        lambda: model.predict(legacy_build_feature_row(feature_columns, **REQUEST)),
+        predict_iterations,
+    ))
+    report("after (compiled encoder)", measure(
+        lambda: model.predict(_build_feature_row(**REQUEST)), predict_iterations
+    ))
+
+
+if __name__ == "__main__":
+    main()
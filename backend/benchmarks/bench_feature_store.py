@@ -0,0 +1,92 @@
+"""
+Benchmark: training data extraction from the database versus the feature store.
+
+Seeds a scratch SQLite database, then compares
+  - load_booking_data (full three-way join through pd.read_sql),
+  - building the feature store from scratch,
+  - an incremental sync after 1% more bookings arrive,
+  - read_feature_store (memory-mapped parts plus catalog join),
+each followed by engineer_features.
+
+Run from the backend directory:
+    python -m benchmarks.bench_feature_store [n_rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+CITIES = ("Miami", "Kansas City", "Hyderabad")
+ROOM_TYPE_NAMES = ("Standard", "Deluxe", "Suite", "Standard", "Deluxe")
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<44} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # app.database binds its engine at import time
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from app import models
+        from app.database import engine
+        from app.ml import feature_store
+        from app.ml.data_prep import load_booking_data
+        from app.ml.model_train import engineer_features
+        from benchmarks.bench_booking_indexes import N_HOTELS, ROOM_TYPES_PER_HOTEL, seed
+
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(
+                models.Hotel.__table__.insert(),
+                [
+                    {"id": h, "name": f"Hotel {h}", "city": CITIES[h % len(CITIES)], "country": "USA"}
+                    for h in range(1, N_HOTELS + 1)
+                ],
+            )
+            conn.execute(
+                models.RoomType.__table__.insert(),
+                [
+                    {
+                        "id": (h - 1) * ROOM_TYPES_PER_HOTEL + k + 1,
+                        "hotel_id": h,
+                        "name": ROOM_TYPE_NAMES[k],
+                        "capacity": 2 + k % 3,
+                        "base_price": 80.0 + 20 * k,
+                    }
+                    for h in range(1, N_HOTELS + 1)
+                    for k in range(ROOM_TYPES_PER_HOTEL)
+                ],
+            )
+        seed(engine, n_rows)
+        print(f"{n_rows:,} bookings, {N_HOTELS} hotels")
+
+        store = os.path.join(tmp, "feature_store")
+        timed("load_booking_data + engineer_features", lambda: engineer_features(load_booking_data()))
+        timed("feature store: initial build", lambda: feature_store.rebuild_feature_store(store))
+        timed(
+            "read_feature_store + engineer_features",
+            lambda: engineer_features(feature_store.read_feature_store(store)),
+        )
+
+        seed(engine, n_rows // 100)
+        print(f"+{n_rows // 100:,} new bookings")
+        timed("load_booking_data + engineer_features", lambda: engineer_features(load_booking_data()))
+        added = timed("feature store: incremental sync", lambda: feature_store.sync_feature_store(store))
+        assert added == n_rows // 100
+        timed(
+            "read_feature_store + engineer_features",
+            lambda: engineer_features(feature_store.read_feature_store(store)),
+        )
+        timed("feature store: compact", lambda: feature_store.compact_feature_store(store, max_parts=1))
+        timed("read_feature_store (compacted)", lambda: feature_store.read_feature_store(store))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: flattened-forest inference vs RandomForestRegressor.predict.
+
+Run from the backend directory:
+    python -m benchmarks.bench_forest
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.ml.forest import FlatForest
+from app.ml.predict import _get_encoder, _load_model_and_features
+from benchmarks.bench_feature_encoder import measure, report
+
+
+def sample_rows(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Random but realistic feature rows over the model's own vocabulary."""
+    encoder = _get_encoder()
+    rng = np.random.default_rng(seed)
+    cities = sorted(encoder.city_index)
+    room_types = sorted(encoder.room_type_index)
+    start = date(2025, 1, 1)
+    dates = np.array(
+        [start + timedelta(days=int(d)) for d in rng.integers(0, 365, n_rows)],
+        dtype="datetime64[D]",
+    ).astype(np.int64)
+    return encoder.encode_arrays(
+        city_names=cities,
+        city_codes=rng.integers(0, len(cities), n_rows),
+        room_type_names=room_types,
+        room_type_codes=rng.integers(0, len(room_types), n_rows),
+        base_prices=rng.choice([80.0, 120.0, 200.0], n_rows),
+        room_capacities=rng.choice([2.0, 4.0], n_rows),
+        check_in_weekdays=(dates + 3) % 7,
+        stay_lengths=rng.integers(1, 4, n_rows).astype(np.float64),
+        booking_windows=rng.integers(1, 31, n_rows).astype(np.float64),
+    )
+
+
+def main():
+    model, _ = _load_model_and_features()
+    forest = FlatForest.from_sklearn(model)
+
+    X = sample_rows(10_000)
+    max_diff = np.max(np.abs(forest.predict(X) - model.predict(X)))
+    print(f"Max |flat - sklearn| over {X.shape[0]} rows: {max_diff:.3e}")
+    assert max_diff < 1e-9
+
+    row = X[:1]
+    print("\nSingle row:")
+    report("sklearn predict", measure(lambda: model.predict(row), 200))
+    report("flat forest", measure(lambda: forest.predict(row), 2000))
+
+    for n_rows in (256, 512, 10_000):
+        batch = X[:n_rows]
+        print(f"\nBatch of {n_rows} rows:")
+        report("sklearn predict", measure(lambda: model.predict(batch), 20))
+        report("flat forest", measure(lambda: forest.predict(batch), 20))
+
+
+if __name__ == "__main__":
+    main()
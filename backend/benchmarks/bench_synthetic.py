@@ -0,0 +1,72 @@
+"""
+Benchmark: synthetic data generation throughput.
+
+Compares app.seed_data (per-row random calls and db.add) with the
+vectorized app.synthetic generator, timing generation alone, database
+inserts and feature store export. Uses a scratch SQLite database.
+
+Run from the backend directory:
+    python -m benchmarks.bench_synthetic [n_hotels]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+N_DAYS = 3 * 365
+ROOM_TYPES_PER_HOTEL = 5
+
+
+def main():
+    n_hotels = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        from app import models, seed_data, synthetic
+        from app.database import SessionLocal, engine
+        from app.ml.feature_store import export_feature_store
+
+        models.Base.metadata.create_all(bind=engine)
+
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            hotels = seed_data.seed_hotels(db)
+            room_types = seed_data.seed_room_types(db, hotels)
+            bookings = seed_data.seed_bookings(db, hotels, room_types)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+        print(f"seed_data (3 hotels, 180 days): {len(bookings):,} bookings in {elapsed:.2f}s "
+              f"({len(bookings) / elapsed:,.0f} rows/s)")
+
+        hotels, room_types = synthetic.generate_catalog(n_hotels, ROOM_TYPES_PER_HOTEL)
+        print(f"\nsynthetic: {n_hotels} hotels x {ROOM_TYPES_PER_HOTEL} room types x {N_DAYS} days")
+
+        def blocks():
+            return synthetic.generate_bookings(room_types, N_DAYS, date(2023, 1, 1))
+
+        start = time.perf_counter()
+        n_rows = sum(int(block["booking_id"].shape[0]) for block in blocks())
+        elapsed = time.perf_counter() - start
+        print(f"  generate only    {elapsed:7.2f}s  {n_rows / elapsed:>12,.0f} rows/s")
+
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            synthetic.write_catalog(conn, hotels, room_types)
+        for block in blocks():
+            with engine.begin() as conn:
+                synthetic.insert_bookings(conn, block)
+        elapsed = time.perf_counter() - start
+        print(f"  + database       {elapsed:7.2f}s  {n_rows / elapsed:>12,.0f} rows/s")
+
+        start = time.perf_counter()
+        export_feature_store(blocks(), synthetic.STATUSES, os.path.join(tmp, "feature_store"))
+        elapsed = time.perf_counter() - start
+        print(f"  + feature store  {elapsed:7.2f}s  {n_rows / elapsed:>12,.0f} rows/s")
+        print(f"  {n_rows:,} bookings")
+
+
+if __name__ == "__main__":
+    main()
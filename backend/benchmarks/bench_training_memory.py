@@ -0,0 +1,99 @@
+"""
+Benchmark: wall time and peak memory of the training pipelines.
+
+Seeds a scratch SQLite database, then trains in a fresh subprocess per
+mode (so each gets its own max RSS):
+  - full:           train_price_model (DataFrame + get_dummies, unbounded forest)
+  - chunked hist:   train_price_model_chunked(estimator="hist")
+  - chunked forest: train_price_model_chunked(estimator="forest", max_depth=16)
+
+Run from the backend directory:
+    python -m benchmarks.bench_training_memory [n_rows]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {
+    "full": "from app.ml.model_train import train_price_model as t; t(use_feature_store=False)",
+    "chunked hist": (
+        "from app.ml.model_train import train_price_model_chunked as t; "
+        "t(estimator='hist', trace_memory=False)"
+    ),
+    "chunked forest": (
+        "from app.ml.model_train import train_price_model_chunked as t; "
+        "t(estimator='forest', trace_memory=False)"
+    ),
+}
+
+# Printed by the child after training, parsed by the parent
+_REPORT_RSS = (
+    "; import resource; "
+    "print('MAX_RSS_MB', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"
+)
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    backend_dir = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["DATABASE_URL"] = url
+        from app import models
+        from app.database import engine
+        from benchmarks.bench_booking_indexes import N_HOTELS, ROOM_TYPES_PER_HOTEL, seed
+        from benchmarks.bench_feature_store import CITIES, ROOM_TYPE_NAMES
+
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(
+                models.Hotel.__table__.insert(),
+                [
+                    {"id": h, "name": f"Hotel {h}", "city": CITIES[h % len(CITIES)], "country": "USA"}
+                    for h in range(1, N_HOTELS + 1)
+                ],
+            )
+            conn.execute(
+                models.RoomType.__table__.insert(),
+                [
+                    {
+                        "id": (h - 1) * ROOM_TYPES_PER_HOTEL + k + 1,
+                        "hotel_id": h,
+                        "name": ROOM_TYPE_NAMES[k],
+                        "capacity": 2 + k % 3,
+                        "base_price": 80.0 + 20 * k,
+                    }
+                    for h in range(1, N_HOTELS + 1)
+                    for k in range(ROOM_TYPES_PER_HOTEL)
+                ],
+            )
+        seed(engine, n_rows)
+        engine.dispose()
+        print(f"{n_rows:,} bookings")
+
+        # Registry paths are relative, so each child publishes into the scratch dir
+        env = dict(os.environ, PYTHONPATH=backend_dir)
+        for label, code in MODES.items():
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-c", code + _REPORT_RSS],
+                cwd=tmp,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            elapsed = time.perf_counter() - start
+            if result.returncode != 0:
+                print(f"  {label:<16} failed:\n{result.stderr[-2000:]}")
+                continue
+            lines = result.stdout.splitlines()
+            rss = next(float(l.split()[1]) for l in lines if l.startswith("MAX_RSS_MB"))
+            mae = next((l.split()[1] for l in lines if l.strip().startswith("MAE:")), "?")
+            print(f"  {label:<16} {elapsed:8.1f} s   max RSS {rss:8.1f} MB   MAE {mae}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+Benchmark suite for the API, inference, training and database hot paths.
+
+Everything runs in-process against a scratch SQLite database, model
+registry and feature store in a temporary directory. Datasets come from
+app.synthetic, so runs are repeatable. The API is driven through an
+in-process ASGI client (httpx.ASGITransport), with no sockets involved.
+
+Groups:
+  training  load_booking_data, engineer_features and fit, across dataset sizes
+  predict   predict_price_for_stay called directly
+  api       POST /price-recommendation latency and throughput per concurrency level
+  startup   `import app.main` time and time to first request of a fresh uvicorn
+            process, with default settings ("full") and as a lean serving
+            process ("lean": INFERENCE_EXPORTED_ONLY=1, DB_AUTO_MIGRATE=0).
+            A lean process that imports pandas or scikit-learn fails the run.
+  lists     GET /bookings and /hotels/{id}/bookings latency across table sizes
+
+Every metric lands in a flat JSON file (benchmarks/results/latest.json).
+--save-baseline also stores it as the baseline. --compare checks it
+against the baseline and exits with status 1 if any metric got worse by
+more than --threshold (default 20%). Timings are machine-specific, so
+results/ is not committed; save a baseline on the machine you compare on.
+
+Needs httpx (a FastAPI test dependency, not in requirements.txt).
+
+Run from the backend directory:
+    python -m benchmarks.suite [--quick] [--only api,predict] [--save-baseline | --compare]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+LATEST_PATH = os.path.join(RESULTS_DIR, "latest.json")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+GROUPS = ("training", "predict", "api", "startup", "lists")
+
+# Dataset shape: bookings ~= hotels x ROOM_TYPES_PER_HOTEL x N_DAYS
+ROOM_TYPES_PER_HOTEL = 5
+N_DAYS = 365
+START_DATE = date(2024, 1, 1)
+
+# (full, --quick)
+TRAINING_SIZES = ((10_000, 50_000, 200_000), (5_000, 20_000))
+LIST_TABLE_SIZES = ((10_000, 100_000, 1_000_000), (10_000, 100_000))
+CONCURRENCY_LEVELS = ((1, 4, 16, 64), (1, 8))
+API_REQUESTS = (1000, 200)
+PREDICT_CALLS = (5000, 1000)
+LIST_REQUESTS = (200, 50)
+STARTUP_RUNS = (5, 3)
+
+# Environment of each startup mode, on top of the suite's
+STARTUP_MODES = {
+    "full": {},
+    "lean": {"INFERENCE_EXPORTED_ONLY": "1", "DB_AUTO_MIGRATE": "0"},
+}
+# Must never be imported by a lean serving process
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "joblib")
+# Give up on a server that hasn't answered by then
+STARTUP_TIMEOUT_S = 60
+
+# Dataset the served model is trained on
+SERVING_ROWS = 20_000
+
+
+class Results:
+    """
+    Flat metric name -> {value, unit, better, gate} mapping. Metrics with
+    gate=False are compared but never fail the regression check.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower", gate: bool = True) -> None:
+        self.metrics[name] = {"value": float(value), "unit": unit, "better": better, "gate": gate}
+        print(f"  {name:<48} {value:>12.3f} {unit}")
+
+    def add_latencies(self, prefix: str, seconds: list, unit: str = "ms") -> None:
+        scale = 1e3 if unit == "ms" else 1e6
+        p50, p95, p99 = np.percentile(np.asarray(seconds) * scale, [50, 95, 99])
+        self.add(f"{prefix}.p50_{unit}", p50, unit)
+        self.add(f"{prefix}.p95_{unit}", p95, unit)
+        # Tail latencies over a few hundred samples are too noisy to gate on
+        self.add(f"{prefix}.p99_{unit}", p99, unit, gate=False)
+
+
+def _size_label(n: int) -> str:
+    return f"{n // 1_000_000}m" if n >= 1_000_000 else f"{n // 1_000}k"
+
+
+def _generate(n_rows: int, seed: int = 42) -> int:
+    """Replace the database with a synthetic dataset of about n_rows bookings."""
+    from app.synthetic import generate_dataset
+
+    n_hotels = max(1, round(n_rows / (ROOM_TYPES_PER_HOTEL * N_DAYS)))
+    return generate_dataset(
+        n_hotels, ROOM_TYPES_PER_HOTEL, N_DAYS, START_DATE, seed=seed, verbose=False
+    )
+
+
+def _room_catalog() -> list:
+    """(room_type_id, hotel_id, name, capacity, base_price, city) for every room type."""
+    from sqlalchemy import text
+
+    from app.database import engine
+
+    with engine.connect() as conn:
+        return conn.execute(
+            text(
+                "SELECT rt.id, rt.hotel_id, rt.name, rt.capacity, rt.base_price, h.city "
+                "FROM room_types rt JOIN hotels h ON rt.hotel_id = h.id ORDER BY rt.id"
+            )
+        ).all()
+
+
+def _request_payloads(n: int, seed: int = 0) -> list:
+    """Random price requests over the current catalog and the next year of dates."""
+    room_types = _room_catalog()
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(room_types), n)
+    offsets = rng.integers(0, 365, n)
+    stays = rng.integers(1, 8, n)
+    windows = rng.integers(0, 61, n)
+    today = date.today()
+    return [
+        {
+            "hotel_id": room_types[p].hotel_id,
+            "room_type_id": room_types[p].id,
+            "check_in_date": (today + timedelta(days=int(o))).isoformat(),
+            "stay_length": int(s),
+            "booking_window": int(w),
+        }
+        for p, o, s, w in zip(picks, offsets, stays, windows)
+    ]
+
+
+# ---------- groups ----------
+
+def bench_training(results: Results, sizes) -> None:
+    from sklearn.ensemble import RandomForestRegressor
+
+    from app.ml.data_prep import load_booking_data
+    from app.ml.model_train import engineer_features
+
+    print("training")
+    for size in sizes:
+        n_rows = _generate(size)
+        label = f"training.{_size_label(size)}"
+
+        start = time.perf_counter()
+        df = load_booking_data()
+        loaded = time.perf_counter()
+        X, y, _ = engineer_features(df)
+        engineered = time.perf_counter()
+        # Same estimator as train_price_model
+        RandomForestRegressor(n_estimators=200, max_depth=None, random_state=42, n_jobs=-1).fit(X, y)
+        fitted = time.perf_counter()
+
+        print(f"  ({n_rows:,} bookings)")
+        results.add(f"{label}.load_s", loaded - start, "s")
+        results.add(f"{label}.engineer_s", engineered - loaded, "s")
+        results.add(f"{label}.fit_s", fitted - engineered, "s")
+
+
+def _serve_model() -> None:
+    """Train and activate the model the predict and api groups call."""
+    from app.catalog import catalog
+    from app.ml.model_train import train_price_model
+    from app.ml.predict import reload_model
+
+    _generate(SERVING_ROWS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        train_price_model(use_feature_store=False)
+    catalog.invalidate()
+    reload_model()
+
+
+def bench_predict(results: Results, n_calls: int) -> None:
+    from app.ml.predict import predict_price_for_stay, prediction_cache
+
+    print("predict")
+    room_types = {row.id: row for row in _room_catalog()}
+    calls = []
+    for payload in _request_payloads(n_calls, seed=1):
+        room_type = room_types[payload["room_type_id"]]
+        calls.append(
+            dict(
+                city=room_type.city,
+                room_type_name=room_type.name,
+                base_price=room_type.base_price,
+                room_capacity=room_type.capacity,
+                check_in_date=date.fromisoformat(payload["check_in_date"]),
+                stay_length=payload["stay_length"],
+                booking_window=payload["booking_window"],
+                hotel_id=payload["hotel_id"],
+            )
+        )
+
+    prediction_cache.clear()
+    for kwargs in calls[:50]:
+        predict_price_for_stay(**kwargs)
+    prediction_cache.clear()
+
+    latencies = []
+    start = time.perf_counter()
+    for kwargs in calls:
+        t0 = time.perf_counter()
+        predict_price_for_stay(**kwargs)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    results.add_latencies("predict.price_for_stay", latencies, unit="us")
+    results.add("predict.price_for_stay.calls_per_s", n_calls / elapsed, "calls/s", better="higher")
+
+
+async def _run_concurrent(client, method: str, url: str, payloads: list, concurrency: int):
+    """Send one request per payload with at most `concurrency` in flight."""
+    latencies = []
+    queue = iter(payloads)
+
+    async def worker():
+        for payload in queue:
+            t0 = time.perf_counter()
+            response = await client.request(method, url, json=payload)
+            latencies.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def _bench_api(results: Results, levels, n_requests: int) -> None:
+    import httpx
+
+    from app.main import app
+    from app.ml.predict import prediction_cache
+
+    print("api")
+    payloads = _request_payloads(n_requests, seed=2)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _run_concurrent(client, "POST", "/price-recommendation", payloads[:20], 1)
+            for concurrency in levels:
+                prediction_cache.clear()
+                latencies, elapsed = await _run_concurrent(
+                    client, "POST", "/price-recommendation", payloads, concurrency
+                )
+                label = f"api.price_recommendation.c{concurrency}"
+                results.add_latencies(label, latencies)
+                results.add(f"{label}.rps", len(payloads) / elapsed, "req/s", better="higher")
+
+
+def bench_api(results: Results, levels, n_requests: int) -> None:
+    asyncio.run(_bench_api(results, levels, n_requests))
+
+
+async def _bench_lists(results: Results, sizes, n_requests: int) -> None:
+    import httpx
+
+    from app.catalog import catalog
+    from app.main import app
+
+    print("lists")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for size in sizes:
+            n_rows = _generate(size, seed=3)
+            catalog.invalidate()
+            print(f"  ({n_rows:,} bookings)")
+            label = f"lists.{_size_label(size)}"
+            n_hotels = len({row.hotel_id for row in _room_catalog()})
+            rng = np.random.default_rng(4)
+            endpoints = {
+                "bookings": ["/bookings?limit=100"] * n_requests,
+                # Late cursors: a page near the end of the table
+                "bookings_deep": [
+                    f"/bookings?limit=100&cursor={int(c)}"
+                    for c in rng.integers(max(1, n_rows - 1000), n_rows + 1, n_requests)
+                ],
+                "hotel_bookings": [
+                    f"/hotels/{int(h)}/bookings?limit=100&status=confirmed"
+                    for h in rng.integers(1, n_hotels + 1, n_requests)
+                ],
+            }
+            for name, urls in endpoints.items():
+                latencies = []
+                for url in urls:
+                    t0 = time.perf_counter()
+                    response = await client.get(url)
+                    latencies.append(time.perf_counter() - t0)
+                    response.raise_for_status()
+                results.add_latencies(f"{label}.{name}", latencies)
+
+
+def bench_lists(results: Results, sizes, n_requests: int) -> None:
+    asyncio.run(_bench_lists(results, sizes, n_requests))
+
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted({m.split(".")[0] for m in sys.modules})}))
+"""
+
+
+def _startup_env(mode: str) -> dict:
+    env = dict(os.environ, **STARTUP_MODES[mode])
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (BACKEND_DIR, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def _import_app(mode: str) -> dict:
+    """Import app.main in a fresh interpreter; its import seconds and top-level modules."""
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE], env=_startup_env(mode), capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _first_request(mode: str, payload: dict) -> float:
+    """Seconds from spawning a uvicorn worker to its first 200 on /price-recommendation."""
+    import urllib.error
+    import urllib.request
+
+    port = _free_port()
+    body = json.dumps(payload).encode()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=_startup_env(mode),
+    )
+    try:
+        while time.perf_counter() - start < STARTUP_TIMEOUT_S:
+            if server.poll() is not None:
+                raise RuntimeError(f"{mode} server exited with status {server.returncode}")
+            request = urllib.request.Request(
+                f"http://127.0.0.1:{port}/price-recommendation",
+                data=body,
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except urllib.error.HTTPError:
+                raise
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError(f"{mode} server did not answer within {STARTUP_TIMEOUT_S}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def bench_startup(results: Results, n_runs: int) -> None:
+    print("startup")
+    payload = _request_payloads(1, seed=5)[0]
+    for mode in STARTUP_MODES:
+        imports = [_import_app(mode) for _ in range(n_runs)]
+        heavy = sorted(set(HEAVY_MODULES) & set(imports[-1]["modules"]))
+        if mode == "lean" and heavy:
+            raise RuntimeError(f"lean serving process imported {', '.join(heavy)}")
+        results.add(f"startup.{mode}.import_s", np.median([r["seconds"] for r in imports]), "s")
+        results.add(f"startup.{mode}.modules", len(imports[-1]["modules"]), "modules", gate=False)
+        results.add(
+            f"startup.{mode}.first_request_s", np.median([_first_request(mode, payload) for _ in range(n_runs)]), "s"
+        )
+
+
+# ---------- baseline ----------
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Names of metrics that got worse than the baseline by more than `threshold`."""
+    regressions = []
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, metric in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None or base["value"] <= 0:
+            continue
+        ratio = metric["value"] / base["value"]
+        # A throughput drop to 1/(1+t) is the same slowdown as a latency rise to (1+t)
+        worse = ratio > 1 + threshold if metric["better"] == "lower" else ratio < 1 / (1 + threshold)
+        worse = worse and metric.get("gate", True)
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<48} {base['value']:>12.3f} {metric['value']:>12.3f} {ratio - 1:>+8.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="smaller datasets and fewer requests")
+    parser.add_argument("--only", default=",".join(GROUPS), help=f"comma-separated groups from {GROUPS}")
+    parser.add_argument("--output", default=LATEST_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help=f"also write {BASELINE_PATH}")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, default=None,
+                        help="baseline file to check against (default: the saved baseline)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    mode = 1 if args.quick else 0
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = Results()
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before anything imports app.database
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["FEATURE_STORE_DIR"] = os.path.join(tmp, "feature_store")
+        # The model registry uses paths relative to the working directory
+        sys.path.insert(0, os.getcwd())
+        os.chdir(tmp)
+
+        from app.database import engine
+        from app.migrations import init_schema
+
+        init_schema(engine)
+
+        if "training" in groups:
+            bench_training(results, TRAINING_SIZES[mode])
+        if {"predict", "api", "startup"} & set(groups):
+            _serve_model()
+        if "predict" in groups:
+            bench_predict(results, PREDICT_CALLS[mode])
+        if "api" in groups:
+            bench_api(results, CONCURRENCY_LEVELS[mode], API_REQUESTS[mode])
+        if "startup" in groups:
+            bench_startup(results, STARTUP_RUNS[mode])
+        if "lists" in groups:
+            bench_lists(results, LIST_TABLE_SIZES[mode], LIST_REQUESTS[mode])
+        engine.dispose()
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "quick": args.quick,
+        "groups": groups,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seconds": time.perf_counter() - started,
+        "metrics": results.metrics,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results.metrics)} metrics to {output}")
+    if args.save_baseline:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {BASELINE_PATH}")
+
+    if baseline_path is not None:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != args.quick:
+            print("warning: baseline and current run use different --quick settings")
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Startup checks: the lean serving process stays free of the training stack,
+and a fresh app answers its first price request.
+
+Both run `app.main` in a fresh interpreter against a copy of the committed
+hotel_pricing.db, so settings read at import time apply and the real
+database is never written.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "joblib")
+
+_IMPORT_PROBE = """
+import json, sys
+import app.main
+print(json.dumps(sorted({m.split(".")[0] for m in sys.modules})))
+"""
+
+_FIRST_REQUEST = """
+import json, sys
+from fastapi.testclient import TestClient
+from app.main import app
+with TestClient(app) as client:
+    response = client.post("/price-recommendation", json=json.loads(sys.argv[1]))
+print(json.dumps({"status": response.status_code, "body": response.json()}))
+"""
+
+
+@pytest.fixture
+def database(tmp_path) -> str:
+    path = tmp_path / "hotel_pricing.db"
+    shutil.copy(os.path.join(BACKEND_DIR, "hotel_pricing.db"), path)
+    return str(path)
+
+
+def _run(script: str, database: str, *args: str, **env: str) -> object:
+    environ = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database}",
+        # No background sweep writing the grid while the test runs
+        RATE_GRID_SWEEP_INTERVAL_SECONDS="0",
+        **env,
+    )
+    environ["PYTHONPATH"] = os.pathsep.join(p for p in (BACKEND_DIR, environ.get("PYTHONPATH")) if p)
+    out = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        cwd=BACKEND_DIR,
+        env=environ,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_lean_import_skips_training_stack(database):
+    modules = _run(_IMPORT_PROBE, database, INFERENCE_EXPORTED_ONLY="1", DB_AUTO_MIGRATE="0")
+    assert not set(HEAVY_MODULES) & set(modules)
+
+
+def test_first_request(database):
+    with sqlite3.connect(database) as conn:
+        hotel_id, room_type_id = conn.execute("SELECT hotel_id, id FROM room_types ORDER BY id LIMIT 1").fetchone()
+    payload = {
+        "hotel_id": hotel_id,
+        "room_type_id": room_type_id,
+        "check_in_date": (date.today() + timedelta(days=30)).isoformat(),
+        "stay_length": 2,
+        "booking_window": 14,
+    }
+    result = _run(_FIRST_REQUEST, database, json.dumps(payload))
+    assert result["status"] == 200, result["body"]
+    assert result["body"]["recommended_price"] > 0